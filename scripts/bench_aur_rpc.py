@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for AURClient and the pacman helpers that
+use it, run against the local fake AUR server.
+
+Usage: scripts/bench_aur_rpc.py [--iterations 20] [--latency 0.05]
+           [--jitter 0.02] [--rate 5] [--failure-rate 0.05]
+           [--recordings FILE] [--installed 200]
+
+Reports p50/p95 latency, requests and response bytes per operation.
+When pacman is not installed, list_installed_aur and list_aur_updates run
+against a small pacman stand-in that lists ``--installed`` packages from
+the catalog as foreign packages.
+"""
+import argparse
+import os
+import random
+import shutil
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_aur_server import FakeAURServer, load_catalog
+from rune.api.aur import AURClient
+from rune.core.pacman import list_aur_updates, list_installed_aur
+
+
+PACMAN_STANDIN = """#!/bin/sh
+if [ "$1" = "-Qm" ]; then
+    cat "{listing}"
+    exit 0
+fi
+echo "pacman stand-in only supports -Qm" >&2
+exit 1
+"""
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def install_standins(directory, catalog, count):
+    rng = random.Random(1)
+    records = rng.sample(catalog.packages, min(count, len(catalog.packages)))
+    listing = os.path.join(directory, "foreign.txt")
+    with open(listing, "w", encoding="utf-8") as f:
+        for record in records:
+            version = record.get("Version") or "1.0-1"
+            # Every third package is behind the AUR version.
+            if rng.random() < 0.33:
+                version = "0." + version
+            f.write(f"{record['Name']} {version}\n")
+
+    path = os.path.join(directory, "pacman")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PACMAN_STANDIN.format(listing=listing))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+
+
+def run(label, func, server, iterations):
+    latencies = []
+    errors = 0
+    server.reset_stats()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        try:
+            func()
+        except (ConnectionError, ValueError, RuntimeError):
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    stats = server.stats()
+    print(
+        f"{label:<28} p50 {percentile(latencies, 0.5) * 1000:8.1f} ms"
+        f"  p95 {percentile(latencies, 0.95) * 1000:8.1f} ms"
+        f"  req/op {stats['requests'] / iterations:6.1f}"
+        f"  KiB/op {stats['bytes'] / iterations / 1024:8.1f}"
+        f"  conns {stats['connections']:3d}"
+        f"  429 {stats['throttled']:3d}  fail {stats['failed']:3d}  errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate", type=float)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--recordings")
+    parser.add_argument("--installed", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.recordings)
+    names = [record["Name"] for record in catalog.packages]
+    rng = random.Random(0)
+    info_small = rng.sample(names, min(20, len(names)))
+    info_large = rng.sample(names, min(500, len(names)))
+    query = names[0].rsplit("-", 1)[0]
+
+    standin_dir = None
+    if shutil.which("pacman") is None:
+        standin_dir = tempfile.mkdtemp(prefix="runa-bench-")
+        install_standins(standin_dir, catalog, args.installed)
+
+    server = FakeAURServer(
+        catalog,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate=args.rate,
+        burst=args.burst,
+        failure_rate=args.failure_rate,
+    )
+    print(
+        f"catalog: {len(names)} packages, latency {args.latency * 1000:.0f} ms,"
+        f" {args.iterations} iterations"
+        + ("" if standin_dir is None else ", pacman stand-in")
+    )
+    with server:
+        client = AURClient(base_url=server.url, backoff_base=0.05)
+        try:
+            run(f"search name-desc '{query}'", lambda: client.search(query), server, args.iterations)
+            run(f"search name '{query}'", lambda: client.search(query, by="name"), server, args.iterations)
+            run(f"info {len(info_small)} names", lambda: client.info(info_small), server, args.iterations)
+            run(f"info {len(info_large)} names", lambda: client.info(info_large), server, args.iterations)
+            run("list_installed_aur", lambda: list_installed_aur(client), server, args.iterations)
+            run("list_aur_updates", lambda: list_aur_updates(client), server, args.iterations)
+        finally:
+            client.close()
+
+    if standin_dir is not None:
+        shutil.rmtree(standin_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
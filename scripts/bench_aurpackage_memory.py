@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare the memory held by AURPackage instances against the previous
+dict-backed class on a 100k-record packages-meta dump.
+
+Usage: scripts/bench_aurpackage_memory.py [packages-meta-ext-v1.json.gz]
+
+Without an argument a synthetic dump with the same shape is generated.
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rune.api.aur import AURPackage
+from rune.api.index import load_packages_meta
+
+
+class LegacyAURPackage:
+    def __init__(self, data):
+        self.name = data.get("Name", "")
+        self.version = data.get("Version", "")
+        self.description = data.get("Description", "")
+        self.maintainer = data.get("Maintainer", "orphan")
+        self.votes = data.get("NumVotes", 0)
+        self.popularity = data.get("Popularity", 0.0)
+        self.out_of_date = data.get("OutOfDate")
+        self.first_submitted = data.get("FirstSubmitted", 0)
+        self.last_modified = data.get("LastModified", 0)
+        self.url = data.get("URL", "")
+        self.url_path = data.get("URLPath", "")
+        self.depends = data.get("Depends", [])
+        self.make_depends = data.get("MakeDepends", [])
+        self.opt_depends = data.get("OptDepends", [])
+        self.conflicts = data.get("Conflicts", [])
+        self.license = data.get("License", [])
+        self.keywords = data.get("Keywords", [])
+
+
+def synthetic_dump(count):
+    rng = random.Random(0)
+    words = ["python", "git", "rust", "qt", "gtk", "font", "theme", "audio", "bin", "lib"]
+    records = []
+    for i in range(count):
+        name = f"{rng.choice(words)}-{rng.choice(words)}-{i}"
+        record = {
+            "ID": i,
+            "Name": name,
+            "PackageBase": name,
+            "Version": f"{rng.randint(0, 9)}.{rng.randint(0, 99)}-1",
+            "Description": f"Synthetic package {i} for {rng.choice(words)}",
+            "URL": f"https://example.org/{name}",
+            "NumVotes": rng.randint(0, 2000),
+            "Popularity": rng.random() * 20,
+            "OutOfDate": None,
+            "Maintainer": f"user{rng.randint(0, 20000)}" if rng.random() > 0.1 else None,
+            "FirstSubmitted": 1400000000 + i,
+            "LastModified": 1600000000 + i,
+            "URLPath": f"/cgit/aur.git/snapshot/{name}.tar.gz",
+        }
+        # Mirror the dump: list fields are omitted when empty.
+        if rng.random() > 0.3:
+            record["Depends"] = [rng.choice(words) for _ in range(rng.randint(1, 5))]
+        if rng.random() > 0.6:
+            record["MakeDepends"] = ["cmake", "git"]
+        if rng.random() > 0.2:
+            record["License"] = ["MIT"]
+        records.append(record)
+    return records
+
+
+def measure(cls, records):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    packages = [cls(record) for record in records]
+    elapsed = time.perf_counter() - started
+    # Touch the list fields the GUI and installer read.
+    for package in packages:
+        package.depends
+        package.make_depends
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del packages
+    return size, elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        records = load_packages_meta(sys.argv[1])
+    else:
+        records = synthetic_dump(100_000)
+
+    print(f"records: {len(records)}")
+    results = {}
+    for label, cls in (("legacy", LegacyAURPackage), ("slotted", AURPackage)):
+        size, elapsed = measure(cls, records)
+        results[label] = size
+        print(f"{label:>8}: {size / 1024 / 1024:8.2f} MiB  {elapsed * 1000:8.1f} ms")
+    saved = 1 - results["slotted"] / results["legacy"]
+    print(f"   saved: {saved:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Compare the rune.core.backend implementations on one fixture database:
+time each query and check every backend returns the same packages.
+
+Usage: scripts/bench_backends.py [--packages 2000] [--repeat 3]
+
+A synthetic local database and a ``core`` sync database holding most of
+its packages (some at newer versions) are written to a temporary
+directory. The local database reader always runs; the pyalpm backend
+runs when pyalpm is installed and the subprocess backend when pacman is,
+both pointed at the fixture with --dbpath/--config.
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_installed_packages import synthetic_db, write_local_db
+from rune.core.backend import AlpmBackend, BackendUnavailable, LocalDBBackend, SubprocessBackend
+from rune.core.localdb import LocalDB
+from rune.core.snapshot import InstalledSnapshot
+from rune.core.syncdb import SyncDB
+
+
+PACMAN_CONF = """[options]
+Architecture = auto
+SigLevel = Never
+
+[core]
+Server = file:///nonexistent
+"""
+
+QUERIES = ("installed", "explicit", "orphans", "foreign", "updates")
+
+
+def bump(version):
+    pkgver, pkgrel = version.rsplit("-", 1)
+    return f"{pkgver}-{int(pkgrel) + 1}"
+
+
+def write_sync_db(dbpath, db):
+    rng = random.Random(2)
+    sync = os.path.join(dbpath, "sync")
+    os.makedirs(sync)
+    with tarfile.open(os.path.join(sync, "core.db"), "w:gz") as tar:
+        for p in db:
+            # About one in ten packages is foreign, one in five outdated.
+            roll = rng.random()
+            if roll < 0.1:
+                continue
+            version = bump(p["version"]) if roll < 0.3 else p["version"]
+            desc = (
+                f"%FILENAME%\n{p['name']}-{version}-x86_64.pkg.tar.zst\n\n"
+                f"%NAME%\n{p['name']}\n\n%VERSION%\n{version}\n\n"
+                f"%DESC%\n{p['description']}\n\n%CSIZE%\n262144\n\n%ISIZE%\n1048576\n\n"
+                "%ARCH%\nx86_64\n\n"
+            ).encode("utf-8")
+            info = tarfile.TarInfo(f"{p['name']}-{version}/desc")
+            info.size = len(desc)
+            info.mtime = 1700000000
+            tar.addfile(info, io.BytesIO(desc))
+
+
+def summary(query, result):
+    if query == "updates":
+        return [(pkg.name, pkg.version, sync.version) for pkg, sync in result]
+    return [(pkg.name, pkg.version) for pkg in result]
+
+
+def best_of(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="runa-bench-")
+    try:
+        dbpath = os.path.join(directory, "db")
+        conf = os.path.join(directory, "pacman.conf")
+        db = synthetic_db(args.packages)
+        write_local_db(dbpath, db)
+        write_sync_db(dbpath, db)
+        with open(conf, "w", encoding="utf-8") as f:
+            f.write(PACMAN_CONF)
+
+        backends = [
+            ("localdb", LocalDBBackend(LocalDB(dbpath), SyncDB(dbpath, conf))),
+            ("localdb+snapshot", LocalDBBackend(
+                InstalledSnapshot(dbpath, path=os.path.join(directory, "snapshot.json")),
+                SyncDB(dbpath, conf),
+            )),
+        ]
+        try:
+            backends.append(("pyalpm", AlpmBackend(dbpath, conf, root=directory)))
+        except BackendUnavailable as e:
+            print(f"skipping pyalpm: {e}")
+        if shutil.which("pacman") is not None:
+            backends.append(("subprocess", SubprocessBackend(dbpath, conf)))
+        else:
+            print("skipping subprocess: pacman is not installed")
+
+        print(f"{args.packages} installed packages, best of {args.repeat}")
+        print(f"{'backend':<17}" + "".join(f"{q:>14}" for q in QUERIES))
+        reference = {}
+        for label, backend in backends:
+            cells = []
+            for query in QUERIES:
+                try:
+                    result, elapsed = best_of(getattr(backend, query), args.repeat)
+                except (BackendUnavailable, RuntimeError) as e:
+                    cells.append(f"{'error':>14}")
+                    print(f"{label} {query}: {e}", file=sys.stderr)
+                    continue
+                rows = summary(query, result)
+                expected = reference.setdefault(query, rows)
+                mark = " " if rows == expected else "!"
+                cells.append(f"{elapsed * 1000:10.1f} ms{mark}")
+            print(f"{label:<17}" + "".join(cells))
+        print("! marks results that differ from the first backend")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
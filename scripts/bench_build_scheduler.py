@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Time rune.core.scheduler.BuildScheduler on a synthetic build plan with
+simulated builds, at several job counts.
+
+Usage: scripts/bench_build_scheduler.py [--packages 40] [--build-time 0.05] [--jobs 1 2 4 8]
+
+Each package depends on up to three earlier ones, so the plan has long
+chains as well as independent branches. A build sleeps for a random
+multiple of --build-time and an install for a tenth of it. Every run
+checks that each package was installed after its AUR dependencies.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rune.api.aur import AURPackage
+from rune.core.resolver import BuildPlan
+from rune.core.scheduler import BuildScheduler
+
+
+def synthetic_plan(count, rng):
+    edges = {}
+    for i in range(count):
+        name = f"pkg{i:03d}"
+        edges[name] = sorted(rng.sample(sorted(edges), min(len(edges), rng.randint(0, 3))))
+    # Packages only depend on earlier ones, so creation order is a
+    # valid build order.
+    order = list(edges)
+    packages = [AURPackage({"Name": name, "Version": "1-1"}) for name in order]
+    return BuildPlan(targets=order[-5:], order=packages, edges=edges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=40)
+    parser.add_argument("--build-time", type=float, default=0.05)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    plan = synthetic_plan(args.packages, rng)
+    durations = {pkg.name: args.build_time * rng.uniform(0.5, 3) for pkg in plan.order}
+
+    for jobs in args.jobs:
+        installed = []
+
+        def build(package):
+            time.sleep(durations[package.name])
+            return [f"{package.name}-1-1-x86_64.pkg.tar.zst"]
+
+        def install(package, files):
+            time.sleep(args.build_time / 10)
+            installed.append(package.name)
+
+        scheduler = BuildScheduler(plan, build, install, jobs=jobs, memory_budget=1 << 50)
+        started = time.perf_counter()
+        results = scheduler.run()
+        elapsed = time.perf_counter() - started
+        position = {name: i for i, name in enumerate(installed)}
+        ordered = all(
+            position[dep] < position[name] for name, needs in plan.edges.items() for dep in needs
+        )
+        print(
+            f"jobs={jobs:<3} {elapsed * 1000:8.1f} ms  "
+            f"{len(results['success'])}/{len(plan.order)} installed  "
+            f"{'ok' if ordered and not results['failed'] else 'WRONG'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
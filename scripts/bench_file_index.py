@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Time the file-ownership index in rune.core.fileindex on a fixture
+database and check its answers against the files written.
+
+Usage: scripts/bench_file_index.py [--packages 2000] [--lookups 1000]
+
+Each synthetic package gets a ``files`` entry of 10 to 300 paths. The
+index is built cold, loaded from disk, refreshed after upgrading a few
+packages, and queried in bulk. ``usr/bin`` is also created on disk, with
+some stray files, for the unowned-file scan. When pacman is installed the
+same lookups are timed with one ``pacman -Qo`` per path.
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_installed_packages import synthetic_db, write_local_db
+from rune.core.fileindex import FileIndex
+
+
+SHARED_DIRS = ["usr/", "usr/bin/", "usr/lib/", "usr/share/", "usr/share/doc/"]
+
+
+def package_files(p, rng):
+    name = p["name"]
+    files = SHARED_DIRS + [
+        f"usr/bin/{name}",
+        f"usr/lib/{name}/",
+        f"usr/share/doc/{name}/",
+        f"usr/share/doc/{name}/README",
+    ]
+    files += [f"usr/lib/{name}/module-{i:03d}.so" for i in range(rng.randint(6, 296))]
+    return sorted(files)
+
+
+def write_files(dbpath, db, rng):
+    owned = {}
+    for p in db:
+        files = package_files(p, rng)
+        entry = os.path.join(dbpath, "local", f"{p['name']}-{p['version']}")
+        with open(os.path.join(entry, "files"), "w", encoding="utf-8") as f:
+            f.write("%FILES%\n" + "".join(f"{path}\n" for path in files) + "\n")
+        for path in files:
+            owned.setdefault(path, []).append(p["name"])
+    return owned
+
+
+def upgrade(dbpath, p, rng):
+    """Replace a package's local database entry, as an upgrade does."""
+    local = os.path.join(dbpath, "local")
+    shutil.rmtree(os.path.join(local, f"{p['name']}-{p['version']}"))
+    p["version"] = p["version"].rsplit("-", 1)[0] + "-9"
+    entry = os.path.join(local, f"{p['name']}-{p['version']}")
+    os.makedirs(entry)
+    with open(os.path.join(entry, "desc"), "w", encoding="utf-8") as f:
+        f.write(f"%NAME%\n{p['name']}\n\n%VERSION%\n{p['version']}\n\n")
+    files = package_files(p, rng) + [f"usr/lib/{p['name']}/added.so"]
+    with open(os.path.join(entry, "files"), "w", encoding="utf-8") as f:
+        f.write("%FILES%\n" + "".join(f"{path}\n" for path in sorted(files)) + "\n")
+    return files
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    directory = tempfile.mkdtemp(prefix="runa-bench-")
+    try:
+        dbpath = os.path.join(directory, "db")
+        root = os.path.join(directory, "root")
+        cache = os.path.join(directory, "file-index")
+        log = os.path.join(directory, "pacman.log")
+        db = synthetic_db(args.packages)
+        write_local_db(dbpath, db)
+        owned = write_files(dbpath, db, rng)
+
+        os.makedirs(os.path.join(root, "usr", "bin"))
+        for p in db:
+            open(os.path.join(root, "usr", "bin", p["name"]), "w").close()
+        strays = sorted(f"usr/bin/stray-{i}" for i in range(25))
+        for path in strays:
+            open(os.path.join(root, path), "w").close()
+
+        paths = rng.sample(sorted(owned), min(args.lookups, len(owned)))
+        queries = ["/" + path for path in paths] + ["/usr/bin/not-installed"]
+
+        index = FileIndex(dbpath, root=root, path=cache, log_path=log)
+        count, cold = timed(lambda: len(index))
+        print(f"{args.packages} packages, {count} paths")
+        print(f"cold build          {cold:8.1f} ms")
+
+        loaded, load = timed(lambda: FileIndex(dbpath, root=root, path=cache, log_path=log))
+        len(loaded)
+        print(f"load from disk      {load:8.1f} ms  ({loaded.reread} entries read)")
+
+        result, lookup = timed(lambda: loaded.owners(queries))
+        wrong = sum(
+            1 for query, path in zip(queries, paths) if result[query] != sorted(owned[path])
+        ) + (result["/usr/bin/not-installed"] != [])
+        print(f"owners x{len(queries):<5}      {lookup:8.2f} ms  {wrong} wrong")
+
+        name = db[0]["name"]
+        files, list_time = timed(lambda: loaded.files(name))
+        expected = sorted(os.path.join(root, path) for path, names in owned.items() if name in names)
+        print(f"files({name})   {list_time:8.2f} ms  {'ok' if files == expected else 'WRONG'}")
+
+        unowned, scan = timed(lambda: loaded.unowned("/usr/bin"))
+        expected = [os.path.join(root, path) for path in strays]
+        print(f"unowned /usr/bin    {scan:8.2f} ms  {'ok' if unowned == expected else 'WRONG'}")
+
+        upgraded = rng.sample(db, 5)
+        for p in upgraded:
+            upgrade(dbpath, p, rng)
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("[ALPM] upgraded 5 packages\n")
+        before = loaded.reread
+        _, refresh = timed(lambda: len(loaded))
+        new_paths = ["/usr/lib/" + p["name"] + "/added.so" for p in upgraded]
+        result = loaded.owners(new_paths)
+        ok = all(result[path] == [p["name"]] for path, p in zip(new_paths, upgraded))
+        print(
+            f"refresh, 5 upgrades {refresh:8.1f} ms  ({loaded.reread - before} entries read)"
+            f"  {'ok' if ok else 'WRONG'}"
+        )
+
+        if shutil.which("pacman") is not None:
+            sample = queries[:50]
+
+            def per_path():
+                for path in sample:
+                    subprocess.run(
+                        ["pacman", "-Qo", "--dbpath", dbpath, "--root", root, path],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    )
+
+            _, qo = timed(per_path)
+            print(f"pacman -Qo x{len(sample)}      {qo:8.1f} ms")
+        else:
+            print("pacman not installed; skipping pacman -Qo comparison")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
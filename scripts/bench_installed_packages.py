@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Count the pacman processes and time taken to list installed packages,
+comparing the previous one-``pacman -Qi``-per-package implementation with
+the bulk query and the local database reader in rune.core. All must
+return identical results.
+
+Usage: scripts/bench_installed_packages.py [--packages 300] [--standin]
+
+Without pacman on PATH (or with --standin) a stand-in pacman serving a
+synthetic local database of ``--packages`` entries is used, and the same
+packages are written out as a local database tree for LocalDB.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rune.core import pacman
+from rune.core.backend import LocalDBBackend, SubprocessBackend
+from rune.core.localdb import LocalDB
+from rune.core.pacman import RepoPackage
+
+
+PACMAN_STANDIN = '''#!{python}
+import json, sys
+with open({db!r}) as f:
+    db = json.load(f)
+args = sys.argv[1:]
+flags = "".join(a.lstrip("-") for a in args if a.startswith("-"))
+names = [a for a in args if not a.startswith("-")]
+if not flags.startswith("Q"):
+    sys.exit("pacman stand-in only supports -Q")
+flags = flags[1:]
+info = "i" in flags
+flags = flags.replace("i", "")
+selected = [p for p in db
+            if ("e" not in flags or p["explicit"])
+            and ("d" not in flags or not p["explicit"])
+            and ("t" not in flags or not p["required_by"])]
+if names:
+    by_name = {{p["name"]: p for p in db}}
+    missing = [n for n in names if n not in by_name]
+    if missing:
+        sys.exit("error: package '%s' was not found" % missing[0])
+    selected = [by_name[n] for n in names]
+if not selected:
+    sys.exit(1)
+out = sys.stdout
+for p in selected:
+    if not info:
+        out.write("%s %s\\n" % (p["name"], p["version"]))
+        continue
+    out.write("Name            : %s\\n" % p["name"])
+    out.write("Version         : %s\\n" % p["version"])
+    out.write("Description     : %s\\n" % p["description"])
+    out.write("Architecture    : x86_64\\n")
+    out.write("URL             : https://example.org/%s\\n" % p["name"])
+    out.write("Licenses        : MIT\\n")
+    out.write("Depends On      : %s\\n" % ("  ".join(p["depends"]) or "None"))
+    out.write("Optional Deps   : %s\\n" % (p["optdepends"][0] if p["optdepends"] else "None"))
+    for opt in p["optdepends"][1:]:
+        out.write("                  %s\\n" % opt)
+    out.write("Required By     : %s\\n" % ("  ".join(p["required_by"]) or "None"))
+    out.write("Installed Size  : 1024.00 KiB\\n")
+    out.write("Install Reason  : %s\\n" % ("Explicitly installed" if p["explicit"]
+                                          else "Installed as a dependency for another package"))
+    out.write("Validated By    : Signature\\n\\n")
+'''
+
+
+def synthetic_db(count):
+    rng = random.Random(0)
+    names = [f"pkg-{i:05d}" for i in range(count)]
+    db = []
+    for i, name in enumerate(names):
+        depends = rng.sample(names[:i], min(i, rng.randint(0, 4)))
+        db.append({
+            "name": name,
+            "version": f"{rng.randint(0, 9)}.{rng.randint(0, 40)}-{rng.randint(1, 3)}",
+            "description": f"Synthetic package {i}: a description with colons: yes",
+            "explicit": rng.random() < 0.3,
+            "depends": depends,
+            "optdepends": [f"{n}: optional support" for n in rng.sample(names, 2)],
+            "required_by": [],
+        })
+    by_name = {p["name"]: p for p in db}
+    for p in db:
+        for dep in p["depends"]:
+            by_name[dep]["required_by"].append(p["name"])
+        # -Qt also skips packages that are only optionally required.
+        for opt in p["optdepends"]:
+            name = opt.split(":", 1)[0]
+            if name != p["name"]:
+                by_name[name]["required_by"].append(p["name"])
+    return db
+
+
+def write_local_db(dbpath, db):
+    local = os.path.join(dbpath, "local")
+    os.makedirs(local)
+    with open(os.path.join(local, "ALPM_DB_VERSION"), "w") as f:
+        f.write("9\n")
+    for p in db:
+        entry = os.path.join(local, f"{p['name']}-{p['version']}")
+        os.makedirs(entry)
+        sections = [
+            ("NAME", [p["name"]]),
+            ("VERSION", [p["version"]]),
+            ("BASE", [p["name"]]),
+            ("DESC", [p["description"]]),
+            ("URL", [f"https://example.org/{p['name']}"]),
+            ("ARCH", ["x86_64"]),
+            ("BUILDDATE", ["1700000000"]),
+            ("INSTALLDATE", ["1700000100"]),
+            ("SIZE", ["1048576"]),
+            ("REASON", [] if p["explicit"] else ["1"]),
+            ("LICENSE", ["MIT"]),
+            ("VALIDATION", ["pgp"]),
+            ("DEPENDS", p["depends"]),
+            ("OPTDEPENDS", p["optdepends"]),
+        ]
+        with open(os.path.join(entry, "desc"), "w", encoding="utf-8") as f:
+            for key, values in sections:
+                if values:
+                    f.write(f"%{key}%\n" + "".join(f"{v}\n" for v in values) + "\n")
+
+
+def install_standin(directory, count):
+    db = synthetic_db(count)
+    db_path = os.path.join(directory, "local.json")
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump(db, f)
+    write_local_db(os.path.join(directory, "db"), db)
+    path = os.path.join(directory, "pacman")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PACMAN_STANDIN.format(python=sys.executable, db=db_path))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+
+
+def legacy_package_info(name, version):
+    info = SubprocessBackend().run(["-Qi", name])
+    repo = ""
+    desc = ""
+    for info_line in info.splitlines():
+        if ":" in info_line:
+            key, value = info_line.split(":", 1)
+            k = key.strip().lower()
+            if "repository" in k:
+                repo = value.strip()
+            elif "description" in k:
+                desc = value.strip()
+    return RepoPackage(name=name, version=version, description=desc, repo=repo, local_version=version)
+
+
+def legacy_list(flags):
+    output = SubprocessBackend().run([f"-Q{flags}"])
+    packages = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            packages.append(legacy_package_info(parts[0], parts[1]))
+    return packages
+
+
+class CountingPopen(subprocess.Popen):
+    spawned = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingPopen.spawned += 1
+        super().__init__(*args, **kwargs)
+
+
+def measure(func):
+    CountingPopen.spawned = 0
+    started = time.perf_counter()
+    try:
+        result = func()
+    except RuntimeError:
+        result = []
+    return result, time.perf_counter() - started, CountingPopen.spawned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--packages", type=int, default=300)
+    parser.add_argument("--standin", action="store_true")
+    args = parser.parse_args()
+
+    standin_dir = None
+    local_db = LocalDB()
+    if args.standin or shutil.which("pacman") is None:
+        standin_dir = tempfile.mkdtemp(prefix="runa-bench-")
+        install_standin(standin_dir, args.packages)
+        local_db = LocalDB(os.path.join(standin_dir, "db"))
+        print(f"pacman stand-in with {args.packages} packages")
+
+    subprocess.Popen = CountingPopen
+    try:
+        for label, flags, func in (
+            ("all", "", pacman.list_all_installed_packages),
+            ("explicit", "e", pacman.list_explicit_installed_packages),
+            ("orphans", "dt", pacman.list_orphan_packages),
+        ):
+            old, old_time, old_spawned = measure(lambda: legacy_list(flags))
+            bulk, bulk_time, bulk_spawned = measure(lambda: func(SubprocessBackend()))
+            local, local_time, local_spawned = measure(lambda: func(LocalDBBackend(local_db)))
+            same = "identical" if old == bulk == local else "DIFFERENT"
+            print(
+                f"{label:<9} {len(bulk):5d} pkgs  per-package: {old_spawned:5d} procs {old_time:7.2f} s"
+                f"  bulk: {bulk_spawned:2d} procs {bulk_time:6.3f} s"
+                f"  localdb: {local_spawned:2d} procs {local_time:6.3f} s  {same}"
+            )
+    finally:
+        subprocess.Popen = CountingPopen.__bases__[0]
+        if standin_dir is not None:
+            shutil.rmtree(standin_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
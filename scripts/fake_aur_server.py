@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AUR RPC interface (v5) for benchmarks.
+
+Responses are replayed from a recordings file when the exact request was
+recorded; any other search or info request is answered from the recorded
+package records, the same way aurweb would. Latency, throttling and
+failures can be injected.
+
+Usage:
+    scripts/fake_aur_server.py [--port 8080] [--recordings FILE]
+        [--latency 0.05] [--jitter 0.02] [--rate 5] [--burst 10]
+        [--failure-rate 0.1] [--failure-status 503]
+    scripts/fake_aur_server.py record FILE QUERY... [--info NAME...]
+
+Without --recordings a synthetic catalog is served.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rune.api.aur import AUR_RPC_URL, USER_AGENT
+
+
+# aurweb refuses searches matching more results than this.
+MAX_RESULTS = 5000
+SEARCH_FIELDS = {
+    "name": lambda r: [r.get("Name") or ""],
+    "name-desc": lambda r: [r.get("Name") or "", r.get("Description") or ""],
+    "maintainer": lambda r: [r.get("Maintainer") or ""],
+    "keywords": lambda r: r.get("Keywords") or [],
+    "depends": lambda r: r.get("Depends") or [],
+    "makedepends": lambda r: r.get("MakeDepends") or [],
+    "optdepends": lambda r: r.get("OptDepends") or [],
+    "checkdepends": lambda r: r.get("CheckDepends") or [],
+}
+
+
+def request_key(params):
+    return json.dumps(sorted(params), separators=(",", ":"))
+
+
+def error_body(message):
+    return {"version": 5, "type": "error", "resultcount": 0, "results": [], "error": message}
+
+
+def results_body(kind, results):
+    return {"version": 5, "type": kind, "resultcount": len(results), "results": results}
+
+
+def load_recordings(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    replies = {
+        request_key([tuple(p) for p in entry["params"]]): (entry.get("status", 200), entry["body"])
+        for entry in data.get("requests", [])
+    }
+    return data.get("packages", []), replies
+
+
+def synthetic_catalog(count=20000):
+    from bench_aurpackage_memory import synthetic_dump
+
+    records = synthetic_dump(count)
+    for record in records:
+        # packages-meta omits the search-only fields the RPC returns.
+        record.setdefault("PackageBaseID", record["ID"])
+        record.setdefault("Keywords", [])
+    return records
+
+
+class Catalog:
+    def __init__(self, packages, replies=None):
+        self.packages = packages
+        self.by_name = {record["Name"]: record for record in packages}
+        self.replies = replies or {}
+
+    def answer(self, params):
+        recorded = self.replies.get(request_key(params))
+        if recorded is not None:
+            return recorded
+
+        values = {}
+        names = []
+        for key, value in params:
+            if key == "arg[]":
+                names.append(value)
+            else:
+                values[key] = value
+
+        kind = values.get("type")
+        if values.get("v") != "5":
+            return 200, error_body("Invalid version specified.")
+        if kind in ("info", "multiinfo"):
+            if "arg" in values:
+                names.append(values["arg"])
+            results = [self.by_name[name] for name in names if name in self.by_name]
+            return 200, results_body("multiinfo", results)
+        if kind == "search":
+            by = values.get("by", "name-desc")
+            field = SEARCH_FIELDS.get(by)
+            if field is None:
+                return 200, error_body("Incorrect by field specified.")
+            needle = values.get("arg", "")
+            if len(needle) < 2:
+                return 200, error_body("Query arg too small.")
+            needle = needle.lower()
+            exact = by in ("maintainer", "keywords") or by.endswith("depends")
+            results = [
+                record for record in self.packages
+                if any(
+                    (text.lower() == needle) if exact else (needle in text.lower())
+                    for text in field(record)
+                )
+            ]
+            if len(results) > MAX_RESULTS:
+                return 200, error_body("Too many package results.")
+            return 200, results_body("search", results)
+        if not kind:
+            return 200, error_body("No request type/data specified.")
+        return 200, error_body("Incorrect request type specified.")
+
+
+class FakeAURServer:
+    """
+    Threaded HTTP/1.1 server speaking the AUR RPC on 127.0.0.1.
+
+    ``rate``/``burst`` enable a token bucket that answers 429 with
+    Retry-After once exhausted; ``failure_rate`` makes that fraction of
+    requests fail with ``failure_status``. ``stats()`` counts requests and
+    response bytes on the wire.
+    """
+
+    def __init__(
+        self,
+        catalog,
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        rate=None,
+        burst=10,
+        failure_rate=0.0,
+        failure_status=503,
+        seed=0,
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.burst = burst
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/rpc/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"requests": 0, "bytes": 0, "throttled": 0, "failed": 0, "connections": 0}
+            self._seen_connections = set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, handler, body_size, outcome=None):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes"] += body_size
+            if outcome:
+                self._stats[outcome] += 1
+            connection = id(handler.connection)
+            if connection not in self._seen_connections:
+                self._seen_connections.add(connection)
+                self._stats["connections"] += 1
+
+    def _take_token(self):
+        if not self.rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def _send(self, handler, status, body, headers=None, outcome=None):
+        payload = json.dumps(body).encode("utf-8")
+        gzipped = "gzip" in handler.headers.get("Accept-Encoding", "")
+        if gzipped:
+            payload = gzip.compress(payload, compresslevel=6)
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        if gzipped:
+            handler.send_header("Content-Encoding", "gzip")
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        # Count before writing so the client never sees an uncounted reply.
+        self._count(handler, len(payload), outcome)
+        handler.wfile.write(payload)
+
+    def _handle(self, handler):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if not self._take_token():
+            retry_after = max(1, int(round(1.0 / self.rate)))
+            self._send(
+                handler, 429, error_body("Rate limit reached"),
+                {"Retry-After": str(retry_after)}, "throttled",
+            )
+            return
+        with self._lock:
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+        if fail:
+            self._send(handler, self.failure_status, error_body("Injected failure"), outcome="failed")
+            return
+
+        parsed = urllib.parse.urlsplit(handler.path)
+        if parsed.path.rstrip("/") != "/rpc":
+            self._send(handler, 404, error_body("Not found"), outcome="failed")
+            return
+        params = urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+        status, body = self.catalog.answer(params)
+        self._send(handler, status, body)
+
+
+def record(path, queries, info_names, base_url=AUR_RPC_URL):
+    """Capture live RPC responses into a recordings file."""
+    requests = []
+    packages = {}
+
+    def fetch(params):
+        url = f"{base_url}?{urllib.parse.urlencode(params, safe='[]')}"
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(req, timeout=30) as response:
+            body = json.load(response)
+            status = response.status
+        requests.append({"params": params, "status": status, "body": body})
+        for result in body.get("results", []):
+            packages.setdefault(result["Name"], result)
+
+    for query in queries:
+        fetch([("v", "5"), ("type", "search"), ("by", "name-desc"), ("arg", query)])
+    if info_names:
+        fetch([("v", "5"), ("type", "info")] + [("arg[]", name) for name in info_names])
+    # Error cases.
+    fetch([("v", "5"), ("type", "search"), ("by", "name"), ("arg", "a")])
+    fetch([("v", "5"), ("type", "bogus"), ("arg", "yay")])
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"requests": requests, "packages": list(packages.values())}, f)
+    print(f"recorded {len(requests)} requests, {len(packages)} packages to {path}")
+
+
+def load_catalog(recordings=None):
+    if recordings:
+        return Catalog(*load_recordings(recordings))
+    return Catalog(synthetic_catalog())
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        parser = argparse.ArgumentParser(prog="fake_aur_server.py record")
+        parser.add_argument("path")
+        parser.add_argument("queries", nargs="*")
+        parser.add_argument("--info", nargs="*", default=[])
+        args = parser.parse_args(sys.argv[2:])
+        record(args.path, args.queries, args.info)
+        return
+
+    parser = argparse.ArgumentParser(description="Serve a fake AUR RPC interface")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--recordings")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate", type=float)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = FakeAURServer(
+        load_catalog(args.recordings),
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate=args.rate,
+        burst=args.burst,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+    )
+    print(f"serving {len(server.catalog.packages)} packages at {server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,27 @@
-from rune.api.aur import AURClient, AURPackage
+from rune.api.aio import AsyncAURClient
+from rune.api.aur import AURClient, AURPackage, InfoResult
+from rune.api.cache import ResponseCache
+from rune.api.coalesce import CoalescingClient, RequestCoalescer, SupersededError
+from rune.api.index import AURIndex
+from rune.api.instant import InstantIndex
+from rune.api.popular import PopularNotReady, PopularPackages
+from rune.api.ratelimit import RateLimiter, RateLimitExceeded
+from rune.api.resultset import ResultSet
 
-__all__ = ["AURClient", "AURPackage"]
+__all__ = [
+    "AURClient",
+    "AsyncAURClient",
+    "AURPackage",
+    "InfoResult",
+    "ResponseCache",
+    "CoalescingClient",
+    "RequestCoalescer",
+    "SupersededError",
+    "AURIndex",
+    "InstantIndex",
+    "PopularNotReady",
+    "PopularPackages",
+    "RateLimiter",
+    "RateLimitExceeded",
+    "ResultSet",
+]
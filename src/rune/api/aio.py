@@ -0,0 +1,352 @@
+import asyncio
+import json
+import ssl
+import urllib.parse
+import zlib
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from rune.api.aur import (
+    AUR_RPC_URL,
+    INFO_MAX_URI_LENGTH,
+    RETRY_STATUSES,
+    USER_AGENT,
+    AURPackage,
+    InfoResult,
+    _info_batches,
+    _merge_info,
+    backoff_delay,
+)
+from rune.api.cache import Params, ResponseCache
+from rune.api.ratelimit import RateLimiter
+
+if TYPE_CHECKING:
+    from rune.api.popular import PopularPackages
+
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _Response:
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def will_close(self) -> bool:
+        return self.headers.get("connection", "").lower() == "close"
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, 65536))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def _read_response(reader: asyncio.StreamReader) -> _Response:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed by server")
+    parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    status = int(parts[1])
+    reason = parts[2] if len(parts) > 2 else ""
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    gzipped = headers.get("content-encoding", "").lower() == "gzip"
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    chunks = []
+    async for chunk in _read_body(reader, headers):
+        chunks.append(decoder.decompress(chunk) if decoder else chunk)
+    if decoder:
+        chunks.append(decoder.flush())
+    if "content-length" not in headers and "transfer-encoding" not in headers:
+        headers["connection"] = "close"
+    return _Response(status, reason, headers, b"".join(chunks))
+
+
+class AsyncAURClient:
+    """
+    asyncio counterpart of AURClient.
+
+    Requests run on the caller's event loop over keep-alive stream
+    connections; at most ``max_concurrency`` are in flight at once, and
+    identical requests already in flight are shared. The cache, rate
+    limiter and retry policy behave as in AURClient and may be shared
+    with one, so both count against the same budget.
+    """
+
+    def __init__(
+        self,
+        base_url: str = AUR_RPC_URL,
+        max_concurrency: int = 8,
+        pool_size: int = 4,
+        timeout: float = 30.0,
+        popular: Optional["PopularPackages"] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+    ):
+        parts = urllib.parse.urlsplit(base_url)
+        self.base_url = base_url
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or ""
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.pool_size = max(0, int(pool_size))
+        self.timeout = timeout
+        self.popular = popular
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._path = parts.path or "/"
+        self._idle: List[Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Keeps stale-while-revalidate refreshes alive until they finish.
+        self._background: Set[asyncio.Future] = set()
+        self.created = 0
+        self.reused = 0
+        self.retries = 0
+        self.shared = 0
+
+    def connection_stats(self) -> Dict[str, int]:
+        return {"created": self.created, "reused": self.reused, "idle": len(self._idle)}
+
+    def remaining_budget(self) -> Optional[int]:
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.remaining()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def __aenter__(self) -> "AsyncAURClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _connect(self) -> Tuple[Connection, bool]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            self.reused += 1
+            return (reader, writer), True
+        self.created += 1
+        context = ssl.create_default_context() if self.scheme == "https" else None
+        conn = await asyncio.open_connection(
+            self.host, self.port, ssl=context,
+            server_hostname=self.host if context else None,
+        )
+        return conn, False
+
+    def _release(self, conn: Connection, response: _Response) -> None:
+        if response.will_close or len(self._idle) >= self.pool_size:
+            conn[1].close()
+            return
+        self._idle.append(conn)
+
+    async def _roundtrip(self, path: str) -> _Response:
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Accept: application/json\r\n"
+            "Accept-Encoding: gzip\r\n"
+            "Connection: keep-alive\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+
+        for attempt in range(2):
+            conn, reused = await self._connect()
+            reader, writer = conn
+            try:
+                writer.write(request)
+                await writer.drain()
+                response = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError, zlib.error) as e:
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise ConnectionError(f"Failed to connect to AUR: {e}")
+            except BaseException:
+                # Cancelled mid-response; the stream is unusable.
+                writer.close()
+                raise
+            self._release(conn, response)
+            return response
+        raise ConnectionError("Failed to connect to AUR")
+
+    async def _fetch(self, path: str) -> Dict:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                # acquire() may sleep until the next token, so it must not
+                # block the loop.
+                await loop.run_in_executor(None, self.rate_limiter.acquire)
+            async with self._semaphore:
+                try:
+                    response = await asyncio.wait_for(self._roundtrip(path), self.timeout)
+                except asyncio.TimeoutError:
+                    raise ConnectionError("Failed to connect to AUR: timed out")
+
+            if response.status < 400:
+                try:
+                    data: Dict = json.loads(response.body)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid response from AUR: {e}")
+                return data
+            if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+            delay = backoff_delay(
+                attempt, response.headers.get("retry-after"), self.backoff_base, self.backoff_cap
+            )
+            if response.status == 429 and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            self.retries += 1
+            await asyncio.sleep(delay)
+        raise ConnectionError(
+            f"Failed to connect to AUR: HTTP Error {response.status}: {response.reason}"
+        )
+
+    async def _shared_fetch(self, path: str) -> Dict:
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(path))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        else:
+            self.shared += 1
+        # Shielded so one caller giving up does not cancel the others.
+        return await asyncio.shield(future)
+
+    async def _revalidate(self, kind: str, params: Params, path: str) -> None:
+        cache = self.cache
+        assert cache is not None
+        try:
+            cache.put(kind, params, await self._shared_fetch(path))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            cache.end_revalidation(kind, params)
+
+    async def _request(self, params: Params, kind: str = "search") -> Dict:
+        query_string = urllib.parse.urlencode(params, safe="[]")
+        path = f"{self._path}?{query_string}"
+        if self.cache is None:
+            return await self._shared_fetch(path)
+        data, stale = self.cache.lookup(kind, params)
+        if data is not None:
+            if stale and self.cache.begin_revalidation(kind, params):
+                task = asyncio.ensure_future(self._revalidate(kind, params, path))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return data
+        data = await self._shared_fetch(path)
+        self.cache.put(kind, params, data)
+        return data
+
+    async def search(self, query: str, by: str = "name-desc") -> List[AURPackage]:
+        if not query or len(query) < 2:
+            return []
+
+        params = {
+            "v": "5",
+            "type": "search",
+            "by": by,
+            "arg": query
+        }
+
+        result = await self._request(params)
+
+        if result.get("type") == "error":
+            raise ValueError(result.get("error", "Unknown error"))
+
+        packages = [AURPackage(pkg) for pkg in result.get("results", [])]
+        packages.sort(key=lambda p: (p.popularity, p.votes), reverse=True)
+        return packages
+
+    async def search_popular(self, by: str = "name-desc", limit: int = 100) -> List[AURPackage]:
+        if self.popular is None:
+            raise ValueError("No popularity ranking configured")
+        # The ranking may be read from disk on first use.
+        loop = asyncio.get_running_loop()
+        packages: List[AURPackage] = await loop.run_in_executor(None, self.popular.top, limit)
+        return packages
+
+    async def _info_batch(self, names: List[str]) -> List[Dict]:
+        params = [("v", "5"), ("type", "info")]
+        params.extend(("arg[]", name) for name in names)
+        data = await self._request(params, kind="info")
+
+        if data.get("type") == "error":
+            raise ValueError(data.get("error", "Unknown error"))
+
+        results: List[Dict] = data.get("results", [])
+        return results
+
+    async def info(self, package_names: List[str]) -> InfoResult:
+        if not package_names:
+            return InfoResult()
+
+        names = list(dict.fromkeys(package_names))
+        batches = _info_batches(names, self._path, INFO_MAX_URI_LENGTH)
+        outcomes = await asyncio.gather(
+            *(self._info_batch(batch) for batch in batches),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, (ConnectionError, ValueError)):
+                raise outcome
+        return _merge_info(names, batches, list(outcomes))
+
+    async def search_by_name(self, query: str) -> List[AURPackage]:
+        return await self.search(query, by="name")
+
+    async def search_by_description(self, query: str) -> List[AURPackage]:
+        return await self.search(query, by="name-desc")
+
+    async def search_by_keywords(self, query: str) -> List[AURPackage]:
+        return await self.search(query, by="keywords")
+
+    async def search_by_maintainer(self, maintainer: str) -> List[AURPackage]:
+        return await self.search(maintainer, by="maintainer")
@@ -1,18 +1,84 @@
-import urllib.request
+import gzip
+import http.client
+from concurrent.futures import ThreadPoolExecutor
 import urllib.parse
 import json
-from typing import List, Dict, Optional
+import random
+import sys
+import time
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING, Union
 
+from rune import __version__
+from rune.api.cache import Params, ResponseCache
+from rune.api.pool import ConnectionPool
+from rune.api.ratelimit import RateLimiter
 
-AUR_RPC_URL = "https://aur.archlinux.org/rpc/"
+if TYPE_CHECKING:
+    from rune.api.popular import PopularPackages
+
+
+AUR_HOST = "aur.archlinux.org"
+AUR_RPC_URL = f"https://{AUR_HOST}/rpc/"
+USER_AGENT = f"runa/{__version__}"
+# aurweb rejects request lines much longer than this with 414 URI Too Long.
+INFO_MAX_URI_LENGTH = 4000
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+_LIST_FIELDS = (
+    ("depends", "Depends"),
+    ("make_depends", "MakeDepends"),
+    ("check_depends", "CheckDepends"),
+    ("opt_depends", "OptDepends"),
+    ("conflicts", "Conflicts"),
+    ("provides", "Provides"),
+    ("license", "License"),
+    ("keywords", "Keywords"),
+)
+
+
+def _lazy_list(slot: str) -> property:
+    def getter(self) -> List[str]:
+        value: Optional[List[str]] = getattr(self, slot)
+        if value is None:
+            value = []
+            setattr(self, slot, value)
+        return value
+
+    def setter(self, value: List[str]) -> None:
+        setattr(self, slot, value)
+
+    return property(getter, setter)
 
 
 class AURPackage:
+    # Slotted to keep large result sets small. List fields keep a reference
+    # to the decoded JSON value and only allocate an empty list when a
+    # missing field is first read.
+    __slots__ = (
+        "name",
+        "package_base",
+        "version",
+        "description",
+        "maintainer",
+        "votes",
+        "popularity",
+        "out_of_date",
+        "first_submitted",
+        "last_modified",
+        "url",
+        "url_path",
+        "local_version",
+        *(f"_{attr}" for attr, _ in _LIST_FIELDS),
+    )
+
     def __init__(self, data: Dict):
         self.name = data.get("Name", "")
+        self.package_base = data.get("PackageBase") or self.name
         self.version = data.get("Version", "")
         self.description = data.get("Description", "")
-        self.maintainer = data.get("Maintainer", "orphan")
+        maintainer = data.get("Maintainer", "orphan")
+        self.maintainer = sys.intern(maintainer) if isinstance(maintainer, str) else maintainer
         self.votes = data.get("NumVotes", 0)
         self.popularity = data.get("Popularity", 0.0)
         self.out_of_date = data.get("OutOfDate")
@@ -20,12 +86,18 @@ class AURPackage:
         self.last_modified = data.get("LastModified", 0)
         self.url = data.get("URL", "")
         self.url_path = data.get("URLPath", "")
-        self.depends = data.get("Depends", [])
-        self.make_depends = data.get("MakeDepends", [])
-        self.opt_depends = data.get("OptDepends", [])
-        self.conflicts = data.get("Conflicts", [])
-        self.license = data.get("License", [])
-        self.keywords = data.get("Keywords", [])
+        self.local_version: Optional[str] = None
+        for attr, key in _LIST_FIELDS:
+            setattr(self, f"_{attr}", data.get(key))
+
+    depends = _lazy_list("_depends")
+    make_depends = _lazy_list("_make_depends")
+    check_depends = _lazy_list("_check_depends")
+    opt_depends = _lazy_list("_opt_depends")
+    conflicts = _lazy_list("_conflicts")
+    provides = _lazy_list("_provides")
+    license = _lazy_list("_license")
+    keywords = _lazy_list("_keywords")
     
     @property
     def aur_url(self) -> str:
@@ -33,28 +105,203 @@ class AURPackage:
     
     @property
     def git_clone_url(self) -> str:
-        return f"https://aur.archlinux.org/{self.name}.git"
+        # Split packages share the repository of their package base.
+        return f"https://aur.archlinux.org/{self.package_base}.git"
     
     def __repr__(self) -> str:
         return f"AURPackage({self.name} {self.version})"
 
 
+def backoff_delay(attempt: int, retry_after: Optional[str], base: float, cap: float) -> float:
+    """
+    Jittered exponential backoff before retry ``attempt``; a numeric
+    Retry-After header raises it, up to four times ``cap``.
+    """
+    delay = min(cap, base * (2 ** attempt))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), cap * 4))
+    return delay
+
+
+def popularity_rank(record: Dict):
+    return (record.get("Popularity") or 0.0, record.get("NumVotes") or 0)
+
+
+class InfoResult(list):
+    """
+    List of AURPackage returned by AURClient.info, in input order.
+
+    ``errors`` maps each requested name whose batch failed to the error
+    message, so a single bad batch does not discard the other results.
+    """
+
+    def __init__(self, packages=(), errors: Optional[Dict[str, str]] = None):
+        super().__init__(packages)
+        self.errors: Dict[str, str] = errors or {}
+
+
+def _info_batches(names: List[str], path: str, max_length: int) -> List[List[str]]:
+    base = len(path) + len("?v=5&type=info")
+    batches: List[List[str]] = []
+    current: List[str] = []
+    length = base
+    for name in names:
+        arg_length = len("&arg[]=") + len(urllib.parse.quote_plus(name, safe="[]"))
+        if current and length + arg_length > max_length:
+            batches.append(current)
+            current = []
+            length = base
+        current.append(name)
+        length += arg_length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _merge_info(names: List[str], batches: List[List[str]], outcomes: List) -> InfoResult:
+    failures = [o for o in outcomes if isinstance(o, Exception)]
+    if failures and len(failures) == len(outcomes):
+        raise failures[0]
+
+    by_name: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    for batch, outcome in zip(batches, outcomes):
+        if isinstance(outcome, Exception):
+            for name in batch:
+                errors[name] = str(outcome)
+            continue
+        for pkg in outcome:
+            by_name[pkg.get("Name", "")] = pkg
+
+    return InfoResult(
+        (AURPackage(by_name[name]) for name in names if name in by_name),
+        errors,
+    )
+
+
 class AURClient:
-    def __init__(self):
-        self.base_url = AUR_RPC_URL
-    
-    def _request(self, params: Dict) -> Dict:
-        query_string = urllib.parse.urlencode(params)
-        url = f"{self.base_url}?{query_string}"
-        
-        try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                data = json.loads(response.read().decode('utf-8'))
+    def __init__(
+        self,
+        base_url: str = AUR_RPC_URL,
+        pool_size: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+        max_workers: int = 4,
+        cache: Optional[ResponseCache] = None,
+        popular: Optional["PopularPackages"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_workers = max(1, int(max_workers))
+        self.cache = cache
+        self.popular = popular
+        self.rate_limiter = rate_limiter
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retries = 0
+        self._path = urllib.parse.urlsplit(base_url).path or "/"
+        self._pool = ConnectionPool(
+            base_url,
+            max_size=pool_size,
+            idle_timeout=idle_timeout,
+            timeout=timeout,
+        )
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool.max_size
+
+    @property
+    def idle_timeout(self) -> float:
+        return self._pool.idle_timeout
+
+    def connection_stats(self) -> Dict[str, int]:
+        return self._pool.stats()
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def remaining_budget(self) -> Optional[int]:
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.remaining()
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_cap)
+
+    def _fetch(self, path: str) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            status, reason, retry_after, data = self._roundtrip(path)
+            if status < 400:
+                if data is None:
+                    raise ValueError("Invalid response from AUR: empty body")
                 return data
-        except urllib.error.URLError as e:
-            raise ConnectionError(f"Failed to connect to AUR: {e}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid response from AUR: {e}")
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+            delay = self._backoff_delay(attempt, retry_after)
+            if status == 429 and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            self.retries += 1
+            time.sleep(delay)
+        raise ConnectionError(f"Failed to connect to AUR: HTTP Error {status}: {reason}")
+
+    def _roundtrip(self, path: str) -> Tuple[int, str, Optional[str], Optional[Dict]]:
+        headers = {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+            "User-Agent": USER_AGENT,
+        }
+        # A pooled connection may have been closed by the server while idle,
+        # so a failure on a reused connection is retried once on a fresh one.
+        for attempt in range(2):
+            conn, reused = self._pool.acquire()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                self._pool.discard(conn)
+                if reused and attempt == 0:
+                    continue
+                raise ConnectionError(f"Failed to connect to AUR: {e}")
+
+            data = None
+            try:
+                if response.status < 400:
+                    if response.getheader("Content-Encoding", "").lower() == "gzip":
+                        data = json.load(gzip.GzipFile(fileobj=response))
+                    else:
+                        data = json.load(response)
+                response.read()
+            except (http.client.HTTPException, OSError, EOFError) as e:
+                self._pool.discard(conn)
+                raise ConnectionError(f"Failed to connect to AUR: {e}")
+            except json.JSONDecodeError as e:
+                self._pool.discard(conn)
+                raise ValueError(f"Invalid response from AUR: {e}")
+
+            if response.will_close:
+                self._pool.discard(conn)
+            else:
+                self._pool.release(conn)
+
+            return response.status, response.reason, response.getheader("Retry-After"), data
+        raise ConnectionError("Failed to connect to AUR")
+
+    def _request(self, params: Params, kind: str = "search") -> Dict:
+        query_string = urllib.parse.urlencode(params, safe="[]")
+        path = f"{self._path}?{query_string}"
+        if self.cache is None:
+            return self._fetch(path)
+        return self.cache.fetch(kind, params, lambda: self._fetch(path))
     
     def search(self, query: str, by: str = "name-desc") -> List[AURPackage]:
         if not query or len(query) < 2:
@@ -77,41 +324,48 @@ class AURClient:
         return packages
 
     def search_popular(self, by: str = "name-desc", limit: int = 100) -> List[AURPackage]:
-        params = {
-            "v": "5",
-            "type": "search",
-            "by": by,
-            "arg": "a",
-        }
+        # The RPC has no popularity listing and rejects one-letter search
+        # terms, so popular packages come from the precomputed ranking.
+        if self.popular is None:
+            raise ValueError("No popularity ranking configured")
+        return self.popular.top(limit)
+    
+    def _info_batch(self, names: List[str]) -> List[Dict]:
+        params = [("v", "5"), ("type", "info")]
+        params.extend(("arg[]", name) for name in names)
+        data = self._request(params, kind="info")
 
-        result = self._request(params)
+        if data.get("type") == "error":
+            raise ValueError(data.get("error", "Unknown error"))
 
-        if result.get("type") == "error":
-            raise ValueError(result.get("error", "Unknown error"))
+        results: List[Dict] = data.get("results", [])
+        return results
 
-        packages = [AURPackage(pkg) for pkg in result.get("results", [])]
-        packages.sort(key=lambda p: (p.popularity, p.votes), reverse=True)
-        if limit is not None and limit > 0:
-            return packages[:limit]
-        return packages
-    
-    def info(self, package_names: List[str]) -> List[AURPackage]:
+    def info(self, package_names: List[str]) -> InfoResult:
         if not package_names:
-            return []
-        
-        query_parts = ["v=5", "type=info"]
-        for name in package_names:
-            query_parts.append(f"arg[]={urllib.parse.quote(name)}")
-        
-        url = f"{self.base_url}?{'&'.join(query_parts)}"
-        
-        try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                data = json.loads(response.read().decode('utf-8'))
-        except urllib.error.URLError as e:
-            raise ConnectionError(f"Failed to connect to AUR: {e}")
-        
-        return [AURPackage(pkg) for pkg in data.get("results", [])]
+            return InfoResult()
+
+        names = list(dict.fromkeys(package_names))
+        batches = _info_batches(names, self._path, INFO_MAX_URI_LENGTH)
+
+        workers = min(self.max_workers, len(batches))
+        outcomes: List[Union[List[Dict], Exception]] = []
+        if workers <= 1:
+            for batch in batches:
+                try:
+                    outcomes.append(self._info_batch(batch))
+                except (ConnectionError, ValueError) as e:
+                    outcomes.append(e)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._info_batch, batch) for batch in batches]
+                for future in futures:
+                    try:
+                        outcomes.append(future.result())
+                    except (ConnectionError, ValueError) as e:
+                        outcomes.append(e)
+
+        return _merge_info(names, batches, outcomes)
     
     def search_by_name(self, query: str) -> List[AURPackage]:
         return self.search(query, by="name")
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Set, Tuple, Union
+
+
+# Lives inside the installer's build directory; AUR package names cannot
+# start with a dot, so this never collides with a cloned package and
+# PackageInstaller.cleanup() leaves it alone.
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".aur-cache",
+)
+
+DEFAULT_TTLS = {
+    "search": 10 * 60,
+    "popular": 60 * 60,
+    "info": 5 * 60,
+}
+
+Params = Union[Dict[str, str], Sequence[Tuple[str, str]]]
+
+
+def normalize_params(params: Params) -> str:
+    items = params.items() if isinstance(params, dict) else params
+    pairs = sorted((str(k).strip().lower(), str(v).strip()) for k, v in items)
+    return "&".join(f"{k}={v}" for k, v in pairs)
+
+
+class ResponseCache:
+    """
+    Persistent, size-bounded LRU cache of AUR RPC responses.
+
+    Entries expire after a per-kind TTL. With ``stale_while_revalidate``
+    an expired entry younger than ``ttl + max_stale`` is returned at once
+    while a background thread fetches a fresh copy.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        max_bytes: int = 32 * 1024 * 1024,
+        stale_while_revalidate: bool = True,
+        max_stale: float = 24 * 60 * 60,
+    ):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._sizes: Optional[Dict[str, int]] = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def make_key(self, kind: str, params: Params) -> str:
+        raw = f"{kind}?{normalize_params(params)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _index(self) -> Dict[str, int]:
+        if self._sizes is None:
+            sizes = {}
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".json") and entry.is_file():
+                    sizes[entry.name[:-5]] = entry.stat().st_size
+            self._sizes = sizes
+        return self._sizes
+
+    def _load(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "stored" not in entry:
+            return None
+        return entry
+
+    def get(self, kind: str, params: Params) -> Optional[Tuple[Dict, float]]:
+        entry = self._load(self.make_key(kind, params))
+        if entry is None:
+            return None
+        return entry["data"], time.time() - entry["stored"]
+
+    def put(self, kind: str, params: Params, data: Dict) -> None:
+        if not isinstance(data, dict) or data.get("type") == "error":
+            return
+        key = self.make_key(kind, params)
+        payload = json.dumps({"stored": time.time(), "kind": kind, "data": data})
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+        with self._lock:
+            self._index()[key] = len(payload)
+            self._evict()
+
+    def _evict(self) -> None:
+        sizes = self._index()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = []
+        for key in sizes:
+            try:
+                by_age.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                by_age.append((0.0, key))
+        by_age.sort()
+        for _, key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(key)
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def lookup(self, kind: str, params: Params) -> Tuple[Optional[Dict], bool]:
+        """
+        Cached response for a request and whether it should be fetched
+        again: fresh entries are returned as is, stale ones (with
+        stale-while-revalidate) along with True, and misses as None.
+        """
+        entry = self._load(self.make_key(kind, params))
+        if entry is not None:
+            age = time.time() - entry["stored"]
+            ttl = self.ttls.get(kind, 0)
+            if age <= ttl:
+                with self._lock:
+                    self.hits += 1
+                return entry["data"], False
+            if self.stale_while_revalidate and age <= ttl + self.max_stale:
+                with self._lock:
+                    self.stale_hits += 1
+                return entry["data"], True
+
+        with self._lock:
+            self.misses += 1
+        return None, True
+
+    def fetch(self, kind: str, params: Params, loader: Callable[[], Dict]) -> Dict:
+        data, stale = self.lookup(kind, params)
+        if data is not None:
+            if stale:
+                self._revalidate(kind, params, loader)
+            return data
+        data = loader()
+        self.put(kind, params, data)
+        return data
+
+    def begin_revalidation(self, kind: str, params: Params) -> bool:
+        """Claim the refresh of a stale entry; False if one is running."""
+        key = self.make_key(kind, params)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.revalidations += 1
+            return True
+
+    def end_revalidation(self, kind: str, params: Params) -> None:
+        with self._lock:
+            self._refreshing.discard(self.make_key(kind, params))
+
+    def _revalidate(self, kind: str, params: Params, loader: Callable[[], Dict]) -> None:
+        if not self.begin_revalidation(kind, params):
+            return
+
+        def worker():
+            try:
+                self.put(kind, params, loader())
+            except Exception:
+                pass
+            finally:
+                self.end_revalidation(kind, params)
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index()):
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+            self._sizes = {}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sizes = self._index()
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "revalidations": self.revalidations,
+                "entries": len(sizes),
+                "bytes": sum(sizes.values()),
+            }
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+Ticket = Tuple[str, int]
+
+
+class SupersededError(Exception):
+    pass
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of blocking calls.
+
+    Concurrent calls with the same key share one execution. A call made
+    with a ticket raises SupersededError once a newer ticket has been
+    issued for the same channel, so only the latest result is delivered.
+    Work running elsewhere (e.g. a coroutine on the async bridge) can be
+    tracked against a ticket and is cancelled when the ticket goes stale.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._tracked: Dict[str, Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def run(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()
+
+    def ticket(self, channel: str) -> Ticket:
+        with self._lock:
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            tracked = self._tracked.pop(channel, None)
+        if tracked is not None:
+            self._cancel(tracked)
+        return channel, generation
+
+    def supersede(self, channel: str) -> None:
+        self.ticket(channel)
+
+    def is_current(self, ticket: Ticket) -> bool:
+        channel, generation = ticket
+        with self._lock:
+            return self._generations.get(channel, 0) == generation
+
+    def track(self, ticket: Ticket, future: Future) -> None:
+        """Cancel ``future`` once a newer ticket is issued on its channel."""
+        channel, generation = ticket
+        with self._lock:
+            current = self._generations.get(channel, 0) == generation
+            if current:
+                self._tracked[channel] = future
+        if not current:
+            self._cancel(future)
+            return
+
+        def forget(done: Future) -> None:
+            with self._lock:
+                if self._tracked.get(channel) is done:
+                    del self._tracked[channel]
+
+        future.add_done_callback(forget)
+
+    def _cancel(self, future: Future) -> None:
+        # cancel() is False once the work has finished; that result is
+        # simply dropped by the caller's ticket check and is not counted.
+        if future.cancel():
+            with self._lock:
+                self.cancelled += 1
+
+    def _check_current(self, ticket: Ticket) -> None:
+        if not self.is_current(ticket):
+            with self._lock:
+                self.cancelled += 1
+            raise SupersededError(ticket[0])
+
+    def run_ticket(self, ticket: Ticket, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        self._check_current(ticket)
+        try:
+            result = self.run(key, func, *args, **kwargs)
+        except Exception:
+            self._check_current(ticket)
+            raise
+        self._check_current(ticket)
+        return result
+
+    def run_latest(self, channel: str, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        return self.run_ticket(self.ticket(channel), key, func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "cancelled": self.cancelled,
+                "in_flight": len(self._inflight),
+            }
+
+
+class CoalescingClient:
+    """
+    Wraps an AURClient (or anything with the same search API) so identical
+    concurrent queries share one request. A call given a ticket is
+    superseded by any newer ticket on the same channel.
+    """
+
+    def __init__(self, client, coalescer: Optional[RequestCoalescer] = None):
+        self.client = client
+        self.coalescer = coalescer or RequestCoalescer()
+
+    def _call(self, ticket: Optional[Ticket], method: str, *args) -> List:
+        key = (id(self.client), method, args)
+        func = getattr(self.client, method)
+        if ticket is None:
+            result: List = self.coalescer.run(key, func, *args)
+        else:
+            result = self.coalescer.run_ticket(ticket, key, func, *args)
+        return result
+
+    def search(self, query: str, by: str = "name-desc", ticket: Optional[Ticket] = None) -> List:
+        return self._call(ticket, "search", query, by)
+
+    def search_popular(
+        self, by: str = "name-desc", limit: int = 100, ticket: Optional[Ticket] = None
+    ) -> List:
+        return self._call(ticket, "search_popular", by, limit)
+
+    def info(self, package_names: List[str], ticket: Optional[Ticket] = None) -> List:
+        return self._call(ticket, "info", tuple(package_names))
+
+    def search_by_name(self, query: str, ticket: Optional[Ticket] = None) -> List:
+        return self.search(query, by="name", ticket=ticket)
+
+    def search_by_description(self, query: str, ticket: Optional[Ticket] = None) -> List:
+        return self.search(query, by="name-desc", ticket=ticket)
+
+    def search_by_keywords(self, query: str, ticket: Optional[Ticket] = None) -> List:
+        return self.search(query, by="keywords", ticket=ticket)
+
+    def search_by_maintainer(self, maintainer: str, ticket: Optional[Ticket] = None) -> List:
+        return self.search(maintainer, by="maintainer", ticket=ticket)
+
+    def stats(self) -> Dict[str, int]:
+        return self.coalescer.stats()
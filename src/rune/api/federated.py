@@ -0,0 +1,123 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Iterable, List, Sequence, Set, Tuple
+
+from rune.api.aur import AURPackage
+
+
+FEDERATED_MODES = ("name", "name-desc", "keywords", "maintainer")
+
+# Weight a package earns for each field the query matched. A name match is
+# the strongest signal; name-desc is weakest because it also covers names.
+MODE_WEIGHTS = {
+    "name": 4.0,
+    "keywords": 3.0,
+    "maintainer": 2.0,
+    "name-desc": 1.0,
+}
+EXACT_NAME_BONUS = 8.0
+PREFIX_NAME_BONUS = 2.0
+
+SearchFunc = Callable[[str, str], List[AURPackage]]
+AsyncSearchFunc = Callable[[str, str], Awaitable[List[AURPackage]]]
+
+
+def federated_score(package: AURPackage, matched: Iterable[str], query: str) -> float:
+    """
+    score = sum(MODE_WEIGHTS[m] for each matched mode m)
+            + EXACT_NAME_BONUS if the name equals the query
+            + PREFIX_NAME_BONUS if the name starts with the query
+            + log1p(popularity) + 0.25 * log1p(votes)
+
+    Comparisons are case-insensitive. Popularity and votes are damped
+    with log1p so they order packages within a match tier without
+    overriding a better field match.
+    """
+    score = sum(MODE_WEIGHTS.get(mode, 0.0) for mode in set(matched))
+    name = package.name.lower()
+    needle = query.lower()
+    if name == needle:
+        score += EXACT_NAME_BONUS
+    elif name.startswith(needle):
+        score += PREFIX_NAME_BONUS
+    score += math.log1p(max(0.0, float(package.popularity or 0.0)))
+    score += 0.25 * math.log1p(max(0, int(package.votes or 0)))
+    return score
+
+
+def federated_search(
+    search: SearchFunc,
+    query: str,
+    modes: Sequence[str] = FEDERATED_MODES,
+    max_workers: int = 4,
+) -> List[AURPackage]:
+    """
+    Run ``search(query, by)`` for every mode in parallel, de-duplicate the
+    hits by package name and order them by federated_score.
+
+    A mode that fails is skipped; the error is raised only if every mode
+    failed.
+    """
+    if not query or len(query) < 2:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(modes)))) as executor:
+        futures = [(mode, executor.submit(search, query, mode)) for mode in modes]
+        outcomes = []
+        errors: List[Exception] = []
+        for mode, future in futures:
+            try:
+                outcomes.append((mode, future.result()))
+            except (ConnectionError, ValueError) as e:
+                errors.append(e)
+
+    return _rank(query, outcomes, errors)
+
+
+async def federated_search_async(
+    search: AsyncSearchFunc,
+    query: str,
+    modes: Sequence[str] = FEDERATED_MODES,
+) -> List[AURPackage]:
+    """federated_search with the modes awaited concurrently on the running loop."""
+    if not query or len(query) < 2:
+        return []
+
+    results = await asyncio.gather(*(search(query, mode) for mode in modes), return_exceptions=True)
+    outcomes = []
+    errors: List[Exception] = []
+    for mode, result in zip(modes, results):
+        if isinstance(result, (ConnectionError, ValueError)):
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            outcomes.append((mode, result))
+    return _rank(query, outcomes, errors)
+
+
+def _rank(
+    query: str,
+    outcomes: List[Tuple[str, List[AURPackage]]],
+    errors: List[Exception],
+) -> List[AURPackage]:
+    if errors and not outcomes:
+        raise errors[0]
+
+    packages: Dict[str, AURPackage] = {}
+    matched: Dict[str, Set[str]] = {}
+    for mode, results in outcomes:
+        for package in results:
+            packages.setdefault(package.name, package)
+            matched.setdefault(package.name, set()).add(mode)
+
+    scores = {
+        name: federated_score(package, matched[name], query)
+        for name, package in packages.items()
+    }
+    return sorted(
+        packages.values(),
+        key=lambda p: (scores[p.name], p.popularity, p.votes),
+        reverse=True,
+    )
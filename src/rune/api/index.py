@@ -0,0 +1,447 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rune.api.aur import AURPackage, USER_AGENT
+
+
+PACKAGES_META_URL = "https://aur.archlinux.org/packages-meta-ext-v1.json.gz"
+
+INDEX_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".aur-index.sqlite3",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL DEFAULT '',
+    maintainer TEXT COLLATE NOCASE,
+    votes INTEGER NOT NULL DEFAULT 0,
+    popularity REAL NOT NULL DEFAULT 0,
+    last_modified INTEGER NOT NULL DEFAULT 0,
+    hash TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_maintainer ON packages (maintainer);
+CREATE INDEX IF NOT EXISTS packages_rank ON packages (popularity DESC, votes DESC);
+CREATE TABLE IF NOT EXISTS keywords (
+    package_id INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS keywords_keyword ON keywords (keyword);
+CREATE INDEX IF NOT EXISTS keywords_package ON keywords (package_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS packages_fts USING fts5 (
+    name, description, content='packages', content_rowid='id', tokenize='trigram'
+);
+"""
+
+SEARCH_MODES = ("name", "name-desc", "keywords", "maintainer")
+
+
+def load_packages_meta(path: str) -> List[Dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("Invalid packages-meta dump: expected a JSON array")
+    return data
+
+
+def download_packages_meta(dest: str, url: str = PACKAGES_META_URL, timeout: float = 60.0) -> str:
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", suffix=".tmp")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response, os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(response, f)
+        os.replace(tmp, dest)
+    except urllib.error.URLError as e:
+        raise ConnectionError(f"Failed to download AUR metadata: {e}")
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return dest
+
+
+@dataclass
+class SyncStats:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    duration: float = 0.0
+    cpu_time: float = 0.0
+
+
+# Everything else in a packages-meta record only changes with a new
+# upload, which bumps LastModified, so these fields plus LastModified are
+# enough to detect changes without re-serializing every record.
+_VOLATILE_FIELDS = ("NumVotes", "Popularity", "OutOfDate", "Maintainer", "CoMaintainers", "Keywords")
+
+
+def _record_digest(record: Dict) -> str:
+    raw = "\x1f".join(repr(record.get(field)) for field in _VOLATILE_FIELDS)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _encode_record(record: Dict) -> str:
+    return json.dumps(record, separators=(",", ":"))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+class AURIndex:
+    """
+    Local SQLite index of AUR metadata built from the packages-meta dump.
+
+    The search methods mirror AURClient so the two can be used
+    interchangeably.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or INDEX_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(packages)")}
+        if "hash" not in columns:
+            self._conn.execute("ALTER TABLE packages ADD COLUMN hash TEXT NOT NULL DEFAULT ''")
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            count: int = self._conn.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+        return count
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _insert_one(self, record: Dict, data: str, digest: str) -> int:
+        cur = self._conn.execute(
+            "INSERT INTO packages (name, description, maintainer, votes, popularity,"
+            " last_modified, hash, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["Name"],
+                record.get("Description") or "",
+                record.get("Maintainer"),
+                record.get("NumVotes") or 0,
+                record.get("Popularity") or 0.0,
+                record.get("LastModified") or 0,
+                digest,
+                data,
+            ),
+        )
+        package_id = cur.lastrowid
+        assert package_id is not None
+        self._insert_keywords(package_id, record.get("Keywords") or [])
+        return package_id
+
+    def _insert_keywords(self, package_id: int, keywords: List[str]) -> None:
+        self._conn.executemany(
+            "INSERT INTO keywords (package_id, keyword) VALUES (?, ?)",
+            [(package_id, keyword) for keyword in keywords],
+        )
+
+    def _insert(self, records: Iterable[Dict]) -> int:
+        count = 0
+        for record in records:
+            if not record.get("Name"):
+                continue
+            self._insert_one(record, _encode_record(record), _record_digest(record))
+            count += 1
+        return count
+
+    def _fts_insert(self, package_id: int, name: str, description: str) -> None:
+        if self.has_fts:
+            self._conn.execute(
+                "INSERT INTO packages_fts (rowid, name, description) VALUES (?, ?, ?)",
+                (package_id, name, description),
+            )
+
+    def _fts_delete(self, package_id: int, name: str, description: str) -> None:
+        if self.has_fts:
+            self._conn.execute(
+                "INSERT INTO packages_fts (packages_fts, rowid, name, description)"
+                " VALUES ('delete', ?, ?, ?)",
+                (package_id, name, description),
+            )
+
+    def _rebuild_fts(self) -> None:
+        if self.has_fts:
+            self._conn.execute("INSERT INTO packages_fts (packages_fts) VALUES ('rebuild')")
+
+    def ingest(self, records: Iterable[Dict]) -> int:
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM keywords")
+                self._conn.execute("DELETE FROM packages")
+                count = self._insert(records)
+                self._rebuild_fts()
+                self._set_meta("source_count", str(count))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return count
+
+    def ingest_file(self, path: str) -> int:
+        return self.ingest(load_packages_meta(path))
+
+    def sync(self, records: Iterable[Dict]) -> SyncStats:
+        """
+        Apply only the inserts, updates and deletes needed to bring the
+        index in line with ``records``, in a single transaction.
+
+        Rows whose LastModified and content hash are unchanged are left
+        alone; the full-text and keyword tables are only touched when the
+        name, description or keywords actually changed.
+        """
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        stats = SyncStats()
+
+        with self._lock:
+            try:
+                existing = {}
+                for row in self._conn.execute(
+                    "SELECT id, name, description, last_modified, hash FROM packages"
+                ):
+                    existing[row[1]] = row
+
+                seen = set()
+                for record in records:
+                    name = record.get("Name")
+                    if not name or name in seen:
+                        continue
+                    seen.add(name)
+                    digest = _record_digest(record)
+                    description = record.get("Description") or ""
+                    old = existing.get(name)
+
+                    if old is None:
+                        package_id = self._insert_one(record, _encode_record(record), digest)
+                        self._fts_insert(package_id, name, description)
+                        stats.inserted += 1
+                        continue
+
+                    package_id, _, old_description, last_modified, old_digest = old
+                    if last_modified == (record.get("LastModified") or 0) and old_digest == digest:
+                        stats.unchanged += 1
+                        continue
+
+                    self._conn.execute(
+                        "UPDATE packages SET description = ?, maintainer = ?, votes = ?,"
+                        " popularity = ?, last_modified = ?, hash = ?, data = ? WHERE id = ?",
+                        (
+                            description,
+                            record.get("Maintainer"),
+                            record.get("NumVotes") or 0,
+                            record.get("Popularity") or 0.0,
+                            record.get("LastModified") or 0,
+                            digest,
+                            _encode_record(record),
+                            package_id,
+                        ),
+                    )
+                    if description != old_description:
+                        self._fts_delete(package_id, name, old_description)
+                        self._fts_insert(package_id, name, description)
+                    new_keywords = record.get("Keywords") or []
+                    old_keywords = [
+                        row[0] for row in self._conn.execute(
+                            "SELECT keyword FROM keywords WHERE package_id = ?", (package_id,)
+                        )
+                    ]
+                    if sorted(new_keywords) != sorted(old_keywords):
+                        self._conn.execute(
+                            "DELETE FROM keywords WHERE package_id = ?", (package_id,)
+                        )
+                        self._insert_keywords(package_id, new_keywords)
+                    stats.updated += 1
+
+                for name, (package_id, _, description, _, _) in existing.items():
+                    if name in seen:
+                        continue
+                    self._fts_delete(package_id, name, description)
+                    self._conn.execute("DELETE FROM keywords WHERE package_id = ?", (package_id,))
+                    self._conn.execute("DELETE FROM packages WHERE id = ?", (package_id,))
+                    stats.deleted += 1
+
+                stats.duration = time.perf_counter() - started
+                stats.cpu_time = time.process_time() - cpu_started
+                self._set_meta("source_count", str(len(seen)))
+                self._set_meta("last_sync", json.dumps(asdict(stats)))
+                self._set_meta("last_sync_time", str(int(time.time())))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+        return stats
+
+    def sync_file(self, path: str) -> SyncStats:
+        return self.sync(load_packages_meta(path))
+
+    def last_sync_stats(self) -> Optional[SyncStats]:
+        raw = self.get_meta("last_sync")
+        if not raw:
+            return None
+        return SyncStats(**json.loads(raw))
+
+    def update_from_url(self, url: str = PACKAGES_META_URL) -> SyncStats:
+        if self.path == ":memory:":
+            dest = os.path.join(tempfile.gettempdir(), os.path.basename(PACKAGES_META_URL))
+        else:
+            dest = self.path + ".json.gz"
+        download_packages_meta(dest, url)
+        try:
+            return self.sync_file(dest)
+        finally:
+            os.unlink(dest)
+
+    def search_terms(self) -> List[Tuple[str, float, List[str]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.name, p.popularity, group_concat(k.keyword, char(31))"
+                " FROM packages p LEFT JOIN keywords k ON k.package_id = p.id"
+                " GROUP BY p.id"
+            ).fetchall()
+        return [
+            (name, popularity, keywords.split("\x1f") if keywords else [])
+            for name, popularity, keywords in rows
+        ]
+
+    def _rows_to_packages(self, rows) -> List[AURPackage]:
+        return [AURPackage(json.loads(row[0])) for row in rows]
+
+    def _query(self, sql: str, args=()) -> List[AURPackage]:
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return self._rows_to_packages(rows)
+
+    def search(self, query: str, by: str = "name-desc") -> List[AURPackage]:
+        query = (query or "").strip()
+        if not query or len(query) < 2:
+            return []
+        if by not in SEARCH_MODES:
+            raise ValueError("Incorrect by field specified.")
+
+        order = " ORDER BY p.popularity DESC, p.votes DESC"
+
+        if by == "maintainer":
+            return self._query(
+                "SELECT p.data FROM packages p WHERE p.maintainer = ?" + order, (query,)
+            )
+
+        if by == "keywords":
+            return self._query(
+                "SELECT p.data FROM packages p WHERE p.id IN"
+                " (SELECT package_id FROM keywords WHERE keyword = ?)" + order,
+                (query,),
+            )
+
+        # The trigram tokenizer needs at least three characters per term;
+        # shorter queries use a LIKE scan with the same substring semantics.
+        if self.has_fts and len(query) >= 3:
+            match = _fts_phrase(query)
+            if by == "name":
+                match = "name : " + match
+            return self._query(
+                "SELECT p.data FROM packages_fts f JOIN packages p ON p.id = f.rowid"
+                " WHERE packages_fts MATCH ?" + order,
+                (match,),
+            )
+
+        pattern = f"%{_escape_like(query)}%"
+        if by == "name":
+            return self._query(
+                "SELECT p.data FROM packages p WHERE p.name LIKE ? ESCAPE '\\'" + order,
+                (pattern,),
+            )
+        return self._query(
+            "SELECT p.data FROM packages p WHERE p.name LIKE ? ESCAPE '\\'"
+            " OR p.description LIKE ? ESCAPE '\\'" + order,
+            (pattern, pattern),
+        )
+
+    def search_popular(self, by: str = "name-desc", limit: int = 100) -> List[AURPackage]:
+        sql = "SELECT data FROM packages ORDER BY popularity DESC, votes DESC"
+        if limit is not None and limit > 0:
+            return self._query(sql + " LIMIT ?", (int(limit),))
+        return self._query(sql)
+
+    def info(self, package_names: List[str]) -> List[AURPackage]:
+        if not package_names:
+            return []
+        names = list(dict.fromkeys(package_names))
+        found: Dict[str, AURPackage] = {}
+        with self._lock:
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT data FROM packages WHERE name IN ({placeholders})", chunk
+                ).fetchall()
+                for pkg in self._rows_to_packages(rows):
+                    found[pkg.name] = pkg
+        return [found[name] for name in names if name in found]
+
+    def search_by_name(self, query: str) -> List[AURPackage]:
+        return self.search(query, by="name")
+
+    def search_by_description(self, query: str) -> List[AURPackage]:
+        return self.search(query, by="name-desc")
+
+    def search_by_keywords(self, query: str) -> List[AURPackage]:
+        return self.search(query, by="keywords")
+
+    def search_by_maintainer(self, maintainer: str) -> List[AURPackage]:
+        return self.search(maintainer, by="maintainer")
@@ -0,0 +1,157 @@
+import bisect
+import heapq
+import math
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rune.api.index import AURIndex
+
+
+# Keyword hits rank below name hits of the same quality.
+KEYWORD_WEIGHT = 0.8
+MIN_SIMILARITY = 0.3
+MAX_PREFIX_TERMS = 500
+MAX_FUZZY_CANDIDATES = 300
+MAX_POSTINGS_SCANNED = 20000
+# Fuzzy matching needs a few trigrams to be meaningful.
+MIN_FUZZY_LENGTH = 3
+INSTANT_FIELDS = ("name", "keywords")
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InstantIndex:
+    """
+    In-memory index over AUR package names and keywords for
+    search-as-you-type.
+
+    Terms are kept in a sorted array, so a prefix lookup is a bisect
+    followed by a short scan. Typo tolerance comes from a trigram
+    inverted index ranked by Dice similarity. Each term keeps the
+    packages it names apart from those listing it as a keyword, so a
+    search can be limited to either field.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.popularity = array("d")
+        self.terms: List[str] = []
+        self.term_packages: List[Tuple[int, ...]] = []
+        self.term_keyword_packages: List[Tuple[int, ...]] = []
+        self.postings: Dict[str, array] = {}
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, float, Iterable[str]]]) -> "InstantIndex":
+        """Build from ``(name, popularity, keywords)`` tuples."""
+        index = cls()
+        name_map: Dict[str, List[int]] = {}
+        keyword_map: Dict[str, List[int]] = {}
+        for name, popularity, keywords in records:
+            package_id = len(index.names)
+            index.names.append(name)
+            index.popularity.append(float(popularity or 0.0))
+            name_map.setdefault(name.lower(), []).append(package_id)
+            for keyword in keywords or ():
+                keyword_map.setdefault(keyword.lower(), []).append(package_id)
+
+        for term_id, term in enumerate(sorted(name_map.keys() | keyword_map.keys())):
+            index.terms.append(term)
+            index.term_packages.append(tuple(name_map.get(term, ())))
+            index.term_keyword_packages.append(tuple(keyword_map.get(term, ())))
+            for trigram in _trigrams(term):
+                posting = index.postings.get(trigram)
+                if posting is None:
+                    posting = index.postings[trigram] = array("i")
+                posting.append(term_id)
+        return index
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "InstantIndex":
+        return cls.build(
+            (r["Name"], r.get("Popularity") or 0.0, r.get("Keywords") or ())
+            for r in records
+            if r.get("Name")
+        )
+
+    @classmethod
+    def from_aur_index(cls, aur_index: "AURIndex") -> "InstantIndex":
+        return cls.build(aur_index.search_terms())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _prefix_terms(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        start = bisect.bisect_left(self.terms, query)
+        for term_id in range(start, min(start + MAX_PREFIX_TERMS, len(self.terms))):
+            term = self.terms[term_id]
+            if not term.startswith(query):
+                break
+            # Exact hits score 2; shorter completions beat longer ones.
+            scores[term_id] = 2.0 if term == query else 1.0 + len(query) / len(term)
+        return scores
+
+    def _fuzzy_terms(self, query: str) -> Dict[int, float]:
+        trigrams = _trigrams(query)
+        postings = sorted(
+            (self.postings[t] for t in trigrams if t in self.postings), key=len
+        )
+        # Count candidates from the rarest trigrams first and stop once the
+        # budget is spent; very common trigrams add little but cost the most.
+        counts: Counter = Counter()
+        scanned = 0
+        for posting in postings:
+            if scanned and scanned + len(posting) > MAX_POSTINGS_SCANNED:
+                break
+            counts.update(posting)
+            scanned += len(posting)
+
+        scores: Dict[int, float] = {}
+        for term_id, _ in heapq.nlargest(
+            MAX_FUZZY_CANDIDATES, counts.items(), key=lambda item: item[1]
+        ):
+            term_trigrams = _trigrams(self.terms[term_id])
+            common = len(trigrams & term_trigrams)
+            similarity = 2.0 * common / (len(trigrams) + len(term_trigrams))
+            if similarity >= MIN_SIMILARITY:
+                scores[term_id] = similarity
+        return scores
+
+    def search_scored(
+        self, query: str, limit: int = 50, fields: Sequence[str] = INSTANT_FIELDS
+    ) -> List[Tuple[str, float]]:
+        query = (query or "").strip().lower()
+        if not query or not self.names:
+            return []
+
+        term_scores = self._fuzzy_terms(query) if len(query) >= MIN_FUZZY_LENGTH else {}
+        for term_id, score in self._prefix_terms(query).items():
+            if score > term_scores.get(term_id, 0.0):
+                term_scores[term_id] = score
+
+        weighted = []
+        if "name" in fields:
+            weighted.append((self.term_packages, 1.0))
+        if "keywords" in fields:
+            weighted.append((self.term_keyword_packages, KEYWORD_WEIGHT))
+        package_scores: Dict[int, float] = {}
+        for term_id, score in term_scores.items():
+            for term_packages, weight in weighted:
+                for package_id in term_packages[term_id]:
+                    if score * weight > package_scores.get(package_id, 0.0):
+                        package_scores[package_id] = score * weight
+
+        ranked = heapq.nlargest(
+            limit,
+            package_scores.items(),
+            key=lambda item: item[1] + 0.02 * math.log1p(self.popularity[item[0]]),
+        )
+        return [(self.names[package_id], score) for package_id, score in ranked]
+
+    def search(self, query: str, limit: int = 50, fields: Sequence[str] = INSTANT_FIELDS) -> List[str]:
+        return [name for name, _ in self.search_scored(query, limit, fields)]
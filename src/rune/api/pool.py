@@ -0,0 +1,89 @@
+import http.client
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Tuple
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of persistent HTTP(S) connections to a single host.
+
+    At most ``max_size`` idle connections are kept; connections idle for
+    longer than ``idle_timeout`` seconds are closed instead of reused.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_size: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+    ):
+        parts = urllib.parse.urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.max_size = max(0, int(max_size))
+        self.idle_timeout = float(idle_timeout)
+        self.timeout = timeout
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            while self._idle:
+                candidate, released_at = self._idle.pop()
+                if now - released_at > self.idle_timeout:
+                    stale.append(candidate)
+                    continue
+                conn = candidate
+                self.reused += 1
+                break
+            if conn is None:
+                self.created += 1
+            self.discarded += len(stale)
+        for candidate in stale:
+            candidate.close()
+        if conn is not None:
+            return conn, True
+        return self._new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+            self.discarded += 1
+        conn.close()
+
+    def discard(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self.discarded += 1
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "idle": len(self._idle),
+            }
@@ -0,0 +1,157 @@
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from rune.api.aur import AURPackage, popularity_rank
+from rune.api.index import download_packages_meta, load_packages_meta
+
+
+PACKAGES_META_LITE_URL = "https://aur.archlinux.org/packages-meta-v1.json.gz"
+
+POPULAR_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".aur-popular.json",
+)
+
+
+class PopularNotReady(Exception):
+    """The ranking has not been downloaded yet; a download is running."""
+
+
+def rank_records(records: Iterable[Dict], limit: int) -> List[Dict]:
+    return heapq.nlargest(limit, records, key=popularity_rank)
+
+
+class PopularPackages:
+    """
+    Precomputed AUR popularity ranking, built from the packages-meta dump.
+
+    The top ``max_entries`` records are kept pre-sorted on disk and in
+    memory, so top-K and paged queries are slices. A ranking older than
+    ``refresh_interval`` seconds is served while a background refresh
+    runs. Before the first download has finished, queries start it in
+    the background and raise PopularNotReady instead of waiting for it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        url: str = PACKAGES_META_LITE_URL,
+        max_entries: int = 1000,
+        refresh_interval: float = 24 * 60 * 60,
+    ):
+        self.path = path or POPULAR_PATH
+        self.url = url
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self._ranked: Optional[List[Dict]] = None
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._failed: Optional[Exception] = None
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(payload, dict) or not isinstance(payload.get("ranked"), list):
+            return False
+        with self._lock:
+            self._ranked = payload["ranked"]
+            self._updated_at = float(payload.get("updated_at", 0))
+        return True
+
+    def _save(self, ranked: List[Dict], updated_at: float) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"updated_at": updated_at, "ranked": ranked}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def refresh(self, records: Optional[Iterable[Dict]] = None) -> int:
+        if records is None:
+            fd, dest = tempfile.mkstemp(suffix=".json.gz")
+            os.close(fd)
+            try:
+                download_packages_meta(dest, self.url)
+                records = load_packages_meta(dest)
+            finally:
+                os.unlink(dest)
+
+        ranked = rank_records(records, self.max_entries)
+        updated_at = time.time()
+        self._save(ranked, updated_at)
+        with self._lock:
+            self._ranked = ranked
+            self._updated_at = updated_at
+        return len(ranked)
+
+    def refresh_async(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                self.refresh()
+                self._failed = None
+            except Exception as e:
+                self._failed = e
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    def is_stale(self) -> bool:
+        return time.time() - self._updated_at > self.refresh_interval
+
+    def refresh_if_stale(self) -> None:
+        if self._ranked is None:
+            self._load()
+        if self.is_stale():
+            self.refresh_async()
+
+    def is_ready(self) -> bool:
+        return self._ranked is not None or self._load()
+
+    def _ensure(self) -> List[Dict]:
+        if not self.is_ready():
+            if self._failed is not None and not self._refreshing:
+                # Reported once; the next query starts another download.
+                failed, self._failed = self._failed, None
+                raise ConnectionError(f"Could not download popular packages: {failed}")
+            self.refresh_async()
+            raise PopularNotReady("Popular packages are still downloading; try again shortly")
+        if self.is_stale():
+            self.refresh_async()
+        ranked = self._ranked
+        assert ranked is not None
+        return ranked
+
+    def __len__(self) -> int:
+        return len(self._ranked or []) if self.is_ready() else 0
+
+    def top(self, k: int = 100, offset: int = 0) -> List[AURPackage]:
+        ranked = self._ensure()
+        offset = max(0, offset)
+        end = len(ranked) if k is None or k <= 0 else offset + k
+        return [AURPackage(record) for record in ranked[offset:end]]
+
+    def page(self, number: int, size: int = 50) -> List[AURPackage]:
+        return self.top(size, offset=number * size)
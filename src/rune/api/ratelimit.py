@@ -0,0 +1,177 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+STATE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".ratelimit.json",
+)
+
+# aurweb allows 4000 RPC requests per source IP per day.
+AUR_DAILY_LIMIT = 4000
+BUDGET_WINDOW = 24 * 60 * 60
+
+# Spend is written to the state file after this many requests or seconds,
+# whichever comes first, and when the process exits.
+SAVE_EVERY = 10
+SAVE_INTERVAL = 5.0
+
+
+class RateLimitExceeded(ConnectionError):
+    pass
+
+
+class RateLimiter:
+    """
+    Client-side limiter for one host: a token bucket smooths bursts and a
+    daily request budget, persisted in ``state_path``, keeps this machine
+    under the server's quota across runs.
+
+    Runa processes share the state file: each adds the requests it spent
+    since its last save to the count on disk, under an exclusive lock, and
+    picks up what the others spent at the same time.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = 2.0,
+        burst: int = 10,
+        daily_budget: int = AUR_DAILY_LIMIT,
+        state_path: Optional[str] = None,
+        max_wait: float = 30.0,
+        save_every: int = SAVE_EVERY,
+        save_interval: float = SAVE_INTERVAL,
+    ):
+        self.host = host
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.daily_budget = daily_budget
+        self.state_path = state_path or STATE_PATH
+        self.max_wait = max_wait
+        self.save_every = max(1, int(save_every))
+        self.save_interval = save_interval
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        # Requests spent in the window, including the unsaved ones.
+        self._used = 0
+        self._unsaved = 0
+        self._synced = 0.0
+        with self._lock:
+            self._sync()
+        atexit.register(self.flush)
+
+    def _sync(self) -> None:
+        """Merge this process's unsaved spend into the state file."""
+        directory = os.path.dirname(self.state_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "r+", encoding="utf-8") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                if not isinstance(state, dict):
+                    state = {}
+                now = time.time()
+                entry = state.get(self.host) or {}
+                try:
+                    window_start = float(entry["window_start"])
+                    used = int(entry["used"])
+                except (TypeError, KeyError, ValueError):
+                    window_start, used = self._window_start, 0
+                # The window on disk is the shared one while it lasts; the
+                # first process to see it expire starts the next.
+                if now - window_start >= BUDGET_WINDOW:
+                    window_start, used = now, 0
+                used += self._unsaved
+                state[self.host] = {"window_start": window_start, "used": used}
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+        except OSError:
+            return
+        self._window_start = window_start
+        self._used = used
+        self._unsaved = 0
+        self._synced = time.monotonic()
+
+    def _maybe_sync(self) -> None:
+        # Close to the budget every request is written, so processes
+        # sharing it cannot overshoot by a batch each.
+        if (
+            self._unsaved >= self.save_every
+            or self.daily_budget - self._used <= self.save_every
+            or time.monotonic() - self._synced >= self.save_interval
+        ):
+            self._sync()
+
+    def flush(self) -> None:
+        """Write the unsaved spend to the state file now."""
+        with self._lock:
+            if self._unsaved:
+                self._sync()
+
+    def _roll_window(self) -> None:
+        if time.time() - self._window_start >= BUDGET_WINDOW:
+            self._window_start = time.time()
+            self._used = 0
+            self._unsaved = 0
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll_window()
+            self._maybe_sync()
+            return max(0, self.daily_budget - self._used)
+
+    def acquire(self) -> None:
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                self._roll_window()
+                if self._used >= self.daily_budget:
+                    raise RateLimitExceeded(
+                        f"Daily AUR request budget of {self.daily_budget} exhausted"
+                    )
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._used += 1
+                    self._unsaved += 1
+                    self._maybe_sync()
+                    return
+                wait = max(self._paused_until - now, (1.0 - self._tokens) / self.rate)
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded("AUR request rate limit reached")
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._roll_window()
+            return {
+                "used": self._used,
+                "remaining": max(0, self.daily_budget - self._used),
+                "tokens": self._tokens,
+                "window_start": self._window_start,
+            }
@@ -0,0 +1,234 @@
+import math
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from rune.api.aur import AURPackage
+
+
+DAY = 24 * 60 * 60
+
+# Columns that can be sorted on. "trending" is derived, see trending_scores.
+SORT_KEYS = (
+    "popularity",
+    "votes",
+    "last_modified",
+    "first_submitted",
+    "out_of_date",
+    "orphan",
+    "name",
+    "trending",
+)
+
+SortKey = Tuple[str, bool]
+
+# Weights for the trending score.
+TRENDING_POPULARITY = 1.0
+TRENDING_VOTES = 0.25
+TRENDING_RECENCY = 2.0
+TRENDING_HALF_LIFE_DAYS = 90.0
+TRENDING_OUT_OF_DATE_PENALTY = 1.5
+
+
+class ResultSet:
+    """
+    Columnar view over a list of AURPackage.
+
+    Popularity, votes, timestamps and flags are extracted once into
+    columns; sorting and filtering only reorder an index over them, so
+    changing the sort order of a large result set does not touch the
+    package objects. Uses NumPy when it is installed and plain lists
+    otherwise.
+    """
+
+    def __init__(self, packages: Sequence["AURPackage"], _columns=None, _order=None):
+        self._packages = list(packages) if _columns is None else packages
+        self._columns: Dict = _columns if _columns is not None else self._extract(self._packages)
+        if _order is not None:
+            self._order = _order
+        elif np is not None:
+            self._order = np.arange(len(self._packages))
+        else:
+            self._order = list(range(len(self._packages)))
+
+    @staticmethod
+    def _extract(packages: Sequence["AURPackage"]) -> Dict:
+        count = len(packages)
+        popularity = [float(p.popularity or 0.0) for p in packages]
+        votes = [int(p.votes or 0) for p in packages]
+        last_modified = [int(p.last_modified or 0) for p in packages]
+        first_submitted = [int(p.first_submitted or 0) for p in packages]
+        out_of_date = [bool(p.out_of_date) for p in packages]
+        orphan = [not p.maintainer or p.maintainer == "orphan" for p in packages]
+        if np is None:
+            return {
+                "popularity": popularity,
+                "votes": votes,
+                "last_modified": last_modified,
+                "first_submitted": first_submitted,
+                "out_of_date": out_of_date,
+                "orphan": orphan,
+            }
+        return {
+            "popularity": np.fromiter(popularity, dtype=np.float64, count=count),
+            "votes": np.fromiter(votes, dtype=np.int64, count=count),
+            "last_modified": np.fromiter(last_modified, dtype=np.int64, count=count),
+            "first_submitted": np.fromiter(first_submitted, dtype=np.int64, count=count),
+            "out_of_date": np.fromiter(out_of_date, dtype=np.bool_, count=count),
+            "orphan": np.fromiter(orphan, dtype=np.bool_, count=count),
+        }
+
+    def _derive(self, order) -> "ResultSet":
+        return ResultSet(self._packages, _columns=self._columns, _order=order)
+
+    def _column(self, key: str):
+        column = self._columns.get(key)
+        if column is not None:
+            return column
+        if key == "name":
+            # Sort by rank so a name sort can be reversed like a number.
+            ranked = sorted(range(len(self._packages)), key=lambda i: self._packages[i].name.lower())
+            if np is None:
+                column = [0] * len(ranked)
+                for rank, i in enumerate(ranked):
+                    column[i] = rank
+            else:
+                column = np.empty(len(ranked), dtype=np.int64)
+                column[np.asarray(ranked, dtype=np.int64)] = np.arange(len(ranked))
+        elif key == "trending":
+            column = self.trending_scores()
+        else:
+            raise ValueError(f"Unknown sort key: {key}")
+        self._columns[key] = column
+        return column
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator["AURPackage"]:
+        for i in self._order:
+            yield self._packages[int(i)]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._packages[int(i)] for i in self._order[index]]
+        return self._packages[int(self._order[index])]
+
+    def packages(self, limit: Optional[int] = None) -> List["AURPackage"]:
+        order = self._order if limit is None else self._order[:limit]
+        return [self._packages[int(i)] for i in order]
+
+    def trending_scores(self, now: Optional[float] = None):
+        """
+        score = TRENDING_POPULARITY * log1p(popularity)
+                + TRENDING_VOTES * log1p(votes)
+                + TRENDING_RECENCY * 0.5 ** (days since last update / half-life)
+                - TRENDING_OUT_OF_DATE_PENALTY if flagged out of date
+        """
+        if now is None:
+            now = time.time()
+        columns = self._columns
+        if np is not None:
+            age_days = np.maximum(now - columns["last_modified"], 0) / DAY
+            return (
+                TRENDING_POPULARITY * np.log1p(np.maximum(columns["popularity"], 0.0))
+                + TRENDING_VOTES * np.log1p(np.maximum(columns["votes"], 0))
+                + TRENDING_RECENCY * np.exp2(-age_days / TRENDING_HALF_LIFE_DAYS)
+                - TRENDING_OUT_OF_DATE_PENALTY * columns["out_of_date"]
+            )
+        scores = []
+        for popularity, votes, modified, out_of_date in zip(
+            columns["popularity"], columns["votes"], columns["last_modified"], columns["out_of_date"]
+        ):
+            age_days = max(now - modified, 0) / DAY
+            scores.append(
+                TRENDING_POPULARITY * math.log1p(max(popularity, 0.0))
+                + TRENDING_VOTES * math.log1p(max(votes, 0))
+                + TRENDING_RECENCY * 2.0 ** (-age_days / TRENDING_HALF_LIFE_DAYS)
+                - (TRENDING_OUT_OF_DATE_PENALTY if out_of_date else 0.0)
+            )
+        return scores
+
+    def sort(self, keys: Sequence[SortKey]) -> "ResultSet":
+        """
+        Return the set ordered by ``keys``, a sequence of ``(column,
+        descending)`` pairs with the primary key first. The sort is stable,
+        so ties keep their current order.
+        """
+        if not keys or len(self._order) < 2:
+            return self
+        columns = [(self._column(key), descending) for key, descending in keys]
+
+        if np is not None:
+            order = self._order
+            # lexsort treats the last key as primary.
+            lex_keys = []
+            for column, descending in reversed(columns):
+                values = column[order]
+                if values.dtype == np.bool_:
+                    values = values.astype(np.int8)
+                lex_keys.append(-values if descending else values)
+            return self._derive(order[np.lexsort(lex_keys)])
+
+        order = list(self._order)
+        for column, descending in reversed(columns):
+            order.sort(key=column.__getitem__, reverse=descending)
+        return self._derive(order)
+
+    def filter(
+        self,
+        min_votes: Optional[int] = None,
+        max_votes: Optional[int] = None,
+        min_popularity: Optional[float] = None,
+        out_of_date: Optional[bool] = None,
+        orphan: Optional[bool] = None,
+        max_age_days: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> "ResultSet":
+        """
+        Return the packages matching every given condition. ``out_of_date``
+        and ``orphan`` select flagged (True) or unflagged (False) packages;
+        ``max_age_days`` keeps packages updated within that many days.
+        """
+        if now is None:
+            now = time.time()
+        columns = self._columns
+
+        if np is not None:
+            order = self._order
+            mask = np.ones(len(order), dtype=np.bool_)
+            if min_votes is not None:
+                mask &= columns["votes"][order] >= min_votes
+            if max_votes is not None:
+                mask &= columns["votes"][order] <= max_votes
+            if min_popularity is not None:
+                mask &= columns["popularity"][order] >= min_popularity
+            if out_of_date is not None:
+                mask &= columns["out_of_date"][order] == out_of_date
+            if orphan is not None:
+                mask &= columns["orphan"][order] == orphan
+            if max_age_days is not None:
+                mask &= columns["last_modified"][order] >= now - max_age_days * DAY
+            return self._derive(order[mask])
+
+        votes = columns["votes"]
+        popularity = columns["popularity"]
+        flagged = columns["out_of_date"]
+        orphaned = columns["orphan"]
+        modified = columns["last_modified"]
+        cutoff = None if max_age_days is None else now - max_age_days * DAY
+        order = [
+            i for i in self._order
+            if (min_votes is None or votes[i] >= min_votes)
+            and (max_votes is None or votes[i] <= max_votes)
+            and (min_popularity is None or popularity[i] >= min_popularity)
+            and (out_of_date is None or flagged[i] == out_of_date)
+            and (orphan is None or orphaned[i] == orphan)
+            and (cutoff is None or modified[i] >= cutoff)
+        ]
+        return self._derive(order)
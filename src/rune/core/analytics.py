@@ -0,0 +1,159 @@
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from rune.core.depgraph import DependencyGraph
+from rune.core.localdb import LocalPackage
+
+
+# Repository label for installed packages no sync database has.
+FOREIGN = "foreign"
+
+SORT_KEYS = ("name", "size", "install_date", "with_dependencies")
+
+# (package count, installed bytes)
+SizeTotal = Tuple[int, int]
+
+# An np.ndarray when NumPy is installed and a list otherwise; every use
+# branches on ``np`` first.
+Column = Any
+
+
+class InstalledSizes:
+    """
+    Installed size, install date, reason and repository of every installed
+    package as columns, with the aggregates the Installed page shows.
+
+    Totals and orderings are computed over the columns, with NumPy when it
+    is installed and plain lists otherwise. The size with dependencies is
+    what ``pacman -Rns`` would free for each package, from the dependency
+    graph, and is only computed when asked for.
+    """
+
+    def __init__(
+        self,
+        packages: Sequence[LocalPackage],
+        repos: Dict[str, str],
+        graph: Optional[DependencyGraph] = None,
+    ):
+        self.packages = sorted(packages, key=lambda p: p.name)
+        self.graph = graph if graph is not None else DependencyGraph(self.packages)
+        self.index = {pkg.name: i for i, pkg in enumerate(self.packages)}
+        self.repo_names: List[str] = sorted(set(repos.get(pkg.name, FOREIGN) for pkg in self.packages))
+        repo_ids = {repo: i for i, repo in enumerate(self.repo_names)}
+
+        count = len(self.packages)
+        sizes = [pkg.size for pkg in self.packages]
+        dates = [pkg.install_date for pkg in self.packages]
+        explicit = [pkg.explicit for pkg in self.packages]
+        repo_codes = [repo_ids[repos.get(pkg.name, FOREIGN)] for pkg in self.packages]
+        self.sizes: Column
+        self.install_dates: Column
+        self.explicit: Column
+        self.repos: Column
+        self._with_dependencies: Optional[Column] = None
+        if np is None:
+            self.sizes = sizes
+            self.install_dates = dates
+            self.explicit = explicit
+            self.repos = repo_codes
+        else:
+            self.sizes = np.fromiter(sizes, dtype=np.int64, count=count)
+            self.install_dates = np.fromiter(dates, dtype=np.int64, count=count)
+            self.explicit = np.fromiter(explicit, dtype=np.bool_, count=count)
+            self.repos = np.fromiter(repo_codes, dtype=np.int64, count=count)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def repo(self, name: str) -> str:
+        return self.repo_names[int(self.repos[self.index[name]])]
+
+    def total_size(self) -> int:
+        return int(self.sizes.sum()) if np is not None else sum(self.sizes)
+
+    def largest(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """The ``limit`` largest packages by installed size."""
+        if np is not None:
+            limit = min(limit, len(self.packages))
+            if limit <= 0:
+                return []
+            top = np.argpartition(-self.sizes, limit - 1)[:limit]
+            top = top[np.argsort(-self.sizes[top], kind="stable")]
+            return [(self.packages[i].name, int(self.sizes[i])) for i in top]
+        top = heapq.nlargest(limit, range(len(self.packages)), key=self.sizes.__getitem__)
+        return [(self.packages[i].name, self.sizes[i]) for i in top]
+
+    def size_by_repo(self) -> Dict[str, SizeTotal]:
+        """Package count and installed size per repository, plus FOREIGN."""
+        if np is not None:
+            length = len(self.repo_names)
+            counts = np.bincount(self.repos, minlength=length)
+            totals = np.bincount(self.repos, weights=self.sizes, minlength=length)
+            return {repo: (int(counts[i]), int(totals[i])) for i, repo in enumerate(self.repo_names)}
+        result = {repo: [0, 0] for repo in self.repo_names}
+        for code, size in zip(self.repos, self.sizes):
+            total = result[self.repo_names[code]]
+            total[0] += 1
+            total[1] += size
+        return {repo: (count, size) for repo, (count, size) in result.items()}
+
+    def size_by_reason(self) -> Dict[str, SizeTotal]:
+        """Package count and installed size of explicit and dependency packages."""
+        if np is not None:
+            explicit_size = int(self.sizes[self.explicit].sum())
+            explicit_count = int(self.explicit.sum())
+        else:
+            explicit_size = sum(size for size, flag in zip(self.sizes, self.explicit) if flag)
+            explicit_count = sum(self.explicit)
+        return {
+            "explicit": (explicit_count, explicit_size),
+            "dependency": (len(self.packages) - explicit_count, self.total_size() - explicit_size),
+        }
+
+    def orphan_size(self, recursive: bool = True) -> Tuple[List[str], int]:
+        """Orphans and the installed size removing them would reclaim."""
+        names = self.graph.orphans(recursive=recursive)
+        ids = [self.index[name] for name in names if name in self.index]
+        if np is not None:
+            return names, int(self.sizes[np.asarray(ids, dtype=np.int64)].sum()) if ids else 0
+        return names, sum(self.sizes[i] for i in ids)
+
+    def with_dependencies(self) -> Column:
+        """
+        Per package, its size plus that of the dependencies nothing else
+        needs, i.e. what ``pacman -Rns <package>`` would free.
+        """
+        if self._with_dependencies is None:
+            freed: Column = [self.graph.removal_impact([pkg.name]).freed_size for pkg in self.packages]
+            if np is not None:
+                freed = np.fromiter(freed, dtype=np.int64, count=len(freed))
+            self._with_dependencies = freed
+        return self._with_dependencies
+
+    def _column(self, key: str) -> Column:
+        if key == "size":
+            return self.sizes
+        if key == "install_date":
+            return self.install_dates
+        if key == "with_dependencies":
+            return self.with_dependencies()
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def order(self, key: str, descending: bool = True) -> List[str]:
+        """Package names sorted by ``key``, one of SORT_KEYS; ties by name."""
+        # self.packages is sorted by name, so a stable sort keeps ties in
+        # name order.
+        if key == "name":
+            names = [pkg.name for pkg in self.packages]
+            return names[::-1] if descending else names
+        column = self._column(key)
+        if np is not None:
+            order = np.argsort(-column if descending else column, kind="stable")
+            return [self.packages[i].name for i in order]
+        order = sorted(range(len(self.packages)), key=lambda i: -column[i] if descending else column[i])
+        return [self.packages[i].name for i in order]
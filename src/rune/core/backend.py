@@ -0,0 +1,500 @@
+import abc
+import os
+import subprocess
+import tarfile
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import pyalpm
+except ImportError:
+    pyalpm = None
+
+from rune.core.localdb import (
+    DB_PATH,
+    REASON_DEPEND,
+    REASON_EXPLICIT,
+    LocalDB,
+    LocalPackage,
+    explicit_packages,
+    orphan_packages,
+)
+from rune.core.syncdb import PACMAN_CONF, SyncDB, SyncPackage, configured_repos
+from rune.core.vercmp import vercmp
+
+
+# An installed package and the newer version in a sync database.
+Update = Tuple[LocalPackage, SyncPackage]
+
+
+class BackendUnavailable(RuntimeError):
+    """The backend cannot answer a query on this system; try the next one."""
+
+
+class Backend(abc.ABC):
+    """
+    Package queries against the pacman databases.
+
+    ``installed``, ``foreign``, ``updates``, ``repos`` and
+    ``sync_packages`` must be implemented; ``explicit``, ``orphans`` and
+    ``package`` are derived from ``installed`` unless a backend has a
+    cheaper way to answer them. Lists are sorted by package name.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def installed(self) -> List[LocalPackage]:
+        """Every installed package, as ``pacman -Q``."""
+
+    def explicit(self) -> List[LocalPackage]:
+        """Same selection as ``pacman -Qe``."""
+        return explicit_packages(self.installed())
+
+    def orphans(self) -> List[LocalPackage]:
+        """Same selection as ``pacman -Qdt``."""
+        return orphan_packages(self.installed())
+
+    @abc.abstractmethod
+    def foreign(self) -> List[LocalPackage]:
+        """Same selection as ``pacman -Qm``."""
+
+    @abc.abstractmethod
+    def updates(self) -> List[Update]:
+        """Same selection as ``pacman -Qu``."""
+
+    def package(self, name: str) -> Optional[LocalPackage]:
+        for pkg in self.installed():
+            if pkg.name == name:
+                return pkg
+        return None
+
+    @abc.abstractmethod
+    def repos(self) -> Dict[str, str]:
+        """Sync repository of each installed package that is in one."""
+
+    @abc.abstractmethod
+    def sync_packages(self) -> Dict[str, SyncPackage]:
+        """Every sync database package by name; the first repository wins."""
+
+
+def _newer(installed: Iterable[LocalPackage], index: Dict[str, SyncPackage]) -> List[Update]:
+    updates: List[Update] = []
+    for pkg in installed:
+        sync = index.get(pkg.name)
+        if sync is None or sync.version == pkg.version:
+            continue
+        if vercmp(sync.version, pkg.version) > 0:
+            updates.append((pkg, sync))
+    return updates
+
+
+class LocalDBBackend(Backend):
+    """Reads the local and sync database files directly; see LocalDB and SyncDB."""
+
+    name = "localdb"
+
+    def __init__(self, db: LocalDB, sync_db: Optional[SyncDB] = None):
+        self.db = db
+        self.sync_db = sync_db or SyncDB(db.dbpath)
+
+    def installed(self) -> List[LocalPackage]:
+        if not self.db.exists():
+            raise BackendUnavailable(f"no local database in {self.db.dbpath}")
+        return self.db.packages()
+
+    def _index(self) -> Dict[str, SyncPackage]:
+        if not self.sync_db.exists():
+            raise BackendUnavailable(f"no sync databases in {self.sync_db.dbpath}")
+        try:
+            return self.sync_db.index()
+        except (OSError, EOFError, tarfile.TarError) as e:
+            raise BackendUnavailable(f"cannot read sync databases: {e}")
+
+    def foreign(self) -> List[LocalPackage]:
+        index = self._index()
+        return [pkg for pkg in self.installed() if pkg.name not in index]
+
+    def updates(self) -> List[Update]:
+        return _newer(self.installed(), self._index())
+
+    def repos(self) -> Dict[str, str]:
+        index = self._index()
+        return {pkg.name: index[pkg.name].repo for pkg in self.installed() if pkg.name in index}
+
+    def sync_packages(self) -> Dict[str, SyncPackage]:
+        return self._index()
+
+
+class AlpmBackend(Backend):
+    """
+    Queries through libalpm with the pyalpm bindings. A handle is opened
+    per query so packages installed in the meantime are seen.
+    """
+
+    name = "pyalpm"
+
+    def __init__(self, dbpath: str = DB_PATH, conf_path: str = PACMAN_CONF, root: str = "/"):
+        if pyalpm is None:
+            raise BackendUnavailable("pyalpm is not installed")
+        self.dbpath = dbpath
+        self.conf_path = conf_path
+        self.root = root
+
+    def _handle(self):
+        try:
+            handle = pyalpm.Handle(self.root, self.dbpath)
+            syncdbs = [handle.register_syncdb(repo, 0) for repo in configured_repos(self.conf_path)]
+        except pyalpm.error as e:
+            raise BackendUnavailable(f"libalpm: {e}")
+        return handle, syncdbs
+
+    @staticmethod
+    def _to_local(pkg) -> LocalPackage:
+        return LocalPackage(
+            name=pkg.name,
+            version=pkg.version,
+            base=pkg.base or "",
+            description=pkg.desc or "",
+            url=pkg.url or "",
+            arch=pkg.arch or "",
+            build_date=pkg.builddate,
+            install_date=pkg.installdate,
+            packager=pkg.packager or "",
+            size=pkg.isize,
+            reason=pkg.reason,
+            licenses=list(pkg.licenses),
+            groups=list(pkg.groups),
+            depends=list(pkg.depends),
+            optdepends=list(pkg.optdepends),
+            conflicts=list(pkg.conflicts),
+            provides=list(pkg.provides),
+            replaces=list(pkg.replaces),
+        )
+
+    @staticmethod
+    def _to_sync(pkg) -> SyncPackage:
+        return SyncPackage(
+            name=pkg.name,
+            version=pkg.version,
+            repo=pkg.db.name,
+            description=pkg.desc or "",
+            download_size=pkg.size,
+            installed_size=pkg.isize,
+            provides=list(pkg.provides),
+        )
+
+    def installed(self) -> List[LocalPackage]:
+        handle, _ = self._handle()
+        packages = [self._to_local(pkg) for pkg in handle.get_localdb().pkgcache]
+        packages.sort(key=lambda p: p.name)
+        return packages
+
+    def foreign(self) -> List[LocalPackage]:
+        handle, syncdbs = self._handle()
+        packages = [
+            self._to_local(pkg)
+            for pkg in handle.get_localdb().pkgcache
+            if not any(db.get_pkg(pkg.name) for db in syncdbs)
+        ]
+        packages.sort(key=lambda p: p.name)
+        return packages
+
+    def updates(self) -> List[Update]:
+        handle, syncdbs = self._handle()
+        updates: List[Update] = []
+        for pkg in handle.get_localdb().pkgcache:
+            newer = pyalpm.sync_newversion(pkg, syncdbs)
+            if newer is not None:
+                updates.append((self._to_local(pkg), self._to_sync(newer)))
+        updates.sort(key=lambda u: u[0].name)
+        return updates
+
+    def package(self, name: str) -> Optional[LocalPackage]:
+        handle, _ = self._handle()
+        pkg = handle.get_localdb().get_pkg(name)
+        return self._to_local(pkg) if pkg is not None else None
+
+    def repos(self) -> Dict[str, str]:
+        handle, syncdbs = self._handle()
+        repos: Dict[str, str] = {}
+        for pkg in handle.get_localdb().pkgcache:
+            for db in syncdbs:
+                if db.get_pkg(pkg.name) is not None:
+                    repos[pkg.name] = db.name
+                    break
+        return repos
+
+    def sync_packages(self) -> Dict[str, SyncPackage]:
+        _, syncdbs = self._handle()
+        packages: Dict[str, SyncPackage] = {}
+        for db in syncdbs:
+            for pkg in db.pkgcache:
+                if pkg.name not in packages:
+                    packages[pkg.name] = self._to_sync(pkg)
+        return packages
+
+
+_SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4}
+
+# pacman -Qi/-Si fields holding a list, in the C locale.
+_INFO_LISTS = {
+    "Licenses": "licenses",
+    "Groups": "groups",
+    "Provides": "provides",
+    "Depends On": "depends",
+    "Conflicts With": "conflicts",
+    "Replaces": "replaces",
+    "Validated By": "validation",
+}
+
+
+def _parse_size(value: str) -> int:
+    try:
+        number, unit = value.split()
+        return int(float(number) * _SIZE_UNITS[unit])
+    except (ValueError, KeyError):
+        return 0
+
+
+def _parse_date(value: str) -> int:
+    # pacman prints dates with strftime("%c"), "Mon Jan  1 12:00:00 2024"
+    # in the C locale.
+    try:
+        return int(time.mktime(time.strptime(value, "%a %b %d %H:%M:%S %Y")))
+    except (ValueError, OverflowError):
+        return 0
+
+
+def _parse_info_fields(lines: Iterable[str]) -> Iterator[Dict[str, List[str]]]:
+    """Split ``pacman -Qi``/``-Si`` output into one field dict per package."""
+    fields: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            if fields:
+                yield fields
+            fields = {}
+            current = None
+        elif line[0] == " " and current is not None:
+            # Continuation line, used for every optional dependency after
+            # the first.
+            current.append(line.strip())
+        elif " : " in line or line.endswith(" :"):
+            key, value = line.split(":", 1)
+            current = fields.setdefault(key.strip(), [])
+            current.append(value.strip())
+    if fields:
+        yield fields
+
+
+def _info_list(values: List[str]) -> List[str]:
+    items: List[str] = []
+    for value in values:
+        if value == "None":
+            continue
+        for item in value.split("  "):
+            item = item.strip()
+            if item.endswith(" [installed]"):
+                item = item[: -len(" [installed]")]
+            if item:
+                items.append(item)
+    return items
+
+
+def _info_value(fields: Dict[str, List[str]], key: str) -> str:
+    values = fields.get(key)
+    if not values or values[0] == "None":
+        return ""
+    return values[0]
+
+
+def _local_from_info(fields: Dict[str, List[str]]) -> Optional[LocalPackage]:
+    name = _info_value(fields, "Name")
+    version = _info_value(fields, "Version")
+    if not name or not version:
+        return None
+    kwargs = {attr: _info_list(fields[key]) for key, attr in _INFO_LISTS.items() if key in fields}
+    # Optional dependencies are printed one per line and contain single
+    # spaces, so they are not split further.
+    kwargs["optdepends"] = [
+        value[: -len(" [installed]")] if value.endswith(" [installed]") else value
+        for value in fields.get("Optional Deps", [])
+        if value and value != "None"
+    ]
+    reason = _info_value(fields, "Install Reason")
+    return LocalPackage(
+        name=name,
+        version=version,
+        base=_info_value(fields, "Base"),
+        description=_info_value(fields, "Description"),
+        url=_info_value(fields, "URL"),
+        arch=_info_value(fields, "Architecture"),
+        build_date=_parse_date(_info_value(fields, "Build Date")),
+        install_date=_parse_date(_info_value(fields, "Install Date")),
+        packager=_info_value(fields, "Packager"),
+        size=_parse_size(_info_value(fields, "Installed Size")),
+        reason=REASON_EXPLICIT if reason.startswith("Explicitly") else REASON_DEPEND,
+        **kwargs,
+    )
+
+
+def _sync_from_info(fields: Dict[str, List[str]]) -> Optional[SyncPackage]:
+    name = _info_value(fields, "Name")
+    version = _info_value(fields, "Version")
+    if not name or not version:
+        return None
+    return SyncPackage(
+        name=name,
+        version=version,
+        repo=_info_value(fields, "Repository"),
+        description=_info_value(fields, "Description"),
+        download_size=_parse_size(_info_value(fields, "Download Size")),
+        installed_size=_parse_size(_info_value(fields, "Installed Size")),
+        provides=_info_list(fields.get("Provides", [])),
+    )
+
+
+class SubprocessBackend(Backend):
+    """
+    Queries through the pacman command line. pacman runs in the C locale
+    so its output can be parsed whatever the user's language.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, dbpath: str = DB_PATH, conf_path: str = PACMAN_CONF):
+        self.dbpath = dbpath
+        self.conf_path = conf_path
+
+    def _command(self, args: List[str]) -> List[str]:
+        command = ["pacman", *args]
+        if self.dbpath != DB_PATH:
+            command += ["--dbpath", self.dbpath]
+        if self.conf_path != PACMAN_CONF:
+            command += ["--config", self.conf_path]
+        return command
+
+    @staticmethod
+    def _env() -> Dict[str, str]:
+        env = dict(os.environ)
+        env["LC_ALL"] = "C"
+        return env
+
+    def run(self, args: List[str]) -> str:
+        proc = subprocess.run(
+            self._command(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=self._env(),
+        )
+        # Queries exit with 1 and print nothing when no package matched.
+        if proc.returncode != 0 and (proc.stdout or proc.stderr.strip() or proc.returncode != 1):
+            msg = proc.stderr.strip() or "pacman command failed"
+            raise RuntimeError(msg)
+        return proc.stdout
+
+    def _info(self, args: List[str]) -> List[Dict[str, List[str]]]:
+        proc = subprocess.Popen(
+            self._command(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=self._env(),
+        )
+        stdout, stderr_pipe = proc.stdout, proc.stderr
+        assert stdout is not None and stderr_pipe is not None
+        # stderr is drained on its own thread: a pacman that fills the
+        # stderr pipe (one line per missing package) before closing stdout
+        # would otherwise block while stdout is still being read.
+        errors: List[str] = []
+        drain = threading.Thread(target=lambda: errors.append(stderr_pipe.read()))
+        drain.daemon = True
+        drain.start()
+        try:
+            # Parse while pacman is still writing; the output for a full
+            # system runs to several megabytes.
+            blocks = list(_parse_info_fields(stdout))
+        finally:
+            stdout.close()
+            drain.join()
+            stderr_pipe.close()
+        stderr = "".join(errors)
+        returncode = proc.wait()
+        if returncode != 0 and (blocks or stderr.strip() or returncode != 1):
+            msg = stderr.strip() or "pacman command failed"
+            raise RuntimeError(msg)
+        return blocks
+
+    def _query(self, flags: str) -> List[LocalPackage]:
+        packages = [pkg for pkg in map(_local_from_info, self._info([f"-Qi{flags}"])) if pkg is not None]
+        packages.sort(key=lambda p: p.name)
+        return packages
+
+    def installed(self) -> List[LocalPackage]:
+        return self._query("")
+
+    def explicit(self) -> List[LocalPackage]:
+        return self._query("e")
+
+    def orphans(self) -> List[LocalPackage]:
+        return self._query("dt")
+
+    def foreign(self) -> List[LocalPackage]:
+        # Only names and versions are needed for AUR lookups, which
+        # ``pacman -Qm`` lists without the cost of -Qi.
+        packages = []
+        for line in self.run(["-Qm"]).splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                packages.append(LocalPackage(name=parts[0], version=parts[1]))
+        packages.sort(key=lambda p: p.name)
+        return packages
+
+    def updates(self) -> List[Update]:
+        pending: Dict[str, str] = {}
+        for line in self.run(["-Qu"]).splitlines():
+            parts = line.split()
+            if len(parts) >= 4 and parts[2] == "->":
+                pending[parts[0]] = parts[3]
+        if not pending:
+            return []
+        names = sorted(pending)
+        local = {pkg.name: pkg for pkg in map(_local_from_info, self._info(["-Qi", *names])) if pkg}
+        sync = {pkg.name: pkg for pkg in map(_sync_from_info, self._info(["-Si", *names])) if pkg}
+        updates: List[Update] = []
+        for name in names:
+            if name not in local:
+                continue
+            newer = sync.get(name) or SyncPackage(name=name, version=pending[name], repo="")
+            updates.append((local[name], newer))
+        return updates
+
+    def package(self, name: str) -> Optional[LocalPackage]:
+        try:
+            blocks = self._info(["-Qi", name])
+        except RuntimeError:
+            # "error: package '<name>' was not found"
+            return None
+        return _local_from_info(blocks[0]) if blocks else None
+
+    def repos(self) -> Dict[str, str]:
+        # "<repo> <name> <version> [installed]", or "[installed: <version>]"
+        # when the installed version differs.
+        repos: Dict[str, str] = {}
+        for line in self.run(["-Sl"]).splitlines():
+            parts = line.split(None, 3)
+            if len(parts) == 4 and parts[3].startswith("[installed"):
+                repos.setdefault(parts[1], parts[0])
+        return repos
+
+    def sync_packages(self) -> Dict[str, SyncPackage]:
+        # ``pacman -Si`` prints the repositories in pacman.conf order.
+        packages: Dict[str, SyncPackage] = {}
+        for pkg in map(_sync_from_info, self._info(["-Si"])):
+            if pkg is not None and pkg.name not in packages:
+                packages[pkg.name] = pkg
+        return packages
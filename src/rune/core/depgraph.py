@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from rune.core.localdb import LocalPackage, depend_name
+
+
+@dataclass
+class RemovalImpact:
+    targets: List[str]
+    # Dependencies ``pacman -Rs`` removes along with the targets.
+    dependencies: List[str] = field(default_factory=list)
+    # Packages that depend on the removal set; pacman refuses to remove
+    # without -c, which would remove these too.
+    breaks: List[str] = field(default_factory=list)
+    # Packages that lose an optional dependency.
+    optional: List[str] = field(default_factory=list)
+    freed_size: int = 0
+
+    @property
+    def removed(self) -> List[str]:
+        return self.targets + self.dependencies
+
+
+class DependencyGraph:
+    """
+    Dependency graph of the installed packages.
+
+    Dependencies are resolved to every installed package that has the
+    name or provides it; version constraints are not checked. The graph is
+    built once from the local database and then answers reverse-dependency,
+    orphan and removal queries without reading it again.
+    """
+
+    def __init__(self, packages: Iterable[LocalPackage]):
+        self.packages: List[LocalPackage] = sorted(packages, key=lambda p: p.name)
+        self.ids: Dict[str, int] = {pkg.name: i for i, pkg in enumerate(self.packages)}
+
+        providers: Dict[str, List[int]] = {}
+        for i, pkg in enumerate(self.packages):
+            providers.setdefault(pkg.name, []).append(i)
+            for provide in pkg.provides:
+                providers.setdefault(depend_name(provide), []).append(i)
+
+        count = len(self.packages)
+        # Per package, the satisfiers of each of its dependencies.
+        self._depends: List[List[Tuple[int, ...]]] = [[] for _ in range(count)]
+        self._optdepends: List[Set[int]] = [set() for _ in range(count)]
+        self._required_by: List[Set[int]] = [set() for _ in range(count)]
+        self._optional_for: List[Set[int]] = [set() for _ in range(count)]
+        for i, pkg in enumerate(self.packages):
+            for depend in pkg.depends:
+                dep = depend_name(depend)
+                # A package with the dependency's name is its satisfier;
+                # otherwise the first provider, as for pacman.
+                satisfiers = tuple(p for p in providers.get(dep, ()) if p != i)
+                if not satisfiers:
+                    continue
+                if len(satisfiers) > 1:
+                    satisfiers = tuple(sorted(satisfiers, key=lambda p: (self.packages[p].name != dep, p)))
+                self._depends[i].append(satisfiers)
+                for p in satisfiers:
+                    self._required_by[p].add(i)
+            for depend in pkg.optdepends:
+                for p in providers.get(depend_name(depend), ()):
+                    if p != i:
+                        self._optdepends[i].add(p)
+                        self._optional_for[p].add(i)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def _names(self, ids: Iterable[int]) -> List[str]:
+        return sorted(self.packages[i].name for i in ids)
+
+    def _lookup(self, names: Iterable[str]) -> Set[int]:
+        return {self.ids[name] for name in names if name in self.ids}
+
+    def depends(self, name: str) -> List[str]:
+        """Installed packages satisfying ``name``'s dependencies."""
+        i = self.ids[name]
+        return self._names({p for satisfiers in self._depends[i] for p in satisfiers})
+
+    def required_by(self, name: str, optional: bool = False) -> List[str]:
+        """Installed packages depending on ``name``, like pacman's Required By."""
+        i = self.ids[name]
+        ids = set(self._required_by[i])
+        if optional:
+            ids |= self._optional_for[i]
+        return self._names(ids)
+
+    def required_by_closure(self, names: Iterable[str]) -> List[str]:
+        """Every package depending on ``names`` directly or indirectly."""
+        start = self._lookup(names)
+        seen = set(start)
+        stack = list(start)
+        while stack:
+            for r in self._required_by[stack.pop()]:
+                if r not in seen:
+                    seen.add(r)
+                    stack.append(r)
+        return self._names(seen - start)
+
+    def orphans(self, recursive: bool = False, optional: bool = True) -> List[str]:
+        """
+        Dependencies nothing requires, like ``pacman -Qdt``. With
+        ``recursive`` also the packages that become orphans once those are
+        removed, i.e. everything repeated ``pacman -Rns $(pacman -Qdtq)``
+        would remove.
+        """
+        remaining = [
+            len(self._required_by[i] | self._optional_for[i]) if optional else len(self._required_by[i])
+            for i in range(len(self.packages))
+        ]
+        queue = [i for i, pkg in enumerate(self.packages) if not pkg.explicit and remaining[i] == 0]
+        if not recursive:
+            return self._names(queue)
+
+        orphaned = set(queue)
+        while queue:
+            i = queue.pop()
+            wanted = {p for satisfiers in self._depends[i] for p in satisfiers}
+            if optional:
+                wanted |= self._optdepends[i]
+            for p in wanted:
+                remaining[p] -= 1
+                if remaining[p] == 0 and not self.packages[p].explicit and p not in orphaned:
+                    orphaned.add(p)
+                    queue.append(p)
+        return self._names(orphaned)
+
+    def removal_impact(self, names: Iterable[str], cascade: bool = False) -> RemovalImpact:
+        """
+        What ``pacman -Rns <names>`` (``-Rcns`` with ``cascade``) would do:
+        the dependencies removed with the targets, the packages that break,
+        and the installed size freed.
+        """
+        targets = self._lookup(names)
+        if cascade:
+            targets |= self._lookup(self.required_by_closure(self._names(targets)))
+        removed = set(targets)
+
+        # pacman -Rs removes a dependency once it was not explicitly
+        # installed and nothing outside the removal set depends on it.
+        changed = True
+        while changed:
+            changed = False
+            for i in list(removed):
+                for satisfiers in self._depends[i]:
+                    p = satisfiers[0]
+                    if p in removed or self.packages[p].explicit:
+                        continue
+                    if all(r in removed for r in self._required_by[p]):
+                        removed.add(p)
+                        changed = True
+
+        breaks = set()
+        optional = set()
+        for i in removed:
+            for r in self._required_by[i]:
+                if r in removed or r in breaks:
+                    continue
+                # Still satisfied when another provider stays installed.
+                if any(all(p in removed for p in satisfiers) for satisfiers in self._depends[r]):
+                    breaks.add(r)
+            optional |= self._optional_for[i] - removed
+
+        return RemovalImpact(
+            targets=self._names(targets),
+            dependencies=self._names(removed - targets),
+            breaks=self._names(breaks),
+            optional=self._names(optional),
+            freed_size=sum(self.packages[i].size for i in removed),
+        )
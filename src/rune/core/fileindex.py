@@ -0,0 +1,254 @@
+import bisect
+import json
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rune.core.localdb import DB_PATH, LocalDB, read_file, parse_sections
+from rune.core.snapshot import PACMAN_LOG, SnapshotKey, database_key
+
+
+FILE_INDEX_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".file-index",
+)
+
+FILE_INDEX_VERSION = 1
+
+
+def parse_files(text: str) -> List[str]:
+    """Paths listed in a local database ``files`` entry."""
+    return parse_sections(text).get("FILES", [])
+
+
+def entry_package_name(entry: str) -> str:
+    """Package name of a local database directory, ``<name>-<pkgver>-<pkgrel>``."""
+    return entry.rsplit("-", 2)[0]
+
+
+class FileIndex(LocalDB):
+    """
+    Which installed package owns a path, like ``pacman -Qo``.
+
+    Every path from the local database ``files`` entries is kept in one
+    sorted list, relative to the root and with a trailing ``/`` for
+    directories as pacman stores them, next to an array of owning package
+    ids. A directory shared by several packages appears once per owner.
+    The index is saved to disk and, like InstalledSnapshot, only the
+    entries whose ``files`` changed are read again when pacman touches the
+    database.
+    """
+
+    def __init__(
+        self,
+        dbpath: str = DB_PATH,
+        root: str = "/",
+        path: Optional[str] = None,
+        log_path: str = PACMAN_LOG,
+        max_workers: int = 8,
+    ):
+        super().__init__(dbpath, max_workers)
+        self.root = root
+        self.path = path or FILE_INDEX_PATH
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._key: Optional[SnapshotKey] = None
+        # Package id -> local database directory name and files mtime.
+        self._entries: List[str] = []
+        self._mtimes: List[int] = []
+        self._paths: List[str] = []
+        self._owners = array("I")
+        self.reread = 0
+        self._load()
+
+    def key(self) -> SnapshotKey:
+        return database_key(self.local_path, self.log_path)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if (
+                    not isinstance(header, dict)
+                    or header.get("version") != FILE_INDEX_VERSION
+                    or header.get("dbpath") != self.dbpath
+                    or header.get("byteorder") != sys.byteorder
+                ):
+                    return
+                owners = array("I")
+                owners.frombytes(f.read(header["count"] * owners.itemsize))
+                paths = f.read().decode("utf-8").split("\n") if header["count"] else []
+            entries = list(header["entries"])
+            mtimes = [int(m) for m in header["mtimes"]]
+            key = (int(header["key"][0]), int(header["key"][1]))
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return
+        if len(paths) != len(owners) or len(entries) != len(mtimes):
+            return
+        self._entries = entries
+        self._mtimes = mtimes
+        self._paths = paths
+        self._owners = owners
+        self._key = key
+
+    def _save(self) -> None:
+        header = {
+            "version": FILE_INDEX_VERSION,
+            "dbpath": self.dbpath,
+            "byteorder": sys.byteorder,
+            "key": list(self._key or (0, 0)),
+            "count": len(self._paths),
+            "entries": self._entries,
+            "mtimes": self._mtimes,
+        }
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+                f.write(self._owners.tobytes())
+                # pacman's files format is one path per line, so paths
+                # never contain a newline.
+                f.write("\n".join(self._paths).encode("utf-8"))
+            os.replace(tmp, self.path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _read_files(self, entry: str) -> Optional[List[str]]:
+        try:
+            return parse_files(read_file(os.path.join(entry, "files")))
+        except OSError:
+            return None
+
+    def _refresh(self, key: SnapshotKey) -> None:
+        current: Dict[str, int] = {}
+        for entry in self.entries():
+            try:
+                current[os.path.basename(entry)] = os.stat(os.path.join(entry, "files")).st_mtime_ns
+            except OSError:
+                continue
+
+        # Old id -> new id for the entries that are unchanged.
+        remap: Dict[int, int] = {}
+        entries: List[str] = []
+        mtimes: List[int] = []
+        for old_id, (entry, mtime) in enumerate(zip(self._entries, self._mtimes)):
+            if current.get(entry) == mtime:
+                remap[old_id] = len(entries)
+                entries.append(entry)
+                mtimes.append(mtime)
+        stale = sorted(set(current) - set(entries))
+
+        if stale or len(entries) != len(self._entries):
+            if len(remap) == len(self._entries):
+                pairs = list(zip(self._paths, self._owners))
+            else:
+                pairs = [(path, remap[owner]) for path, owner in zip(self._paths, self._owners) if owner in remap]
+            added: List[Tuple[str, int]] = []
+            stale_paths = [os.path.join(self.local_path, entry) for entry in stale]
+            if len(stale_paths) < 2 * self.max_workers:
+                read = [self._read_files(entry) for entry in stale_paths]
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    read = list(executor.map(self._read_files, stale_paths, chunksize=64))
+            for entry, files in zip(stale, read):
+                if files is None:
+                    continue
+                owner = len(entries)
+                entries.append(entry)
+                mtimes.append(current[entry])
+                added.extend((path, owner) for path in files)
+            added.sort()
+            # Two sorted runs, which the sort merges in linear time.
+            pairs.extend(added)
+            pairs.sort()
+            self._paths = [path for path, _ in pairs]
+            self._owners = array("I", [owner for _, owner in pairs])
+            self._entries = entries
+            self._mtimes = mtimes
+            self.reread += len(stale)
+
+        self._key = key
+        self._save()
+
+    def _current(self) -> Tuple[List[str], array, List[str]]:
+        key = self.key()
+        with self._lock:
+            if key != self._key:
+                self._refresh(key)
+            return self._paths, self._owners, self._entries
+
+    def __len__(self) -> int:
+        return len(self._current()[0])
+
+    def _relative(self, path: str, root: str, parents: Dict[str, str]) -> Optional[str]:
+        # pacman -Qo resolves symlinked parent directories, e.g. /bin to
+        # /usr/bin on Arch, so the lookup does the same.
+        full = os.path.join(root, path.lstrip("/"))
+        parent, base = os.path.split(full.rstrip("/"))
+        real_parent = parents.get(parent)
+        if real_parent is None:
+            real_parent = parents[parent] = os.path.realpath(parent)
+        relative = os.path.relpath(os.path.join(real_parent, base), root)
+        if relative in (".", "..") or relative.startswith(".." + os.sep):
+            return None
+        if path.endswith("/") or (os.path.isdir(full) and not os.path.islink(full)):
+            relative += "/"
+        return relative
+
+    def owners(self, paths: Iterable[str]) -> Dict[str, List[str]]:
+        """Map each path to the packages owning it; unowned paths map to []."""
+        indexed, owner_ids, entries = self._current()
+        root = os.path.realpath(self.root)
+        parents: Dict[str, str] = {}
+        result: Dict[str, List[str]] = {}
+        for path in paths:
+            relative = self._relative(path, root, parents)
+            names: List[str] = []
+            if relative is not None:
+                i = bisect.bisect_left(indexed, relative)
+                while i < len(indexed) and indexed[i] == relative:
+                    names.append(entry_package_name(entries[owner_ids[i]]))
+                    i += 1
+            result[path] = sorted(names)
+        return result
+
+    def files(self, name: str) -> List[str]:
+        """Absolute paths of the files and directories of package ``name``."""
+        indexed, owner_ids, entries = self._current()
+        ids = {i for i, entry in enumerate(entries) if entry_package_name(entry) == name}
+        if not ids:
+            return []
+        return [os.path.join(self.root, path) for path, owner in zip(indexed, owner_ids) if owner in ids]
+
+    def unowned(self, directory: str) -> List[str]:
+        """Files and symlinks under ``directory`` no installed package owns."""
+        indexed, _, _ = self._current()
+        root = os.path.realpath(self.root)
+        top = os.path.realpath(os.path.join(root, directory.lstrip("/")))
+        if top != root and not top.startswith(root.rstrip(os.sep) + os.sep):
+            return []
+        unowned: List[str] = []
+        for current, dirs, files in os.walk(top):
+            dirs.sort()
+            relative_dir = os.path.relpath(current, root)
+            for name in sorted(files):
+                relative = name if relative_dir == "." else os.path.join(relative_dir, name)
+                i = bisect.bisect_left(indexed, relative)
+                if i == len(indexed) or indexed[i] != relative:
+                    unowned.append(os.path.join(self.root, relative))
+        return unowned
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._key = None
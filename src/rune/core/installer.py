@@ -1,30 +1,55 @@
 import os
 import subprocess
 import shutil
-from typing import List, Callable, Optional, TYPE_CHECKING
+from typing import Dict, List, Callable, Optional, TYPE_CHECKING
+
+from rune.core.pacman import build_plan
+from rune.core.resolver import BuildPlan
+from rune.core.scheduler import BUILD_MEMORY, DEFAULT_JOBS, BuildScheduler
 
 if TYPE_CHECKING:
-    from rune.api.aur import AURPackage
+    from rune.api.aur import AURClient, AURPackage
+    from rune.core.backend import Backend
 
 
 class InstallationError(Exception):
     pass
 
 
+def built_package_name(path: str) -> str:
+    """Package name of a ``<name>-<pkgver>-<pkgrel>-<arch>.pkg.tar.*`` file."""
+    return os.path.basename(path).split(".pkg.tar", 1)[0].rsplit("-", 3)[0]
+
+
 class PackageInstaller:
-    def __init__(self, build_dir: Optional[str] = None):
+    def __init__(
+        self,
+        build_dir: Optional[str] = None,
+        aur_client: Optional["AURClient"] = None,
+        backend: Optional["Backend"] = None,
+        jobs: int = DEFAULT_JOBS,
+        memory_budget: Optional[int] = None,
+        build_memory: int = BUILD_MEMORY,
+    ):
         self.build_dir = build_dir or os.path.join(
             os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
             "runa"
         )
+        self.aur_client = aur_client
+        self.backend = backend
+        # Concurrent builds; see BuildScheduler. Without a memory budget
+        # the memory available when the builds start is used.
+        self.jobs = jobs
+        self.memory_budget = memory_budget
+        self.build_memory = build_memory
         os.makedirs(self.build_dir, exist_ok=True)
     
     def _run_command(
         self, 
         cmd: List[str], 
-        cwd: str = None,
-        password: str = None,
-        log_callback: Callable[[str], None] = None
+        cwd: Optional[str] = None,
+        password: Optional[str] = None,
+        log_callback: Optional[Callable[[str], None]] = None
     ) -> int:
         env = os.environ.copy()
         
@@ -70,7 +95,7 @@ class PackageInstaller:
     def clone_package(
         self, 
         package: "AURPackage", 
-        log_callback: Callable[[str], None] = None
+        log_callback: Optional[Callable[[str], None]] = None
     ) -> str:
         """
         Clone an AUR package repository
@@ -78,12 +103,12 @@ class PackageInstaller:
         Returns:
             Path to the cloned package directory
         """
-        pkg_dir = os.path.join(self.build_dir, package.name)
+        pkg_dir = os.path.join(self.build_dir, package.package_base)
         if os.path.exists(pkg_dir):
             shutil.rmtree(pkg_dir)
         
         if log_callback:
-            log_callback(f"Cloning {package.name}...")
+            log_callback(f"Cloning {package.package_base}...")
         
         ret = self._run_command(
             ["git", "clone", "--depth=1", package.git_clone_url, pkg_dir],
@@ -96,7 +121,7 @@ class PackageInstaller:
         return pkg_dir
     
     def get_dependencies(self, pkg_dir: str) -> List[str]:
-        deps = []
+        deps: List[str] = []
         pkgbuild = os.path.join(pkg_dir, "PKGBUILD")
         
         if not os.path.exists(pkgbuild):
@@ -125,8 +150,9 @@ class PackageInstaller:
     def install_dependencies(
         self,
         deps: List[str],
-        password: str,
-        log_callback: Callable[[str], None] = None
+        password: Optional[str],
+        log_callback: Optional[Callable[[str], None]] = None,
+        strict: bool = False,
     ) -> None:
         if not deps:
             return
@@ -134,25 +160,30 @@ class PackageInstaller:
         if log_callback:
             log_callback(f"Installing dependencies: {', '.join(deps)}")
         
-        cmd = ["sudo", "pacman", "-S", "--needed", "--noconfirm"] + deps
+        cmd = ["sudo", "pacman", "-S", "--needed", "--asdeps", "--noconfirm"] + deps
         ret = self._run_command(
             cmd,
             password=password,
             log_callback=log_callback
         )
         
-        if ret != 0 and log_callback:
-            log_callback("Note: Some dependencies may need to be installed from AUR first")
+        if ret != 0:
+            if strict:
+                raise InstallationError("pacman could not install the repository dependencies")
+            if log_callback:
+                log_callback("Note: Some dependencies may need to be installed from AUR first")
     
     def build_package(
         self, 
         pkg_dir: str,
-        password: str = None,
-        log_callback: Callable[[str], None] = None
+        password: Optional[str] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        install_depends: bool = True,
     ) -> List[str]:
-        deps = self.get_dependencies(pkg_dir)
-        if deps:
-            self.install_dependencies(deps, password, log_callback)
+        if install_depends:
+            deps = self.get_dependencies(pkg_dir)
+            if deps:
+                self.install_dependencies(deps, password, log_callback)
         
         if log_callback:
             log_callback("Building package with makepkg...")
@@ -180,12 +211,13 @@ class PackageInstaller:
         self, 
         pkg_files: List[str],
         password: str,
-        log_callback: Callable[[str], None] = None
+        log_callback: Optional[Callable[[str], None]] = None,
+        as_deps: bool = False,
     ) -> None:
         if log_callback:
             log_callback("Installing packages with pacman...")
         
-        cmd = ["sudo", "pacman", "-U", "--noconfirm"] + pkg_files
+        cmd = ["sudo", "pacman", "-U", "--noconfirm"] + (["--asdeps"] if as_deps else []) + pkg_files
         ret = self._run_command(
             cmd,
             password=password,
@@ -195,62 +227,129 @@ class PackageInstaller:
         if ret != 0:
             raise InstallationError("pacman installation failed")
     
-    def install_aur_package(
-        self, 
+    def resolve(
+        self,
+        packages: List["AURPackage"],
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> BuildPlan:
+        """Resolve the dependencies of ``packages`` without cloning anything."""
+        if log_callback:
+            log_callback("Resolving dependencies...")
+        try:
+            plan = build_plan(packages, client=self.aur_client, backend=self.backend)
+        except (ConnectionError, ValueError, RuntimeError, OSError) as e:
+            raise InstallationError(f"Dependency resolution failed: {e}")
+        if log_callback:
+            if plan.repo_depends:
+                log_callback(f"Repository dependencies: {', '.join(plan.repo_depends)}")
+            if plan.dependencies:
+                log_callback(f"AUR dependencies: {', '.join(plan.dependencies)}")
+            log_callback(f"Build order: {', '.join(pkg.name for pkg in plan.order)}")
+        return plan
+
+    def _build(
+        self,
         package: "AURPackage",
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> List[str]:
+        # With several builds at once, their output is told apart by
+        # package base.
+        log = log_callback
+        if log_callback is not None and self.jobs > 1:
+            base, emit = package.package_base, log_callback
+            log = lambda line: emit(f"[{base}] {line}")
+        try:
+            pkg_dir = self.clone_package(package, log)
+            return self.build_package(pkg_dir, log_callback=log, install_depends=False)
+        except InstallationError:
+            raise
+        except Exception as e:
+            raise InstallationError(f"Installation failed: {e}")
+
+    def _install(
+        self,
+        package: "AURPackage",
+        pkg_files: List[str],
         password: str,
-        log_callback: Callable[[str], None] = None
+        log_callback: Optional[Callable[[str], None]],
+        as_deps: bool,
     ) -> None:
+        # A split package base builds all its packages; only this one is
+        # installed.
+        own = [path for path in pkg_files if built_package_name(path) == package.name]
+        if log_callback:
+            log_callback(f"\n{'='*50}")
+            log_callback(f"Installing {package.name}")
+            log_callback(f"{'='*50}\n")
         try:
-            pkg_dir = self.clone_package(package, log_callback)
-            
-            pkg_files = self.build_package(pkg_dir, password, log_callback)
-            
-            self.install_packages(pkg_files, password, log_callback)
-            
-            if log_callback:
-                log_callback(f"Successfully installed {package.name}!")
-                
+            self.install_packages(own or pkg_files, password, log_callback, as_deps=as_deps)
         except InstallationError:
             raise
         except Exception as e:
             raise InstallationError(f"Installation failed: {e}")
+        if log_callback:
+            log_callback(f"Successfully installed {package.name}!")
+
+    def install_aur_package(
+        self, 
+        package: "AURPackage",
+        password: str,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> None:
+        results = self.install_multiple([package], password, log_callback)
+        for name, error in results["failed"]:
+            raise InstallationError(error if name == package.name else f"{name}: {error}")
     
     def install_multiple(
         self,
         packages: List["AURPackage"],
         password: str,
-        log_callback: Callable[[str], None] = None,
-        progress_callback: Callable[[int, int], None] = None
+        log_callback: Optional[Callable[[str], None]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> dict:
-        results = {"success": [], "failed": []}
-        total = len(packages)
-        
-        for i, package in enumerate(packages):
-            if progress_callback:
-                progress_callback(i + 1, total)
-            
-            try:
-                if log_callback:
-                    log_callback(f"\n{'='*50}")
-                    log_callback(f"Installing {package.name} ({i+1}/{total})")
-                    log_callback(f"{'='*50}\n")
-                
-                self.install_aur_package(package, password, log_callback)
-                results["success"].append(package.name)
-                
-            except InstallationError as e:
+        """
+        Install AUR packages and their AUR dependencies. Dependencies are
+        resolved first; nothing is cloned unless every one is satisfiable.
+        Independent packages are then built concurrently by BuildScheduler.
+        """
+        results: Dict[str, list] = {"success": [], "failed": []}
+        try:
+            plan = self.resolve(packages, log_callback)
+            if not plan.ok:
+                problems = plan.problems()
                 if log_callback:
-                    log_callback(f"ERROR: {e}")
-                results["failed"].append((package.name, str(e)))
-        
+                    for problem in problems:
+                        log_callback(f"ERROR: {problem}")
+                raise InstallationError("; ".join(problems))
+            self.install_dependencies(plan.repo_depends, password, log_callback, strict=True)
+        except InstallationError as e:
+            if log_callback:
+                log_callback(f"ERROR: {e}")
+            results["failed"] = [(package.name, str(e)) for package in packages]
+            return results
+
+        targets = set(plan.targets)
+        scheduler = BuildScheduler(
+            plan,
+            build=lambda package: self._build(package, log_callback),
+            install=lambda package, pkg_files: self._install(
+                package, pkg_files, password, log_callback, package.name not in targets
+            ),
+            jobs=self.jobs,
+            memory_budget=self.memory_budget,
+            build_memory=self.build_memory,
+        )
+        results = scheduler.run(progress_callback)
+        if log_callback:
+            for name, error in results["failed"]:
+                log_callback(f"ERROR: {name}: {error}")
         return results
     
     def remove_packages(
         self,
         package_names: List[str],
         password: str,
-        log_callback: Callable[[str], None] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
     ) -> None:
         if not package_names:
             return
@@ -269,7 +368,7 @@ class PackageInstaller:
         self,
         package_names: List[str],
         password: str,
-        log_callback: Callable[[str], None] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
     ) -> None:
         if not package_names:
             return
@@ -297,7 +396,7 @@ class PackageInstaller:
     def install_yay(
         self,
         password: str,
-        log_callback: Callable[[str], None] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
     ) -> bool:
         if shutil.which("yay") is not None:
             return True
@@ -317,12 +416,17 @@ class PackageInstaller:
 
         return shutil.which("yay") is not None
     
-    def cleanup(self, package_name: str = None) -> None:
+    def cleanup(self, package_name: Optional[str] = None) -> None:
         if package_name:
             pkg_dir = os.path.join(self.build_dir, package_name)
             if os.path.exists(pkg_dir):
                 shutil.rmtree(pkg_dir)
-        else:
-            if os.path.exists(self.build_dir):
-                shutil.rmtree(self.build_dir)
-                os.makedirs(self.build_dir, exist_ok=True)
+            return
+        if not os.path.isdir(self.build_dir):
+            return
+        # The response cache, AUR index, rate-limit state and other stores
+        # share this directory under dot names, which no AUR package base
+        # can have; only package build directories are removed.
+        for entry in os.scandir(self.build_dir):
+            if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
@@ -0,0 +1,210 @@
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+DB_PATH = "/var/lib/pacman"
+
+# Below this size a plain read is cheaper than setting up a mapping.
+MMAP_THRESHOLD = 64 * 1024
+
+REASON_EXPLICIT = 0
+REASON_DEPEND = 1
+
+_DEPEND_NAME = re.compile(r"[<>=:]")
+
+
+def depend_name(depend: str) -> str:
+    """Package name of a dependency, provide or optdepend entry."""
+    return _DEPEND_NAME.split(depend, 1)[0].strip()
+
+
+@dataclass
+class LocalPackage:
+    name: str
+    version: str
+    base: str = ""
+    description: str = ""
+    url: str = ""
+    arch: str = ""
+    build_date: int = 0
+    install_date: int = 0
+    packager: str = ""
+    size: int = 0
+    reason: int = REASON_EXPLICIT
+    licenses: List[str] = field(default_factory=list)
+    groups: List[str] = field(default_factory=list)
+    validation: List[str] = field(default_factory=list)
+    depends: List[str] = field(default_factory=list)
+    optdepends: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+    provides: List[str] = field(default_factory=list)
+    replaces: List[str] = field(default_factory=list)
+
+    @property
+    def explicit(self) -> bool:
+        return self.reason == REASON_EXPLICIT
+
+
+_SCALAR_FIELDS = {
+    "NAME": "name",
+    "VERSION": "version",
+    "BASE": "base",
+    "DESC": "description",
+    "URL": "url",
+    "ARCH": "arch",
+    "PACKAGER": "packager",
+}
+_INT_FIELDS = {
+    "BUILDDATE": "build_date",
+    "INSTALLDATE": "install_date",
+    "SIZE": "size",
+    "REASON": "reason",
+}
+_LIST_FIELDS = {
+    "LICENSE": "licenses",
+    "GROUPS": "groups",
+    "VALIDATION": "validation",
+    "DEPENDS": "depends",
+    "OPTDEPENDS": "optdepends",
+    "CONFLICTS": "conflicts",
+    "PROVIDES": "provides",
+    "REPLACES": "replaces",
+}
+
+
+def parse_sections(text: str, values: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+    """Split a pacman database file into its ``%KEY%`` sections."""
+    if values is None:
+        values = {}
+    current: Optional[List[str]] = None
+    for line in text.split("\n"):
+        if line.startswith("%") and line.endswith("%") and len(line) > 2:
+            current = values.setdefault(line[1:-1], [])
+        elif not line:
+            current = None
+        elif current is not None:
+            current.append(line)
+    return values
+
+
+def parse_desc(text: str) -> Optional[LocalPackage]:
+    """Parse the contents of a local database ``desc`` file."""
+    values = parse_sections(text)
+    if not values.get("NAME") or not values.get("VERSION"):
+        return None
+    kwargs: Dict[str, Any] = {}
+    for key, attr in _SCALAR_FIELDS.items():
+        if values.get(key):
+            kwargs[attr] = values[key][0]
+    for key, attr in _INT_FIELDS.items():
+        if values.get(key):
+            try:
+                kwargs[attr] = int(values[key][0])
+            except ValueError:
+                pass
+    for key, attr in _LIST_FIELDS.items():
+        if values.get(key):
+            kwargs[attr] = values[key]
+    return LocalPackage(**kwargs)
+
+
+def read_file(path: str) -> str:
+    """Contents of a database file; large ones are read through mmap."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                data = mapped[:]
+        else:
+            data = f.read()
+    return data.decode("utf-8", errors="replace")
+
+
+class LocalDB:
+    """
+    Reader for the pacman local database (``<dbpath>/local/*/desc``).
+
+    ``dbpath`` defaults to /var/lib/pacman; point it at a copy or fixture
+    tree to read another system's database.
+    """
+
+    def __init__(self, dbpath: str = DB_PATH, max_workers: int = 8):
+        self.dbpath = dbpath
+        self.max_workers = max(1, int(max_workers))
+
+    @property
+    def local_path(self) -> str:
+        return os.path.join(self.dbpath, "local")
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.local_path)
+
+    def entries(self) -> List[str]:
+        """Paths of the package directories in the local database."""
+        with os.scandir(self.local_path) as it:
+            return [entry.path for entry in it if entry.is_dir()]
+
+    def read_entry(self, entry: str) -> Optional[LocalPackage]:
+        try:
+            return parse_desc(read_file(os.path.join(entry, "desc")))
+        except OSError:
+            # Removed while we were reading, or a half-written entry.
+            return None
+
+    def read_entries(self, entries: List[str]) -> List[Optional[LocalPackage]]:
+        if len(entries) < 2 * self.max_workers:
+            return [self.read_entry(entry) for entry in entries]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.read_entry, entries, chunksize=64))
+
+    def packages(self) -> List[LocalPackage]:
+        """All installed packages, sorted by name like ``pacman -Q``."""
+        packages = [pkg for pkg in self.read_entries(self.entries()) if pkg is not None]
+        packages.sort(key=lambda p: p.name)
+        return packages
+
+    def package(self, name: str) -> Optional[LocalPackage]:
+        for pkg in self.packages():
+            if pkg.name == name:
+                return pkg
+        return None
+
+
+def required_names(packages: Iterable[LocalPackage], optional: bool = True) -> Set[str]:
+    """
+    Names of installed packages some other installed package depends on,
+    directly or through a provide. Version constraints are not checked.
+    """
+    packages = list(packages)
+    providers: Dict[str, List[str]] = {}
+    for pkg in packages:
+        providers.setdefault(pkg.name, []).append(pkg.name)
+        for provide in pkg.provides:
+            providers.setdefault(depend_name(provide), []).append(pkg.name)
+
+    required: Set[str] = set()
+    for pkg in packages:
+        wanted = list(pkg.depends)
+        if optional:
+            wanted.extend(pkg.optdepends)
+        for depend in wanted:
+            for provider in providers.get(depend_name(depend), ()):
+                if provider != pkg.name:
+                    required.add(provider)
+    return required
+
+
+def explicit_packages(packages: Iterable[LocalPackage]) -> List[LocalPackage]:
+    """Same selection as ``pacman -Qe``."""
+    return [pkg for pkg in packages if pkg.explicit]
+
+
+def orphan_packages(packages: Iterable[LocalPackage]) -> List[LocalPackage]:
+    """Same selection as ``pacman -Qdt``."""
+    packages = list(packages)
+    required = required_names(packages)
+    return [pkg for pkg in packages if not pkg.explicit and pkg.name not in required]
@@ -1,35 +1,54 @@
-import subprocess
+import asyncio
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, List, Optional
 
-from rune.api.aur import AURClient, AURPackage
+from rune.api.aio import AsyncAURClient
+from rune.api.aur import AUR_HOST, AURClient, AURPackage
+from rune.api.cache import ResponseCache
+from rune.api.popular import PopularPackages
+from rune.api.ratelimit import RateLimiter
+from rune.core.analytics import InstalledSizes
+from rune.core.backend import (
+    AlpmBackend,
+    Backend,
+    BackendUnavailable,
+    LocalDBBackend,
+    SubprocessBackend,
+    Update,
+)
+from rune.core.depgraph import DependencyGraph, RemovalImpact
+from rune.core.fileindex import FileIndex
+from rune.core.localdb import LocalPackage
+from rune.core.resolver import BuildPlan, DependencyResolver
+from rune.core.snapshot import InstalledSnapshot
+from rune.core.syncdb import SyncDB
+from rune.core.vercmp import vercmp_many
 
 
-def _run_pacman(args: List[str]) -> str:
-    proc = subprocess.run([
-        "pacman",
-        *args,
-    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if proc.returncode != 0:
-        msg = proc.stderr.strip() or "pacman command failed"
-        raise RuntimeError(msg)
-    return proc.stdout
+_aur_client: Optional[AURClient] = None
+_sync_db: Optional[SyncDB] = None
+_snapshot: Optional[InstalledSnapshot] = None
+_backends: Optional[List[Backend]] = None
+_graph: Optional[DependencyGraph] = None
+_file_index: Optional[FileIndex] = None
 
 
-def _vercmp(ver1: str, ver2: str) -> int:
+def _default_aur_client() -> AURClient:
+    global _aur_client
+    if _aur_client is None:
+        _aur_client = AURClient(
+            cache=ResponseCache(),
+            popular=PopularPackages(),
+            rate_limiter=RateLimiter(AUR_HOST),
+        )
+    return _aur_client
 
-    proc = subprocess.run(
-        ["vercmp", ver1, ver2],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    out = proc.stdout.strip()
-    if proc.returncode == 0 and out in {"-1", "0", "1"}:
-        return int(out)
-    if ver1 == ver2:
-        return 0
-    return 1 if ver1 > ver2 else -1
+
+def _default_sync_db() -> SyncDB:
+    global _sync_db
+    if _sync_db is None:
+        _sync_db = SyncDB()
+    return _sync_db
 
 
 @dataclass
@@ -39,123 +58,228 @@ class RepoPackage:
     description: str
     repo: str
     local_version: str
+    download_size: int = 0
+    installed_size_delta: int = 0
+    installed_size: int = 0
+    install_date: int = 0
+    explicit: bool = True
+    size_with_dependencies: int = 0
 
 
-def list_installed_aur() -> List[AURPackage]:
-    output = _run_pacman(["-Qm"])
-    local_versions = {}
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) >= 2:
-            name = parts[0]
-            version = parts[1]
-            local_versions[name] = version
-    if not local_versions:
-        return []
-    client = AURClient()
-    packages = client.info(list(local_versions.keys()))
-    for pkg in packages:
-        setattr(pkg, "local_version", local_versions.get(pkg.name, ""))
-    return packages
+def _default_local_db() -> InstalledSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = InstalledSnapshot()
+    return _snapshot
 
 
-def list_aur_updates() -> List[AURPackage]:
-    installed = list_installed_aur()
-    updates = []
-    for pkg in installed:
-        local = getattr(pkg, "local_version", pkg.version)
-        aur_ver = pkg.version
+def default_backends() -> List[Backend]:
+    """
+    Backends in the order they are tried: libalpm when pyalpm is
+    installed, the database files when they can be read, then the pacman
+    command line.
+    """
+    global _backends
+    if _backends is None:
+        backends: List[Backend] = []
         try:
-            if _vercmp(aur_ver, local) > 0:
-                updates.append(pkg)
-        except Exception:
-            continue
-    return updates
+            backends.append(AlpmBackend())
+        except BackendUnavailable:
+            pass
+        backends.append(LocalDBBackend(_default_local_db(), _default_sync_db()))
+        backends.append(SubprocessBackend())
+        _backends = backends
+    return _backends
 
 
-def list_core_extra_updates() -> List[RepoPackage]:
-    output = _run_pacman(["-Qu"])
-    updates: List[RepoPackage] = []
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) < 4 or parts[2] != "->":
+def _query(backend: Optional[Backend], method: str, *args):
+    if backend is not None:
+        return getattr(backend, method)(*args)
+    backends = default_backends()
+    for candidate in backends[:-1]:
+        try:
+            return getattr(candidate, method)(*args)
+        except BackendUnavailable:
             continue
-        name = parts[0]
-        local_version = parts[1]
-        repo_version = parts[3]
-        info = _run_pacman(["-Qi", name])
-        repo = ""
-        desc = ""
-        for info_line in info.splitlines():
-            if ":" in info_line:
-                key, value = info_line.split(":", 1)
-                k = key.strip().lower()
-                if "repository" in k:
-                    repo = value.strip()
-                elif "description" in k:
-                    desc = value.strip()
-        updates.append(RepoPackage(
-            name=name,
-            version=repo_version,
-            description=desc,
-            repo=repo,
-            local_version=local_version,
-        ))
-    return updates
-
-
-def _get_repo_package_info(name: str, version: str) -> RepoPackage:
-    info = _run_pacman(["-Qi", name])
-    repo = ""
-    desc = ""
-    for info_line in info.splitlines():
-        if ":" in info_line:
-            key, value = info_line.split(":", 1)
-            k = key.strip().lower()
-            if "repository" in k:
-                repo = value.strip()
-            elif "description" in k:
-                desc = value.strip()
+    return getattr(backends[-1], method)(*args)
+
+
+def installed_packages_changed() -> bool:
+    """True when pacman changed the local database since it was last read."""
+    db = _default_local_db()
+    return db.exists() and db.changed()
+
+
+def _from_local(pkg: LocalPackage) -> RepoPackage:
+    # The local database does not record the repository, and neither does
+    # pacman -Qi, so repo stays empty either way.
     return RepoPackage(
-        name=name,
-        version=version,
-        description=desc,
-        repo=repo,
-        local_version=version,
+        name=pkg.name,
+        version=pkg.version,
+        description=pkg.description,
+        repo="",
+        local_version=pkg.version,
+        installed_size=pkg.size,
+        install_date=pkg.install_date,
+        explicit=pkg.explicit,
     )
 
 
-def list_all_installed_packages() -> List[RepoPackage]:
-    output = _run_pacman(["-Q"])
-    packages: List[RepoPackage] = []
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) >= 2:
-            name = parts[0]
-            version = parts[1]
-            packages.append(_get_repo_package_info(name, version))
-    return packages
+def _from_update(update: Update) -> RepoPackage:
+    pkg, sync = update
+    return RepoPackage(
+        name=pkg.name,
+        version=sync.version,
+        description=pkg.description,
+        repo=sync.repo,
+        local_version=pkg.version,
+        download_size=sync.download_size,
+        installed_size_delta=sync.installed_size - pkg.size if sync.installed_size else 0,
+    )
 
 
-def list_explicit_installed_packages() -> List[RepoPackage]:
-    output = _run_pacman(["-Qe"])
-    packages: List[RepoPackage] = []
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) >= 2:
-            name = parts[0]
-            version = parts[1]
-            packages.append(_get_repo_package_info(name, version))
+def _with_local_versions(packages: List[AURPackage], local_versions: Dict[str, str]) -> List[AURPackage]:
+    for pkg in packages:
+        pkg.local_version = local_versions.get(pkg.name, "")
     return packages
 
 
-def list_orphan_packages() -> List[RepoPackage]:
-    output = _run_pacman(["-Qdt"])
-    packages: List[RepoPackage] = []
-    for line in output.splitlines():
-        parts = line.split()
-        if len(parts) >= 2:
-            name = parts[0]
-            version = parts[1]
-            packages.append(_get_repo_package_info(name, version))
-    return packages
+def _newer(installed: List[AURPackage]) -> List[AURPackage]:
+    results = vercmp_many((pkg.version, pkg.local_version or pkg.version) for pkg in installed)
+    return [pkg for pkg, result in zip(installed, results) if result > 0]
+
+
+def list_installed_aur(
+    client: Optional[AURClient] = None, backend: Optional[Backend] = None
+) -> List[AURPackage]:
+    local_versions = {pkg.name: pkg.version for pkg in _query(backend, "foreign")}
+    if not local_versions:
+        return []
+    client = client or _default_aur_client()
+    return _with_local_versions(client.info(list(local_versions.keys())), local_versions)
+
+
+def list_aur_updates(
+    client: Optional[AURClient] = None, backend: Optional[Backend] = None
+) -> List[AURPackage]:
+    return _newer(list_installed_aur(client, backend))
+
+
+async def list_installed_aur_async(
+    client: AsyncAURClient, backend: Optional[Backend] = None
+) -> List[AURPackage]:
+    """list_installed_aur on an event loop; the backend query runs in the
+    loop's executor."""
+    loop = asyncio.get_running_loop()
+    foreign = await loop.run_in_executor(None, _query, backend, "foreign")
+    local_versions = {pkg.name: pkg.version for pkg in foreign}
+    if not local_versions:
+        return []
+    return _with_local_versions(await client.info(list(local_versions.keys())), local_versions)
+
+
+async def list_aur_updates_async(
+    client: AsyncAURClient, backend: Optional[Backend] = None
+) -> List[AURPackage]:
+    return _newer(await list_installed_aur_async(client, backend))
+
+
+def list_core_extra_updates(backend: Optional[Backend] = None) -> List[RepoPackage]:
+    return [_from_update(update) for update in _query(backend, "updates")]
+
+
+def list_all_installed_packages(backend: Optional[Backend] = None) -> List[RepoPackage]:
+    return [_from_local(pkg) for pkg in _query(backend, "installed")]
+
+
+def list_explicit_installed_packages(backend: Optional[Backend] = None) -> List[RepoPackage]:
+    return [_from_local(pkg) for pkg in _query(backend, "explicit")]
+
+
+def list_orphan_packages(backend: Optional[Backend] = None, recursive: bool = False) -> List[RepoPackage]:
+    if not recursive:
+        return [_from_local(pkg) for pkg in _query(backend, "orphans")]
+    graph = dependency_graph(backend)
+    return [_from_local(graph.packages[graph.ids[name]]) for name in graph.orphans(recursive=True)]
+
+
+def package_info(name: str, backend: Optional[Backend] = None) -> Optional[LocalPackage]:
+    """Full local database record of an installed package."""
+    package: Optional[LocalPackage] = _query(backend, "package", name)
+    return package
+
+
+def dependency_graph(backend: Optional[Backend] = None) -> DependencyGraph:
+    """
+    Dependency graph of the installed packages, rebuilt only when the
+    packages returned by the backend change.
+    """
+    global _graph
+    packages = _query(backend, "installed")
+    graph = _graph
+    if (
+        graph is not None
+        and len(graph.packages) == len(packages)
+        and all(a is b for a, b in zip(graph.packages, packages))
+    ):
+        return graph
+    graph = DependencyGraph(packages)
+    _graph = graph
+    return graph
+
+
+def removal_impact(names: List[str], backend: Optional[Backend] = None) -> RemovalImpact:
+    """What ``pacman -Rns <names>`` would remove and break."""
+    return dependency_graph(backend).removal_impact(names)
+
+
+def build_plan(
+    packages: List[AURPackage],
+    client: Optional[AURClient] = None,
+    backend: Optional[Backend] = None,
+) -> BuildPlan:
+    """
+    Dependencies and build order for installing the AUR ``packages``,
+    resolved against the installed and repository packages.
+    """
+    installed = _query(backend, "installed")
+    try:
+        repo = _query(backend, "sync_packages")
+    except (RuntimeError, OSError):
+        # Without the sync databases, names the AUR does not have are
+        # left for pacman to find.
+        repo = None
+    return DependencyResolver(client or _default_aur_client(), installed, repo).resolve(packages)
+
+
+def installed_sizes(backend: Optional[Backend] = None) -> InstalledSizes:
+    """Size, date, reason and repository columns of the installed packages."""
+    graph = dependency_graph(backend)
+    try:
+        repos = _query(backend, "repos")
+    except (RuntimeError, OSError):
+        # Without readable sync databases every package counts as foreign.
+        repos = {}
+    return InstalledSizes(graph.packages, repos, graph)
+
+
+def _default_file_index() -> FileIndex:
+    global _file_index
+    if _file_index is None:
+        _file_index = FileIndex()
+    return _file_index
+
+
+def package_owners(paths: Iterable[str], index: Optional[FileIndex] = None) -> Dict[str, List[str]]:
+    """Packages owning each path, like ``pacman -Qo`` for all of them at once."""
+    return (index or _default_file_index()).owners(paths)
+
+
+def package_files(name: str, index: Optional[FileIndex] = None) -> List[str]:
+    """Files and directories installed by ``name``, like ``pacman -Qlq``."""
+    return (index or _default_file_index()).files(name)
+
+
+def unowned_files(directory: str, index: Optional[FileIndex] = None) -> List[str]:
+    """Files under ``directory`` that no installed package owns."""
+    return (index or _default_file_index()).unowned(directory)
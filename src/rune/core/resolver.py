@@ -0,0 +1,319 @@
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from rune.api.aur import AURClient, AURPackage
+from rune.core.localdb import LocalPackage
+from rune.core.syncdb import SyncPackage
+from rune.core.vercmp import vercmp
+
+
+_CONSTRAINT = re.compile(r"^([^<>=]+)(<=|>=|<|>|=)(.*)$")
+
+_COMPARISONS: Dict[str, Callable[[int], bool]] = {
+    "<": lambda r: r < 0,
+    "<=": lambda r: r <= 0,
+    "=": lambda r: r == 0,
+    ">=": lambda r: r >= 0,
+    ">": lambda r: r > 0,
+}
+
+
+def parse_depend(depend: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Name, operator and version of a dependency such as ``foo>=1.2``."""
+    match = _CONSTRAINT.match(depend.strip())
+    if match is None:
+        return depend.strip(), None, None
+    return match.group(1).strip(), match.group(2), match.group(3).strip()
+
+
+def version_satisfies(version: str, op: Optional[str], required: Optional[str]) -> bool:
+    if op is None:
+        return True
+    return _COMPARISONS[op](vercmp(version, required or ""))
+
+
+class Providers:
+    """
+    Which packages satisfy a dependency, by name or through ``provides``,
+    following pacman's rules: a versioned dependency is only satisfied by
+    a provide that carries a matching version.
+    """
+
+    def __init__(self):
+        # Dependency name -> (package, version it provides or None).
+        self._by_name: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+
+    def add(self, name: str, version: str, provides: Iterable[str] = ()) -> None:
+        self._by_name.setdefault(name, []).append((name, version))
+        for provide in provides:
+            provided, _, provided_version = parse_depend(provide)
+            self._by_name.setdefault(provided, []).append((name, provided_version or None))
+
+    def all(self, depend: str) -> List[str]:
+        """Every package satisfying ``depend``, the one with its name first."""
+        name, op, required = parse_depend(depend)
+        found: List[str] = []
+        for package, version in self._by_name.get(name, ()):
+            if package in found:
+                continue
+            if op is None or (version is not None and version_satisfies(version, op, required)):
+                found.append(package)
+        found.sort(key=lambda package: package != name)
+        return found
+
+    def find(self, depend: str) -> Optional[str]:
+        found = self.all(depend)
+        return found[0] if found else None
+
+
+@dataclass
+class BuildPlan:
+    targets: List[str]
+    # AUR packages to build, each after the AUR packages it needs.
+    order: List[AURPackage] = field(default_factory=list)
+    # AUR package -> AUR packages that must be installed before its build.
+    edges: Dict[str, List[str]] = field(default_factory=dict)
+    # Repository packages to install with ``pacman -S`` before any build.
+    repo_depends: List[str] = field(default_factory=list)
+    # Installed packages that already satisfy a dependency.
+    installed: List[str] = field(default_factory=list)
+    # Unsatisfiable dependency -> packages that need it.
+    missing: Dict[str, List[str]] = field(default_factory=dict)
+    # AUR lookups that failed -> error message.
+    lookup_failed: Dict[str, str] = field(default_factory=dict)
+    cycles: List[List[str]] = field(default_factory=list)
+    # (package, conflicting package) pairs.
+    conflicts: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.lookup_failed or self.cycles or self.conflicts)
+
+    @property
+    def dependencies(self) -> List[str]:
+        """AUR packages in the plan only because a target needs them."""
+        targets = set(self.targets)
+        return [pkg.name for pkg in self.order if pkg.name not in targets]
+
+    def problems(self) -> List[str]:
+        messages = [
+            f"{depend} (required by {', '.join(names)}) is not satisfied by any repository or AUR package"
+            for depend, names in sorted(self.missing.items())
+        ]
+        messages += [f"could not look up {name} in the AUR: {error}" for name, error in sorted(self.lookup_failed.items())]
+        messages += [f"dependency cycle: {' -> '.join(cycle + cycle[:1])}" for cycle in self.cycles]
+        messages += [f"{a} conflicts with {b}" for a, b in self.conflicts]
+        return messages
+
+
+def _build_depends(pkg: AURPackage) -> List[str]:
+    return list(dict.fromkeys([*pkg.depends, *pkg.make_depends, *pkg.check_depends]))
+
+
+class DependencyResolver:
+    """
+    Resolves AUR packages to a build plan before anything is cloned.
+
+    Every ``depends``, ``makedepends`` and ``checkdepends`` entry is
+    satisfied by an installed package, a repository package or an AUR
+    package, in that order. AUR packages are looked up one dependency
+    level at a time with a single batched info call per level, then
+    ordered so each is built after the AUR packages it needs. Without a
+    repository index, names the AUR does not know are left to pacman.
+    """
+
+    def __init__(
+        self,
+        client: AURClient,
+        installed: Iterable[LocalPackage],
+        repo: Optional[Dict[str, SyncPackage]] = None,
+    ):
+        self.client = client
+        self.installed_packages = {pkg.name: pkg for pkg in installed}
+        self.installed = Providers()
+        for pkg in self.installed_packages.values():
+            self.installed.add(pkg.name, pkg.version, pkg.provides)
+        self.repo: Optional[Providers] = None
+        if repo is not None:
+            self.repo = Providers()
+            for sync_pkg in repo.values():
+                self.repo.add(sync_pkg.name, sync_pkg.version, sync_pkg.provides)
+
+    def _search_provider(self, name: str) -> Optional[str]:
+        # aurweb search results carry no provides, so the most popular
+        # match is fetched and checked with the next info call.
+        try:
+            candidates = self.client.search(name, by="provides")
+        except (ConnectionError, ValueError):
+            return None
+        if any(pkg.name == name for pkg in candidates):
+            return name
+        return candidates[0].name if candidates else None
+
+    def _lookup(self, names: List[str], plan: BuildPlan) -> Dict[str, AURPackage]:
+        """AUR packages for ``names``, by the name they were asked for."""
+        result = self.client.info(names)
+        plan.lookup_failed.update(result.errors)
+        found = {pkg.name: pkg for pkg in result}
+        providers: Dict[str, str] = {}
+        for name in names:
+            if name not in found and name not in result.errors:
+                provider = self._search_provider(name)
+                if provider is not None:
+                    providers[name] = provider
+        if providers:
+            extra = self.client.info(sorted(set(providers.values())))
+            plan.lookup_failed.update(extra.errors)
+            by_name = {pkg.name: pkg for pkg in extra}
+            for name, provider in providers.items():
+                if provider in by_name:
+                    found[name] = by_name[provider]
+        return found
+
+    def resolve(self, targets: Sequence[AURPackage]) -> BuildPlan:
+        plan = BuildPlan(targets=list(dict.fromkeys(pkg.name for pkg in targets)))
+        aur: Dict[str, AURPackage] = {}
+        planned = Providers()
+        depends: Dict[str, List[str]] = {}
+        # Dependency -> AUR package satisfying it, or None when something
+        # installed or in a repository does.
+        satisfied: Dict[str, Optional[str]] = {}
+        required_by: Dict[str, List[str]] = {}
+        unsatisfied: Set[str] = set()
+        installed: Set[str] = set()
+        repo: Set[str] = set()
+
+        level = list(targets)
+        while level:
+            for pkg in level:
+                if pkg.name not in aur:
+                    aur[pkg.name] = pkg
+                    planned.add(pkg.name, pkg.version, pkg.provides)
+            # Dependency name -> the dependency strings left for the AUR.
+            pending: Dict[str, List[str]] = {}
+            for pkg in level:
+                if pkg.name in depends:
+                    continue
+                depends[pkg.name] = _build_depends(pkg)
+                for depend in depends[pkg.name]:
+                    required_by.setdefault(depend, []).append(pkg.name)
+                    if depend in satisfied or depend in unsatisfied:
+                        continue
+                    name = parse_depend(depend)[0]
+                    if name in pending:
+                        if depend not in pending[name]:
+                            pending[name].append(depend)
+                        continue
+                    provider = planned.find(depend)
+                    local = self.installed.find(depend)
+                    in_repo = self.repo.find(depend) if self.repo is not None else None
+                    # A package being built by name wins over what is
+                    # installed; otherwise installed packages are kept.
+                    if provider is not None and (provider == name or local is None):
+                        satisfied[depend] = provider
+                    elif local is not None:
+                        installed.add(local)
+                        satisfied[depend] = None
+                    elif in_repo is not None:
+                        repo.add(in_repo)
+                        satisfied[depend] = None
+                    else:
+                        pending[name] = [depend]
+
+            found = self._lookup(sorted(pending), plan) if pending else {}
+            level = []
+            queued: Set[str] = set()
+            for name, depend_strings in pending.items():
+                match = found.get(name)
+                checked = Providers()
+                if match is not None:
+                    checked.add(match.name, match.version, match.provides)
+                for depend in depend_strings:
+                    if match is not None and checked.find(depend) is not None:
+                        satisfied[depend] = match.name
+                        if match.name not in aur and match.name not in queued:
+                            queued.add(match.name)
+                            level.append(match)
+                    elif self.repo is None and name not in plan.lookup_failed and match is None:
+                        repo.add(name)
+                        satisfied[depend] = None
+                    elif name not in plan.lookup_failed:
+                        unsatisfied.add(depend)
+
+        plan.missing = {depend: sorted(set(required_by[depend])) for depend in unsatisfied}
+        plan.installed = sorted(installed)
+        plan.repo_depends = sorted(repo)
+        for name, pkg_depends in depends.items():
+            plan.edges[name] = sorted({
+                provider for provider in map(satisfied.get, pkg_depends)
+                if provider is not None and provider != name
+            })
+        ordered, plan.cycles = _topological_order(plan.edges)
+        plan.order = [aur[name] for name in ordered]
+        plan.conflicts = self._conflicts(aur, planned)
+        return plan
+
+    def _conflicts(self, aur: Dict[str, AURPackage], planned: Providers) -> List[Tuple[str, str]]:
+        pairs: Dict[frozenset, Tuple[str, str]] = {}
+        for pkg in aur.values():
+            for conflict in pkg.conflicts:
+                # The installed version of a package being built is
+                # replaced by it, not in conflict with it.
+                for other in self.installed.all(conflict) + planned.all(conflict):
+                    if other != pkg.name:
+                        pairs.setdefault(frozenset((pkg.name, other)), (pkg.name, other))
+        for local in self.installed_packages.values():
+            if local.name in aur:
+                continue
+            for conflict in local.conflicts:
+                for other in planned.all(conflict):
+                    pairs.setdefault(frozenset((other, local.name)), (other, local.name))
+        return sorted(pairs.values())
+
+
+def _topological_order(edges: Dict[str, List[str]]) -> Tuple[List[str], List[List[str]]]:
+    """Kahn's algorithm, smallest name first among ready packages; the
+    packages left over form the returned cycles."""
+    dependents: Dict[str, List[str]] = {name: [] for name in edges}
+    remaining = {name: len(needs) for name, needs in edges.items()}
+    for name, needs in edges.items():
+        for need in needs:
+            dependents[need].append(name)
+    ready = [name for name, count in remaining.items() if count == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        name = heapq.heappop(ready)
+        order.append(name)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                heapq.heappush(ready, dependent)
+    if len(order) == len(edges):
+        return order, []
+    left = {name for name, count in remaining.items() if count > 0}
+    return order, _cycles({name: [n for n in edges[name] if n in left] for name in sorted(left)})
+
+
+def _cycles(edges: Dict[str, List[str]]) -> List[List[str]]:
+    """One cycle through each strongly connected group of ``edges``."""
+    cycles: List[List[str]] = []
+    seen: Set[str] = set()
+    for start in edges:
+        if start in seen:
+            continue
+        # Every left-over package has an unresolved need, so walking the
+        # first need always ends up on a cycle.
+        path: List[str] = []
+        position: Dict[str, int] = {}
+        node = start
+        while node not in position and node not in seen:
+            position[node] = len(path)
+            path.append(node)
+            node = edges[node][0]
+        seen.update(path)
+        if node in position:
+            cycles.append(path[position[node]:])
+    return cycles
@@ -0,0 +1,148 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set
+
+from rune.api.aur import AURPackage
+from rune.core.resolver import BuildPlan
+
+
+# Each makepkg may run a parallel make of its own (MAKEFLAGS), so only a
+# few builds run side by side by default.
+DEFAULT_JOBS = max(1, min(4, os.cpu_count() or 1))
+
+# Memory set aside per running build when a memory budget applies.
+BUILD_MEMORY = 2 * 1024 ** 3
+
+MEMINFO = "/proc/meminfo"
+
+
+def available_memory(path: str = MEMINFO) -> Optional[int]:
+    """MemAvailable from /proc/meminfo in bytes, or None when unknown."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class BuildScheduler:
+    """
+    Runs the builds of a BuildPlan on a worker pool.
+
+    A package is built once every AUR package it needs is installed, so
+    packages with no path between them in the plan build concurrently, up
+    to ``jobs`` at a time and as many as ``memory_budget`` bytes allow at
+    ``build_memory`` each; one build always runs. ``build`` runs in the
+    pool and returns the built package files. ``install`` runs on the
+    calling thread, one package at a time, as pacman holds a database
+    lock. Split packages of one package base share a single build.
+    """
+
+    def __init__(
+        self,
+        plan: BuildPlan,
+        build: Callable[[AURPackage], List[str]],
+        install: Callable[[AURPackage, List[str]], None],
+        jobs: int = DEFAULT_JOBS,
+        memory_budget: Optional[int] = None,
+        build_memory: int = BUILD_MEMORY,
+    ):
+        self.plan = plan
+        self.build = build
+        self.install = install
+        self.jobs = max(1, int(jobs))
+        self.memory_budget = memory_budget
+        self.build_memory = build_memory
+
+    def _can_start(self, running: int, budget: Optional[int]) -> bool:
+        if running >= self.jobs:
+            return False
+        return running == 0 or budget is None or (running + 1) * self.build_memory <= budget
+
+    def run(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        results: Dict[str, list] = {"success": [], "failed": []}
+        total = len(self.plan.order)
+        budget = self.memory_budget if self.memory_budget is not None else available_memory()
+        waiting: List[AURPackage] = list(self.plan.order)
+        installed: Set[str] = set()
+        failed: Set[str] = set()
+        built: Dict[str, List[str]] = {}
+        broken: Dict[str, str] = {}
+        building: Dict[Future, str] = {}
+        # Package base -> packages waiting for its build.
+        attached: Dict[str, List[AURPackage]] = {}
+
+        def finish(package: AURPackage, error: Optional[str]) -> None:
+            if error is None:
+                installed.add(package.name)
+                results["success"].append(package.name)
+            else:
+                failed.add(package.name)
+                results["failed"].append((package.name, error))
+            if progress_callback:
+                progress_callback(len(installed) + len(failed), total)
+
+        def install(package: AURPackage, files: List[str]) -> None:
+            try:
+                self.install(package, files)
+            except Exception as e:
+                finish(package, str(e) or type(e).__name__)
+            else:
+                finish(package, None)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while True:
+                # Installing a package can make others ready, so scan
+                # until nothing changes.
+                changed = True
+                while changed:
+                    changed = False
+                    for package in list(waiting):
+                        needs = self.plan.edges.get(package.name, [])
+                        blocked = [dep for dep in needs if dep in failed]
+                        base = package.package_base
+                        if blocked:
+                            waiting.remove(package)
+                            finish(package, f"Dependency {', '.join(blocked)} failed")
+                            changed = True
+                        elif not all(dep in installed for dep in needs):
+                            continue
+                        elif base in broken:
+                            waiting.remove(package)
+                            finish(package, broken[base])
+                            changed = True
+                        elif base in built:
+                            waiting.remove(package)
+                            install(package, built[base])
+                            changed = True
+                        elif base in attached:
+                            waiting.remove(package)
+                            attached[base].append(package)
+                        elif self._can_start(len(building), budget):
+                            waiting.remove(package)
+                            attached[base] = [package]
+                            building[executor.submit(self.build, package)] = base
+
+                if not building:
+                    break
+                done, _ = wait(building, return_when=FIRST_COMPLETED)
+                for future in done:
+                    base = building.pop(future)
+                    try:
+                        built[base] = future.result()
+                    except Exception as e:
+                        broken[base] = str(e) or type(e).__name__
+                    for package in attached.pop(base):
+                        if base in broken:
+                            finish(package, broken[base])
+                        else:
+                            install(package, built[base])
+
+        # Only reached for packages whose dependencies never finished,
+        # which a plan without cycles does not have.
+        for package in waiting:
+            finish(package, "Dependencies were not installed")
+        return results
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from rune.core.localdb import DB_PATH, LocalDB, LocalPackage
+
+
+PACMAN_LOG = "/var/log/pacman.log"
+
+SNAPSHOT_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "runa",
+    ".installed-snapshot.json",
+)
+
+SNAPSHOT_VERSION = 1
+
+# (local directory mtime, pacman.log size)
+SnapshotKey = Tuple[int, int]
+
+
+def database_key(local_path: str, log_path: str = PACMAN_LOG) -> SnapshotKey:
+    """Changes whenever pacman installs, upgrades or removes a package."""
+    try:
+        local_mtime = os.stat(local_path).st_mtime_ns
+    except OSError:
+        local_mtime = 0
+    try:
+        log_size = os.stat(log_path).st_size
+    except OSError:
+        log_size = 0
+    return local_mtime, log_size
+
+
+class InstalledSnapshot(LocalDB):
+    """
+    LocalDB that keeps the parsed packages in memory and on disk.
+
+    The snapshot is keyed by the mtime of the local database directory,
+    which changes whenever a package is installed, upgraded or removed,
+    and the size of pacman.log, which grows with every transaction. While
+    the key is unchanged ``packages()`` returns the cached list without
+    touching the database. When it changes, only entries whose ``desc``
+    file is new or modified are parsed again.
+    """
+
+    def __init__(
+        self,
+        dbpath: str = DB_PATH,
+        path: Optional[str] = None,
+        log_path: str = PACMAN_LOG,
+        max_workers: int = 8,
+    ):
+        super().__init__(dbpath, max_workers)
+        self.path = path or SNAPSHOT_PATH
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._key: Optional[SnapshotKey] = None
+        # entry directory name -> (desc mtime, package)
+        self._entries: Dict[str, Tuple[int, LocalPackage]] = {}
+        self._packages: Optional[List[LocalPackage]] = None
+        self.reparsed = 0
+        self._load()
+
+    def key(self) -> SnapshotKey:
+        return database_key(self.local_path, self.log_path)
+
+    def changed(self) -> bool:
+        """True when pacman has touched the database since the last read."""
+        with self._lock:
+            return self._key != self.key()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+            return
+        if payload.get("dbpath") != self.dbpath:
+            return
+        try:
+            entries = {
+                name: (int(mtime), LocalPackage(**record))
+                for name, (mtime, record) in payload["entries"].items()
+            }
+            key = tuple(payload["key"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._entries = entries
+        self._key = (int(key[0]), int(key[1]))
+
+    def _save(self) -> None:
+        payload = {
+            "version": SNAPSHOT_VERSION,
+            "dbpath": self.dbpath,
+            "key": list(self._key or (0, 0)),
+            "entries": {
+                # Shallow copy; asdict() deep-copies and is several times slower.
+                name: [mtime, vars(pkg)] for name, (mtime, pkg) in self._entries.items()
+            },
+        }
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def _refresh(self, key: SnapshotKey) -> None:
+        current: Dict[str, int] = {}
+        for entry in self.entries():
+            try:
+                current[entry] = os.stat(os.path.join(entry, "desc")).st_mtime_ns
+            except OSError:
+                continue
+
+        entries: Dict[str, Tuple[int, LocalPackage]] = {}
+        stale: List[str] = []
+        for entry, mtime in current.items():
+            cached = self._entries.get(os.path.basename(entry))
+            if cached is not None and cached[0] == mtime:
+                entries[os.path.basename(entry)] = cached
+            else:
+                stale.append(entry)
+
+        for entry, pkg in zip(stale, self.read_entries(stale)):
+            if pkg is not None:
+                entries[os.path.basename(entry)] = (current[entry], pkg)
+        self.reparsed += len(stale)
+
+        self._entries = entries
+        self._key = key
+        self._packages = None
+        self._save()
+
+    def packages(self) -> List[LocalPackage]:
+        key = self.key()
+        with self._lock:
+            if key != self._key or not self._entries:
+                self._refresh(key)
+            if self._packages is None:
+                self._packages = sorted((pkg for _, pkg in self._entries.values()), key=lambda p: p.name)
+            return list(self._packages)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._key = None
@@ -0,0 +1,150 @@
+import os
+import tarfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from rune.core.localdb import DB_PATH, parse_sections
+
+
+PACMAN_CONF = "/etc/pacman.conf"
+
+
+@dataclass
+class SyncPackage:
+    name: str
+    version: str
+    repo: str
+    description: str = ""
+    download_size: int = 0
+    installed_size: int = 0
+    provides: List[str] = field(default_factory=list)
+
+
+def configured_repos(conf_path: str = PACMAN_CONF) -> List[str]:
+    """Repository sections of pacman.conf, in priority order."""
+    repos: List[str] = []
+    try:
+        with open(conf_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line.startswith("[") and line.endswith("]"):
+                    section = line[1:-1].strip()
+                    if section and section != "options" and section not in repos:
+                        repos.append(section)
+    except OSError:
+        pass
+    return repos
+
+
+def _to_int(values: Dict[str, List[str]], key: str) -> int:
+    try:
+        return int(values[key][0])
+    except (KeyError, IndexError, ValueError):
+        return 0
+
+
+def _to_package(values: Dict[str, List[str]], repo: str) -> Optional[SyncPackage]:
+    if not values.get("NAME") or not values.get("VERSION"):
+        return None
+    return SyncPackage(
+        name=values["NAME"][0],
+        version=values["VERSION"][0],
+        repo=repo,
+        description=(values.get("DESC") or [""])[0],
+        download_size=_to_int(values, "CSIZE"),
+        installed_size=_to_int(values, "ISIZE"),
+        provides=values.get("PROVIDES") or [],
+    )
+
+
+class SyncDB:
+    """
+    Reader for the pacman sync databases (``<dbpath>/sync/<repo>.db``).
+
+    The tarballs are streamed once into a name -> SyncPackage index, which
+    is reused until one of the database files changes. Where a package is
+    in several repositories the first one in pacman.conf wins, as it does
+    for pacman.
+    """
+
+    def __init__(self, dbpath: str = DB_PATH, conf_path: str = PACMAN_CONF):
+        self.dbpath = dbpath
+        self.conf_path = conf_path
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, SyncPackage]] = None
+        self._signature: Optional[Tuple] = None
+
+    @property
+    def sync_path(self) -> str:
+        return os.path.join(self.dbpath, "sync")
+
+    def exists(self) -> bool:
+        return bool(self._db_files())
+
+    def _db_files(self) -> List[Tuple[str, str]]:
+        try:
+            available = {
+                name[:-3]: os.path.join(self.sync_path, name)
+                for name in os.listdir(self.sync_path)
+                if name.endswith(".db")
+            }
+        except OSError:
+            return []
+        ordered = [repo for repo in configured_repos(self.conf_path) if repo in available]
+        if not ordered:
+            ordered = sorted(available)
+        return [(repo, available[repo]) for repo in ordered]
+
+    def read_repo(self, repo: str, path: str) -> Iterator[SyncPackage]:
+        """Stream the packages of one sync database."""
+        # Entries are "<name>-<version>/desc" (and "depends" in databases
+        # from older pacman versions); a package's files are adjacent.
+        current_dir = None
+        values: Dict[str, List[str]] = {}
+        with tarfile.open(path, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                directory = member.name.rsplit("/", 1)[0]
+                if directory != current_dir:
+                    if values:
+                        pkg = _to_package(values, repo)
+                        if pkg is not None:
+                            yield pkg
+                    current_dir = directory
+                    values = {}
+                f = tar.extractfile(member)
+                if f is not None:
+                    parse_sections(f.read().decode("utf-8", errors="replace"), values)
+        if values:
+            pkg = _to_package(values, repo)
+            if pkg is not None:
+                yield pkg
+
+    def index(self) -> Dict[str, SyncPackage]:
+        files = self._db_files()
+        stamps = []
+        for repo, path in files:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamps.append((repo, st.st_mtime_ns, st.st_size))
+        signature = tuple(stamps)
+
+        with self._lock:
+            if self._index is not None and self._signature == signature:
+                return self._index
+
+        # Raises OSError or tarfile.TarError for a database tarfile cannot
+        # read, e.g. zstd-compressed before Python 3.14.
+        index: Dict[str, SyncPackage] = {}
+        for repo, path in files:
+            for pkg in self.read_repo(repo, path):
+                index.setdefault(pkg.name, pkg)
+
+        with self._lock:
+            self._index = index
+            self._signature = signature
+        return index
@@ -0,0 +1,108 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+
+_DIGITS = frozenset("0123456789")
+_ALPHA = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ALNUM = _DIGITS | _ALPHA
+
+
+def _parse_evr(evr: str) -> Tuple[str, str, Optional[str]]:
+    # Mirrors libalpm's parseEVR: leading digits followed by ':' are the
+    # epoch, and the release is whatever follows the last '-'.
+    i = 0
+    while i < len(evr) and evr[i] in _DIGITS:
+        i += 1
+    dash = evr.rfind("-", i)
+    if i < len(evr) and evr[i] == ":":
+        epoch = evr[:i] or "0"
+        start = i + 1
+    else:
+        epoch = "0"
+        start = 0
+    if dash >= 0:
+        return epoch, evr[start:dash], evr[dash + 1:]
+    return epoch, evr[start:], None
+
+
+def rpmvercmp(a: str, b: str) -> int:
+    """Port of libalpm's rpmvercmp for a single version component."""
+    if a == b:
+        return 0
+    len_a = len(a)
+    len_b = len(b)
+    one = two = 0
+    ptr1 = ptr2 = 0
+    while one < len_a and two < len_b:
+        while one < len_a and a[one] not in _ALNUM:
+            one += 1
+        while two < len_b and b[two] not in _ALNUM:
+            two += 1
+        if one >= len_a or two >= len_b:
+            break
+        # Differing separator lengths decide the comparison.
+        if one - ptr1 != two - ptr2:
+            return -1 if one - ptr1 < two - ptr2 else 1
+
+        ptr1 = one
+        ptr2 = two
+        if a[ptr1] in _DIGITS:
+            while ptr1 < len_a and a[ptr1] in _DIGITS:
+                ptr1 += 1
+            while ptr2 < len_b and b[ptr2] in _DIGITS:
+                ptr2 += 1
+            isnum = True
+        else:
+            while ptr1 < len_a and a[ptr1] in _ALPHA:
+                ptr1 += 1
+            while ptr2 < len_b and b[ptr2] in _ALPHA:
+                ptr2 += 1
+            isnum = False
+
+        # Numeric segments are always newer than alpha segments.
+        if two == ptr2:
+            return 1 if isnum else -1
+
+        seg1 = a[one:ptr1]
+        seg2 = b[two:ptr2]
+        if isnum:
+            seg1 = seg1.lstrip("0")
+            seg2 = seg2.lstrip("0")
+            if len(seg1) != len(seg2):
+                return 1 if len(seg1) > len(seg2) else -1
+        if seg1 != seg2:
+            return 1 if seg1 > seg2 else -1
+
+        one = ptr1
+        two = ptr2
+
+    if one >= len_a and two >= len_b:
+        return 0
+    # A remaining alpha segment never beats an empty string.
+    if (one >= len_a and b[two] not in _ALPHA) or (one < len_a and a[one] in _ALPHA):
+        return -1
+    return 1
+
+
+@lru_cache(maxsize=8192)
+def vercmp(a: str, b: str) -> int:
+    """
+    Compare two ``[epoch:]version[-release]`` strings like ``vercmp`` and
+    ``alpm_pkg_vercmp``: -1 if ``a`` is older, 0 if equal, 1 if newer.
+    The release is only compared when both sides have one.
+    """
+    if a == b:
+        return 0
+    epoch1, ver1, rel1 = _parse_evr(a)
+    epoch2, ver2, rel2 = _parse_evr(b)
+    ret = rpmvercmp(epoch1, epoch2)
+    if ret == 0:
+        ret = rpmvercmp(ver1, ver2)
+        if ret == 0 and rel1 is not None and rel2 is not None:
+            ret = rpmvercmp(rel1, rel2)
+    return ret
+
+
+def vercmp_many(pairs: Iterable[Tuple[str, str]]) -> List[int]:
+    """vercmp for each ``(a, b)`` pair, in order."""
+    return [vercmp(a, b) for a, b in pairs]
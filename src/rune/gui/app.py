@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import asyncio
 import os
 import webbrowser
 import re
@@ -12,20 +13,77 @@ gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GdkPixbuf, GLib, Pango
 import threading
 import shutil
-
-from rune.api.aur import AURClient
+from typing import Optional
+
+from rune.api.aio import AsyncAURClient
+from rune.api.aur import AUR_HOST, AURClient
+from rune.api.cache import ResponseCache
+from rune.api.coalesce import CoalescingClient, RequestCoalescer, SupersededError
+from rune.api.federated import federated_search, federated_search_async
+from rune.api.index import AURIndex
+from rune.api.instant import InstantIndex
+from rune.api.popular import PopularNotReady, PopularPackages
+from rune.api.ratelimit import RateLimiter
+from rune.api.resultset import ResultSet
 from rune.core.installer import PackageInstaller
 from rune.core.pacman import (
-    list_installed_aur,
-    list_aur_updates,
+    list_installed_aur_async,
+    list_aur_updates_async,
     list_core_extra_updates,
     list_all_installed_packages,
     list_explicit_installed_packages,
     list_orphan_packages,
+    installed_packages_changed,
+    installed_sizes,
+    removal_impact,
     RepoPackage,
 )
+from rune.gui.bridge import AsyncBridge
 from rune.gui.dialogs import PasswordDialog, InstallProgressDialog
-from rune.gui.widgets import PackageRow
+from rune.gui.widgets import PackageRow, format_size
+
+
+# Pause in typing before an unmatched query falls back to a full search.
+INSTANT_FALLBACK_DELAY_MS = 400
+
+# Search types instant results can answer: search_by -> InstantIndex fields.
+INSTANT_SEARCH_FIELDS = {
+    "name": ("name",),
+    "keywords": ("keywords",),
+}
+
+# How often to retry the popular list while its first download runs.
+POPULAR_RETRY_SECONDS = 3
+
+# How often to check whether pacman changed the installed packages.
+LOCAL_DB_POLL_SECONDS = 5
+
+
+# Installed tab sort: combo id -> (InstalledSizes column, descending).
+INSTALLED_SORT_ORDERS = {
+    "name": ("name", False),
+    "size": ("size", True),
+    "with-dependencies": ("with_dependencies", True),
+    "recent": ("install_date", True),
+}
+
+
+def _summarize_names(names, limit=5) -> str:
+    text = ", ".join(names[:limit])
+    if len(names) > limit:
+        text += f" and {len(names) - limit} more"
+    return text
+
+# Sort combo id -> (ResultSet sort keys, status label).
+SEARCH_SORT_ORDERS = {
+    "popularity-desc": ([("popularity", True), ("votes", True)], "popularity"),
+    "popularity-asc": ([("popularity", False), ("votes", False)], "popularity"),
+    "relevance": ([], "best match"),
+    "trending": ([("trending", True)], "trending"),
+    "votes-desc": ([("votes", True), ("popularity", True)], "votes"),
+    "updated-desc": ([("last_modified", True)], "last update"),
+    "name-asc": ([("name", False)], "name"),
+}
 
 
 class RuneAURHelper(Gtk.Window):
@@ -35,9 +93,29 @@ class RuneAURHelper(Gtk.Window):
         self.set_default_size(900, 600)
         self.set_border_width(10)
         
-        self.aur_client = AURClient()
-        self.installer = PackageInstaller()
+        self.popular_packages = PopularPackages()
+        # The blocking client (installer) and the async one (search and
+        # refreshes on the bridge loop) share one cache and one budget.
+        aur_cache = ResponseCache()
+        aur_limiter = RateLimiter(AUR_HOST)
+        self.aur_client = AURClient(
+            cache=aur_cache,
+            popular=self.popular_packages,
+            rate_limiter=aur_limiter,
+        )
+        self.aur_bridge = AsyncBridge()
+        self.async_aur_client = AsyncAURClient(
+            cache=aur_cache,
+            popular=self.popular_packages,
+            rate_limiter=aur_limiter,
+        )
+        self.aur_index: Optional[AURIndex] = None
+        self.instant_index = None
+        self._instant_fallback_id = None
+        self.search_requests = RequestCoalescer()
+        self.installer = PackageInstaller(aur_client=self.aur_client)
         self.search_packages = []
+        self.search_results = ResultSet([])
         self.installed_packages = []
         self.update_aur_packages = []
         self.update_repo_packages = []
@@ -46,6 +124,7 @@ class RuneAURHelper(Gtk.Window):
         self.aur_enabled = False
         self.default_installed_filter = "all"
         self.max_search_results = 100
+        self.search_source = "rpc"
         
         missing = self.installer.check_dependencies()
         if missing:
@@ -61,15 +140,45 @@ class RuneAURHelper(Gtk.Window):
         
         self._setup_ui()
         self._ensure_yay_helper()
+        self._load_instant_index()
+        GLib.timeout_add_seconds(60 * 60, self._on_popular_refresh_timer)
+        GLib.timeout_add_seconds(LOCAL_DB_POLL_SECONDS, self._on_local_db_poll)
         self.connect("destroy", Gtk.main_quit)
 
+    def _on_popular_refresh_timer(self) -> bool:
+        if self.aur_enabled:
+            self.popular_packages.refresh_if_stale()
+        return True
+
+    def _on_local_db_poll(self) -> bool:
+        # Packages installed or removed outside rune (e.g. pacman in a
+        # terminal) make the installed and updates pages stale.
+        if not (self.installed_loaded or self.updates_loaded) or not installed_packages_changed():
+            return True
+        name = self.stack.get_visible_child_name()
+        if name == "installed" and self.installed_loaded:
+            if self.installed_refresh_button.get_sensitive():
+                self._on_refresh_installed(None)
+        else:
+            self.installed_loaded = False
+        if name == "updates" and self.updates_loaded:
+            if self.updates_refresh_button.get_sensitive():
+                self._on_refresh_updates(None)
+        else:
+            self.updates_loaded = False
+        return True
+
     def _apply_aur_preferences(self) -> None:
         name = self.stack.get_visible_child_name() if hasattr(self, "stack") else None
 
         if name == "search":
+            self._cancel_instant_fallback()
+            self.search_requests.supersede("search")
+            self.search_entry.set_sensitive(True)
             for child in self.search_listbox.get_children():
                 self.search_listbox.remove(child)
             self.search_packages = []
+            self.search_results = ResultSet([])
             if self.aur_enabled:
                 self.search_status_label.set_text("Enter a search term to find AUR packages")
             else:
@@ -124,6 +233,7 @@ class RuneAURHelper(Gtk.Window):
         installed_combo.append("all", "All")
         installed_combo.append("explicit", "Explicit")
         installed_combo.append("orphans", "Orphans")
+        installed_combo.append("unneeded", "Orphans (recursive)")
         installed_combo.append("foreign", "Foreign (AUR)")
         installed_combo.set_active_id(self.default_installed_filter)
         installed_box.pack_start(installed_label, False, False, 0)
@@ -134,17 +244,72 @@ class RuneAURHelper(Gtk.Window):
         vbox.pack_start(aur_frame, False, False, 0)
 
         search_frame = Gtk.Frame(label="Search")
-        search_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        search_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
         search_box.set_border_width(6)
 
+        max_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         max_label = Gtk.Label(label="Maximum search results:")
         max_label.set_halign(Gtk.Align.START)
         adjustment = Gtk.Adjustment(float(self.max_search_results), 10.0, 1000.0, 10.0, 50.0, 0.0)
         max_spin = Gtk.SpinButton()
         max_spin.set_adjustment(adjustment)
         max_spin.set_digits(0)
-        search_box.pack_start(max_label, False, False, 0)
-        search_box.pack_start(max_spin, False, False, 0)
+        max_box.pack_start(max_label, False, False, 0)
+        max_box.pack_start(max_spin, False, False, 0)
+        search_box.pack_start(max_box, False, False, 0)
+
+        source_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        source_label = Gtk.Label(label="Search using:")
+        source_label.set_halign(Gtk.Align.START)
+        source_combo = Gtk.ComboBoxText()
+        source_combo.append("rpc", "AUR RPC (online)")
+        source_combo.append("index", "Local index (offline)")
+        source_combo.set_active_id(self.search_source)
+        update_index_button = Gtk.Button(label="Update Local Index")
+        source_box.pack_start(source_label, False, False, 0)
+        source_box.pack_start(source_combo, False, False, 0)
+        source_box.pack_start(update_index_button, False, False, 0)
+        search_box.pack_start(source_box, False, False, 0)
+
+        index_status_label = Gtk.Label(label="Checking local index...")
+        index_status_label.set_halign(Gtk.Align.START)
+        search_box.pack_start(index_status_label, False, False, 0)
+
+        def on_index_status(text, error):
+            index_status_label.set_text(text if error is None else f"Local index unavailable: {error}")
+
+        # Opening the index can create or migrate the SQLite file and the
+        # count is a full table scan, so neither belongs on the main loop.
+        self.aur_bridge.run_blocking(self._index_status_text, callback=on_index_status)
+
+        def on_update_index(button):
+            button.set_sensitive(False)
+            index_status_label.set_text("Downloading AUR metadata...")
+
+            def worker():
+                try:
+                    index = self._get_aur_index()
+                    stats = index.update_from_url()
+                    text = (
+                        f"Local index contains {len(index)} packages "
+                        f"({stats.inserted} added, {stats.updated} updated, "
+                        f"{stats.deleted} removed in {stats.duration:.1f}s)"
+                    )
+                except Exception as e:
+                    text = f"Error: {e}"
+
+                def finish():
+                    button.set_sensitive(True)
+                    index_status_label.set_text(text)
+                    self._load_instant_index()
+
+                GLib.idle_add(finish)
+
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+
+        update_index_button.connect("clicked", on_update_index)
 
         search_frame.add(search_box)
         vbox.pack_start(search_frame, False, False, 0)
@@ -156,6 +321,7 @@ class RuneAURHelper(Gtk.Window):
             self.aur_enabled = aur_checkbox.get_active()
             self.default_installed_filter = installed_combo.get_active_id() or "all"
             self.max_search_results = int(max_spin.get_value())
+            self.search_source = source_combo.get_active_id() or "rpc"
             dlg.destroy()
             if hasattr(self, "installed_filter") and self.installed_filter is not None:
                 self.installed_filter.set_active_id(self.default_installed_filter)
@@ -163,6 +329,41 @@ class RuneAURHelper(Gtk.Window):
 
         dialog.connect("response", on_response)
 
+    def _get_aur_index(self) -> AURIndex:
+        if self.aur_index is None:
+            self.aur_index = AURIndex()
+        return self.aur_index
+
+    def _load_instant_index(self) -> None:
+        def worker():
+            try:
+                index = self._get_aur_index()
+                if index.is_empty():
+                    return
+                instant = InstantIndex.from_aur_index(index)
+            except Exception:
+                return
+            GLib.idle_add(setattr, self, "instant_index", instant)
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    def _index_status_text(self) -> str:
+        try:
+            count = len(self._get_aur_index())
+        except Exception as e:
+            return f"Local index unavailable: {e}"
+        if not count:
+            return "Local index is empty"
+        return f"Local index contains {count} packages"
+
+    def _get_index_provider(self):
+        index = self._get_aur_index()
+        if index.is_empty():
+            raise ValueError("Local index is empty; update it from Preferences")
+        return CoalescingClient(index, self.search_requests)
+
     def _show_about(self) -> None:
         dialog = Gtk.Dialog(title="About Runa", transient_for=self, modal=True)
         dialog.add_button(Gtk.STOCK_CLOSE, Gtk.ResponseType.CLOSE)
@@ -434,6 +635,7 @@ class RuneAURHelper(Gtk.Window):
         self.search_entry = Gtk.Entry()
         self.search_entry.set_placeholder_text("Search AUR packages...")
         self.search_entry.connect("activate", self._on_search)
+        self.search_entry.connect("changed", self._on_search_changed)
         search_box.pack_start(self.search_entry, True, True, 0)
         
         self.search_type = Gtk.ComboBoxText()
@@ -441,12 +643,18 @@ class RuneAURHelper(Gtk.Window):
         self.search_type.append("name", "Name Only")
         self.search_type.append("keywords", "Keywords")
         self.search_type.append("maintainer", "Maintainer")
+        self.search_type.append("all", "All Fields")
         self.search_type.set_active(0)
         search_box.pack_start(self.search_type, False, False, 0)
 
         self.sort_order = Gtk.ComboBoxText()
         self.sort_order.append("popularity-desc", "Most popular first")
         self.sort_order.append("popularity-asc", "Least popular first")
+        self.sort_order.append("relevance", "Best match first")
+        self.sort_order.append("trending", "Trending")
+        self.sort_order.append("votes-desc", "Most votes first")
+        self.sort_order.append("updated-desc", "Recently updated")
+        self.sort_order.append("name-asc", "Name")
         self.sort_order.set_active(0)
         self.sort_order.connect("changed", self._on_sort_order_changed)
         search_box.pack_start(self.sort_order, False, False, 0)
@@ -456,6 +664,34 @@ class RuneAURHelper(Gtk.Window):
         search_box.pack_start(search_button, False, False, 0)
         
         box.pack_start(search_box, False, False, 0)
+
+        filter_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+
+        filter_box.pack_start(Gtk.Label(label="Min votes:"), False, False, 0)
+        self.min_votes_spin = Gtk.SpinButton.new_with_range(0, 100000, 10)
+        self.min_votes_spin.set_value(0)
+        self.min_votes_spin.connect("value-changed", self._on_sort_order_changed)
+        filter_box.pack_start(self.min_votes_spin, False, False, 0)
+
+        filter_box.pack_start(Gtk.Label(label="Updated within:"), False, False, 0)
+        self.max_age_filter = Gtk.ComboBoxText()
+        self.max_age_filter.append("0", "Any time")
+        self.max_age_filter.append("30", "30 days")
+        self.max_age_filter.append("365", "1 year")
+        self.max_age_filter.append("730", "2 years")
+        self.max_age_filter.set_active(0)
+        self.max_age_filter.connect("changed", self._on_sort_order_changed)
+        filter_box.pack_start(self.max_age_filter, False, False, 0)
+
+        self.hide_out_of_date_check = Gtk.CheckButton(label="Hide out-of-date")
+        self.hide_out_of_date_check.connect("toggled", self._on_sort_order_changed)
+        filter_box.pack_start(self.hide_out_of_date_check, False, False, 0)
+
+        self.hide_orphans_check = Gtk.CheckButton(label="Hide orphans")
+        self.hide_orphans_check.connect("toggled", self._on_sort_order_changed)
+        filter_box.pack_start(self.hide_orphans_check, False, False, 0)
+
+        box.pack_start(filter_box, False, False, 0)
         
         results_frame = Gtk.Frame(label="Search Results")
         
@@ -506,16 +742,32 @@ class RuneAURHelper(Gtk.Window):
         self.installed_filter.append("all", "All")
         self.installed_filter.append("explicit", "Explicit")
         self.installed_filter.append("orphans", "Orphans")
+        self.installed_filter.append("unneeded", "Orphans (recursive)")
         self.installed_filter.append("foreign", "Foreign")
         self.installed_filter.set_active_id(self.default_installed_filter)
         self.installed_filter.connect("changed", self._on_installed_filter_changed)
         toolbar.pack_start(self.installed_filter, False, False, 0)
+
+        self.installed_sort = Gtk.ComboBoxText()
+        self.installed_sort.append("name", "Sort by name")
+        self.installed_sort.append("size", "Largest first")
+        self.installed_sort.append("with-dependencies", "Largest with dependencies")
+        self.installed_sort.append("recent", "Recently installed")
+        self.installed_sort.set_active_id("name")
+        self.installed_sort.connect("changed", self._on_installed_filter_changed)
+        toolbar.pack_start(self.installed_sort, False, False, 0)
         
         self.installed_status_label = Gtk.Label(label="Installed packages will be listed here")
         self.installed_status_label.set_halign(Gtk.Align.START)
         toolbar.pack_start(self.installed_status_label, True, True, 0)
         
         box.pack_start(toolbar, False, False, 0)
+
+        self.installed_summary_label = Gtk.Label()
+        self.installed_summary_label.set_halign(Gtk.Align.START)
+        self.installed_summary_label.set_line_wrap(True)
+        self.installed_summary_label.set_xalign(0)
+        box.pack_start(self.installed_summary_label, False, False, 0)
         
         results_frame = Gtk.Frame(label="Installed Packages")
         
@@ -607,31 +859,144 @@ class RuneAURHelper(Gtk.Window):
             self.updates_loaded = True
             self._on_refresh_updates(None)
     
+    def _cancel_instant_fallback(self) -> None:
+        if self._instant_fallback_id is not None:
+            GLib.source_remove(self._instant_fallback_id)
+            self._instant_fallback_id = None
+
+    def _on_search_changed(self, entry) -> None:
+        self._cancel_instant_fallback()
+        query = entry.get_text().strip()
+        fields = INSTANT_SEARCH_FIELDS.get(self.search_type.get_active_id() or "name-desc")
+        # The instant index holds the local index's names and keywords, so
+        # it answers name and keyword searches once the index has been
+        # synced, whichever source the full search uses.
+        if (
+            not self.aur_enabled
+            or self.instant_index is None
+            or fields is None
+            or len(query) < 2
+        ):
+            return
+
+        names = self.instant_index.search(query, limit=self.max_search_results, fields=fields)
+        if not names:
+            # Nothing local matches; run the full search against the
+            # configured source (the RPC by default) once typing pauses.
+            self._instant_fallback_id = GLib.timeout_add(
+                INSTANT_FALLBACK_DELAY_MS, self._on_instant_fallback
+            )
+            return
+
+        ticket = self.search_requests.ticket("search")
+        index = self._get_aur_index()
+
+        def lookup():
+            # Index rows are read off the main loop: a running index sync
+            # holds the index lock until it commits. With the RPC source
+            # these rows stand in until Enter fetches live results.
+            if not self.search_requests.is_current(ticket):
+                return []
+            by_name = {p.name: p for p in index.info(names)}
+            return [by_name[name] for name in names if name in by_name]
+
+        def on_done(packages, error):
+            self._display_search_results(ticket, packages or [], str(error) if error else None)
+
+        self.aur_bridge.run_blocking(lookup, callback=on_done)
+
+    def _on_instant_fallback(self) -> bool:
+        self._instant_fallback_id = None
+        self._start_search(lock_entry=False)
+        return False
+
     def _on_search(self, widget) -> None:
+        self._cancel_instant_fallback()
+        self._start_search()
+
+    def _start_search(self, lock_entry: bool = True) -> None:
         query = self.search_entry.get_text().strip()
         if not self.aur_enabled:
             self.search_status_label.set_text("AUR packages are disabled in preferences")
             return
         self.search_status_label.set_text("Searching...")
-        self.search_entry.set_sensitive(False)
-        
+        if lock_entry:
+            self.search_entry.set_sensitive(False)
+        ticket = self.search_requests.ticket("search")
+        search_by = self.search_type.get_active_id() or "name-desc"
+        if query and len(query) < 2:
+            self._display_search_results(ticket, [], "Search term must be at least 2 characters")
+            return
+
+        if self.search_source == "rpc":
+            def on_done(results, error):
+                if isinstance(error, PopularNotReady):
+                    self._wait_for_popular(ticket, str(error))
+                    return
+                self._display_search_results(ticket, results or [], str(error) if error else None)
+
+            future = self.aur_bridge.submit(self._search_rpc(query, search_by), on_done)
+            # Identical in-flight requests are already shared by the async
+            # client; the next search cancels this one outright.
+            self.search_requests.track(ticket, future)
+            return
+
         def search_thread():
             try:
-                search_by = self.search_type.get_active_id() or "name-desc"
+                provider = self._get_index_provider()
                 if query:
-                    if len(query) < 2:
-                        GLib.idle_add(self._display_results, [], "Search term must be at least 2 characters")
-                        return
-                    results = self.aur_client.search(query, by=search_by)
+                    if search_by == "all":
+                        results = federated_search(
+                            lambda q, by: provider.search(q, by=by, ticket=ticket), query
+                        )
+                    else:
+                        results = provider.search(query, by=search_by, ticket=ticket)
                 else:
-                    results = self.aur_client.search_popular(by=search_by, limit=self.max_search_results)
-                GLib.idle_add(self._display_results, results, None)
+                    results = provider.search_popular(
+                        by="name-desc" if search_by == "all" else search_by,
+                        limit=self.max_search_results,
+                        ticket=ticket,
+                    )
+                GLib.idle_add(self._display_search_results, ticket, results, None)
+            except SupersededError:
+                return
             except Exception as e:
-                GLib.idle_add(self._display_results, [], str(e))
+                GLib.idle_add(self._display_search_results, ticket, [], str(e))
         
         thread = threading.Thread(target=search_thread)
         thread.daemon = True
         thread.start()
+
+    async def _search_rpc(self, query, search_by):
+        client = self.async_aur_client
+        if not query:
+            return await client.search_popular(
+                by="name-desc" if search_by == "all" else search_by,
+                limit=self.max_search_results,
+            )
+        if search_by == "all":
+            return await federated_search_async(client.search, query)
+        return await client.search(query, by=search_by)
+
+    def _wait_for_popular(self, ticket, message) -> None:
+        if not self.search_requests.is_current(ticket):
+            return
+        self.search_entry.set_sensitive(True)
+        self.search_status_label.set_text(message)
+
+        def retry():
+            # Only if the user has not searched for something else since.
+            if self.search_requests.is_current(ticket):
+                self._start_search(lock_entry=False)
+            return False
+
+        GLib.timeout_add_seconds(POPULAR_RETRY_SECONDS, retry)
+
+    def _display_search_results(self, ticket, packages, error) -> None:
+        # Checked on the main loop: a newer search or instant results may
+        # have been shown since the worker finished.
+        if self.search_requests.is_current(ticket):
+            self._display_results(packages, error)
     
     def _display_results(self, packages, error) -> None:
         self.search_entry.set_sensitive(True)
@@ -640,6 +1005,7 @@ class RuneAURHelper(Gtk.Window):
             self.search_listbox.remove(child)
         
         self.search_packages = packages
+        self.search_results = ResultSet(packages)
         
         if error:
             self.search_status_label.set_text(f"Error: {error}")
@@ -659,31 +1025,39 @@ class RuneAURHelper(Gtk.Window):
             self.search_status_label.set_text("No packages found")
             return
 
-        sort_id = None
+        sort_id = "popularity-desc"
         if hasattr(self, "sort_order") and self.sort_order is not None:
-            sort_id = self.sort_order.get_active_id()
-
-        packages = list(self.search_packages)
-
-        if sort_id == "popularity-asc":
-            packages.sort(key=lambda p: (getattr(p, "popularity", 0.0), getattr(p, "votes", 0)))
-        else:
-            packages.sort(key=lambda p: (getattr(p, "popularity", 0.0), getattr(p, "votes", 0)), reverse=True)
+            sort_id = self.sort_order.get_active_id() or sort_id
+        sort_keys, order = SEARCH_SORT_ORDERS.get(sort_id, SEARCH_SORT_ORDERS["popularity-desc"])
+
+        max_age = int(self.max_age_filter.get_active_id() or 0)
+        results = self.search_results.filter(
+            min_votes=int(self.min_votes_spin.get_value()) or None,
+            out_of_date=False if self.hide_out_of_date_check.get_active() else None,
+            orphan=False if self.hide_orphans_check.get_active() else None,
+            max_age_days=max_age or None,
+        ).sort(sort_keys)
+
+        count = len(results)
+        if not count:
+            self.search_status_label.set_text(
+                f"No packages match the filters ({len(self.search_results)} found)"
+            )
+            return
 
         limit = max(1, int(self.max_search_results)) if hasattr(self, "max_search_results") else 100
 
-        for package in packages[:limit]:
+        for package in results.packages(limit):
             row = PackageRow(package)
             self.search_listbox.add(row)
 
         self.search_listbox.show_all()
 
-        count = len(packages)
         shown = min(count, limit)
         if count > limit:
-            self.search_status_label.set_text(f"Found {count} packages (showing first {shown}, sorted by popularity)")
+            self.search_status_label.set_text(f"Found {count} packages (showing first {shown}, sorted by {order})")
         else:
-            self.search_status_label.set_text(f"Found {count} packages (sorted by popularity)")
+            self.search_status_label.set_text(f"Found {count} packages (sorted by {order})")
 
     def _on_sort_order_changed(self, widget) -> None:
         if not getattr(self, "search_packages", None):
@@ -772,29 +1146,81 @@ class RuneAURHelper(Gtk.Window):
             self.installed_refresh_button.set_sensitive(False)
         self.installed_status_label.set_text("Loading installed packages...")
         
-        def worker():
-            try:
-                filter_id = None
-                if hasattr(self, "installed_filter") and self.installed_filter is not None:
-                    filter_id = self.installed_filter.get_active_id()
-
-                if filter_id == "all":
-                    packages = list_all_installed_packages()
-                elif filter_id == "explicit":
-                    packages = list_explicit_installed_packages()
-                elif filter_id == "orphans":
-                    packages = list_orphan_packages()
-                elif filter_id == "foreign" and self.aur_enabled:
-                    packages = list_installed_aur()
-                else:
-                    packages = []
-                GLib.idle_add(self._display_installed_packages, packages, None)
-            except Exception as e:
-                GLib.idle_add(self._display_installed_packages, [], str(e))
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
+        filter_id = None
+        if hasattr(self, "installed_filter") and self.installed_filter is not None:
+            filter_id = self.installed_filter.get_active_id()
+        sort_id = self.installed_sort.get_active_id()
+
+        def on_done(result, error):
+            if error is not None:
+                self._display_installed_packages([], str(error))
+                return
+            packages, sizes = result
+            self._display_installed_sizes(sizes)
+            self._display_installed_packages(packages, None)
+
+        self.aur_bridge.submit(self._load_installed(filter_id, sort_id), on_done)
+
+    async def _load_installed(self, filter_id, sort_id):
+        loop = asyncio.get_running_loop()
+        if filter_id == "foreign" and self.aur_enabled:
+            packages = await list_installed_aur_async(self.async_aur_client)
+        else:
+            packages = await loop.run_in_executor(None, self._list_installed, filter_id)
+        sizes = await loop.run_in_executor(None, self._sorted_sizes, packages, sort_id)
+        return packages, sizes
+
+    @staticmethod
+    def _list_installed(filter_id):
+        if filter_id == "all":
+            return list_all_installed_packages()
+        if filter_id == "explicit":
+            return list_explicit_installed_packages()
+        if filter_id == "orphans":
+            return list_orphan_packages()
+        if filter_id == "unneeded":
+            return list_orphan_packages(recursive=True)
+        return []
+
+    def _sorted_sizes(self, packages, sort_id):
+        try:
+            sizes = installed_sizes()
+        except Exception:
+            return None
+        self._sort_installed(packages, sizes, sort_id)
+        return sizes
     
+    @staticmethod
+    def _sort_installed(packages, sizes, sort_id) -> None:
+        key, descending = INSTALLED_SORT_ORDERS.get(sort_id, ("name", False))
+        with_dependencies = sizes.with_dependencies() if key == "with_dependencies" else None
+        for package in packages:
+            if isinstance(package, RepoPackage) and package.name in sizes.index:
+                package.repo = sizes.repo(package.name)
+                if with_dependencies is not None:
+                    package.size_with_dependencies = int(with_dependencies[sizes.index[package.name]])
+        position = {name: i for i, name in enumerate(sizes.order(key, descending))}
+        packages.sort(key=lambda p: position.get(p.name, len(position)))
+
+    def _display_installed_sizes(self, sizes) -> None:
+        if sizes is None or not len(sizes):
+            self.installed_summary_label.set_text("")
+            return
+        parts = [f"{len(sizes)} packages, {format_size(sizes.total_size())} installed"]
+        by_repo = sorted(sizes.size_by_repo().items(), key=lambda item: -item[1][1])
+        parts.append(", ".join(f"{repo} {format_size(size)}" for repo, (_, size) in by_repo))
+        reasons = sizes.size_by_reason()
+        parts.append(
+            f"explicit {format_size(reasons['explicit'][1])}, "
+            f"dependencies {format_size(reasons['dependency'][1])}"
+        )
+        orphans, orphan_size = sizes.orphan_size()
+        if orphans:
+            parts.append(f"{format_size(orphan_size)} reclaimable from {len(orphans)} orphans")
+        largest = ", ".join(f"{name} ({format_size(size)})" for name, size in sizes.largest(3))
+        parts.append(f"largest: {largest}")
+        self.installed_summary_label.set_text(" · ".join(parts))
+
     def _display_installed_packages(self, packages, error) -> None:
         if hasattr(self, "installed_refresh_button") and self.installed_refresh_button:
             self.installed_refresh_button.set_sensitive(True)
@@ -854,17 +1280,43 @@ class RuneAURHelper(Gtk.Window):
             dialog.run()
             dialog.destroy()
             return
-        pkg_names = ", ".join(p.name for p in selected[:5])
-        if len(selected) > 5:
-            pkg_names += f" and {len(selected) - 5} more"
+        names = [p.name for p in selected]
+        # Building the dependency graph reads the whole local database, so
+        # it runs off the main loop and the dialog follows when it is done.
+        widget.set_sensitive(False)
+
+        def on_impact(impact, error):
+            widget.set_sensitive(True)
+            self._confirm_remove_installed(selected, names, None if error else impact)
+
+        self.aur_bridge.run_blocking(removal_impact, names, callback=on_impact)
+
+    def _confirm_remove_installed(self, selected, names, impact) -> None:
+        lines = [f"Packages: {_summarize_names(names)}"]
+        message_type = Gtk.MessageType.QUESTION
+        if impact is not None:
+            if impact.dependencies:
+                lines.append(
+                    f"Also removes {len(impact.dependencies)} unneeded dependencies: "
+                    f"{_summarize_names(impact.dependencies)}"
+                )
+            if impact.breaks:
+                message_type = Gtk.MessageType.WARNING
+                lines.append(
+                    f"Required by {_summarize_names(impact.breaks)}; "
+                    "pacman will refuse the removal while these are installed"
+                )
+            if impact.optional:
+                lines.append(f"Optional dependency of: {_summarize_names(impact.optional)}")
+            lines.append(f"Frees {format_size(impact.freed_size)}")
         confirm = Gtk.MessageDialog(
             transient_for=self,
             modal=True,
-            message_type=Gtk.MessageType.QUESTION,
+            message_type=message_type,
             buttons=Gtk.ButtonsType.YES_NO,
             text=f"Remove {len(selected)} package(s)?"
         )
-        confirm.format_secondary_text(f"Packages: {pkg_names}")
+        confirm.format_secondary_text("\n\n".join(lines))
         response = confirm.run()
         confirm.destroy()
         if response != Gtk.ResponseType.YES:
@@ -878,7 +1330,6 @@ class RuneAURHelper(Gtk.Window):
         progress_dialog = InstallProgressDialog(self, selected, operation_name="Removing")
         
         def remove_thread():
-            names = [p.name for p in selected]
             results = {"success": [], "failed": []}
             try:
                 self.installer.remove_packages(names, password, log_callback=progress_dialog.log)
@@ -902,30 +1353,34 @@ class RuneAURHelper(Gtk.Window):
             self.updates_refresh_button.set_sensitive(False)
         self.updates_status_label.set_text("Checking for AUR and repo updates...")
         
-        def worker():
-            aur_packages = []
-            repo_packages = []
-            errors = []
+        self.aur_bridge.submit(
+            self._check_updates(self.aur_enabled),
+            lambda result, error: self._display_updates(*(result or ([], [], str(error)))),
+        )
 
-            if self.aur_enabled:
-                try:
-                    aur_packages = list_aur_updates()
-                except Exception as e:
-                    errors.append(str(e))
+    async def _check_updates(self, aur_enabled):
+        loop = asyncio.get_running_loop()
+        # The repo check runs in the executor while the AUR one awaits.
+        repo_check = loop.run_in_executor(None, list_core_extra_updates)
+        aur_packages = []
+        repo_packages = []
+        errors = []
 
+        if aur_enabled:
             try:
-                repo_packages = list_core_extra_updates()
+                aur_packages = await list_aur_updates_async(self.async_aur_client)
             except Exception as e:
                 errors.append(str(e))
 
-            error_msg = None
-            if not aur_packages and not repo_packages and errors:
-                error_msg = "; ".join(errors)
+        try:
+            repo_packages = await repo_check
+        except Exception as e:
+            errors.append(str(e))
 
-            GLib.idle_add(self._display_updates, aur_packages, repo_packages, error_msg)
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
+        error_msg = None
+        if not aur_packages and not repo_packages and errors:
+            error_msg = "; ".join(errors)
+        return aur_packages, repo_packages, error_msg
     
     def _display_updates(self, aur_packages, repo_packages, error) -> None:
         if hasattr(self, "updates_refresh_button") and self.updates_refresh_button:
@@ -956,9 +1411,13 @@ class RuneAURHelper(Gtk.Window):
             self.updates_listbox.add(row)
         
         self.updates_listbox.show_all()
-        self.updates_status_label.set_text(
-            f"Found {len(aur_packages)} AUR and {len(repo_packages)} repo update(s)"
-        )
+        status = f"Found {len(aur_packages)} AUR and {len(repo_packages)} repo update(s)"
+        download = sum(getattr(p, "download_size", 0) for p in repo_packages)
+        if download:
+            delta = sum(getattr(p, "installed_size_delta", 0) for p in repo_packages)
+            sign = "+" if delta >= 0 else ""
+            status += f" ({format_size(download)} to download, {sign}{format_size(delta)} installed)"
+        self.updates_status_label.set_text(status)
     
     def _get_selected_update_packages(self) -> list:
         selected = []
@@ -0,0 +1,65 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+from gi.repository import GLib
+
+
+class AsyncBridge:
+    """
+    Runs one asyncio event loop on a background thread so GTK code can
+    schedule coroutines and get the result back on the GTK main loop.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._loop
+
+    def submit(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        callback: Optional[Callable[[Any, Optional[BaseException]], None]] = None,
+    ) -> Future:
+        future: Future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def on_done(f: Future) -> None:
+            if callback is None or f.cancelled():
+                return
+            error = f.exception()
+            GLib.idle_add(callback, None if error else f.result(), error)
+
+        future.add_done_callback(on_done)
+        return future
+
+    def run_blocking(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        callback: Optional[Callable[[Any, Optional[BaseException]], None]] = None,
+    ) -> Future:
+        """Run a blocking ``func(*args)`` in the loop's executor, like submit()."""
+
+        async def call():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args))
+
+        return self.submit(call(), callback)
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
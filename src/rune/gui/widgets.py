@@ -1,3 +1,4 @@
+import time
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, GLib, Pango
@@ -6,6 +7,18 @@ from rune.api.aur import AURPackage
 from rune.core.pacman import RepoPackage
 
 
+def format_size(num_bytes: int) -> str:
+    size = float(abs(num_bytes))
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "GiB"
+    sign = "-" if num_bytes < 0 else ""
+    return f"{sign}{size:.1f} {unit}" if unit != "B" else f"{sign}{int(size)} B"
+
+
 class PackageRow(Gtk.ListBoxRow):
     def __init__(self, package):
         super().__init__()
@@ -83,7 +96,37 @@ class PackageRow(Gtk.ListBoxRow):
             repo_label = Gtk.Label()
             repo_label.set_markup(f"<small>Repository: {GLib.markup_escape_text(repo)}</small>")
             stats_box.pack_start(repo_label, False, False, 0)
-        
+
+        download_size = getattr(package, "download_size", 0)
+        if download_size:
+            delta = getattr(package, "installed_size_delta", 0)
+            sign = "+" if delta >= 0 else ""
+            size_label = Gtk.Label()
+            size_label.set_markup(
+                f"<small>Download: {format_size(download_size)}, "
+                f"installed size {sign}{format_size(delta)}</small>"
+            )
+            stats_box.pack_start(size_label, False, False, 0)
+        
+        installed_size = getattr(package, "installed_size", 0)
+        if installed_size:
+            size_text = f"Size: {format_size(installed_size)}"
+            with_dependencies = getattr(package, "size_with_dependencies", 0)
+            if with_dependencies > installed_size:
+                size_text += f" ({format_size(with_dependencies)} with dependencies)"
+            installed_size_label = Gtk.Label()
+            installed_size_label.set_markup(f"<small>{size_text}</small>")
+            stats_box.pack_start(installed_size_label, False, False, 0)
+
+        install_date = getattr(package, "install_date", 0)
+        if install_date:
+            reason = "explicitly" if getattr(package, "explicit", True) else "as a dependency"
+            date_label = Gtk.Label()
+            date_label.set_markup(
+                f"<small>Installed {reason} on {time.strftime('%Y-%m-%d', time.localtime(install_date))}</small>"
+            )
+            stats_box.pack_start(date_label, False, False, 0)
+
         if stats_box.get_children():
             info_box.pack_start(stats_box, False, False, 0)
         
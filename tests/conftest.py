@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+
+class ScriptedServer:
+    """
+    AUR RPC stand-in that answers with queued ``(status, headers)`` replies
+    in order, then with an empty search result.
+    """
+
+    def __init__(self):
+        self.replies = []
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append(self.path)
+                status, headers = server.replies.pop(0) if server.replies else (200, {})
+                body = json.dumps({"version": 5, "type": "search", "resultcount": 0, "results": []}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/rpc/"
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def scripted_server():
+    server = ScriptedServer()
+    yield server
+    server.stop()
+
+
+def _catalog():
+    from fake_aur_server import Catalog
+
+    return Catalog([
+        {"Name": f"pkg{i}", "Version": "1-1", "Description": f"package {i}", "Popularity": i, "NumVotes": i}
+        for i in range(20)
+    ])
+
+
+@pytest.fixture
+def fake_aur():
+    from fake_aur_server import FakeAURServer
+
+    with FakeAURServer(_catalog()) as server:
+        yield server
+
+
+@pytest.fixture
+def slow_fake_aur():
+    """fake_aur answering after 0.2s, so concurrent requests overlap."""
+    from fake_aur_server import FakeAURServer
+
+    with FakeAURServer(_catalog(), latency=0.2) as server:
+        yield server
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from rune.api.aio import AsyncAURClient
+from rune.api.cache import ResponseCache
+from rune.api.federated import federated_search, federated_search_async
+from rune.api.aur import AURClient
+from rune.api.ratelimit import RateLimiter, RateLimitExceeded
+from rune.core.localdb import LocalPackage
+from rune.core.pacman import list_aur_updates_async
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def limiter(path, **kwargs):
+    return RateLimiter("127.0.0.1", state_path=str(path), rate=1000.0, burst=1000, **kwargs)
+
+
+def test_search_and_info(fake_aur):
+    async def main():
+        async with AsyncAURClient(base_url=fake_aur.url) as client:
+            found = await client.search("pkg1", by="name")
+            info = await client.info(["pkg3", "pkg4", "missing"])
+        return found, info
+
+    found, info = run(main())
+    assert [pkg.name for pkg in found][:2] == ["pkg19", "pkg18"]
+    assert sorted(pkg.name for pkg in info) == ["pkg3", "pkg4"]
+
+
+def test_identical_requests_in_flight_are_shared(slow_fake_aur):
+    async def main():
+        async with AsyncAURClient(base_url=slow_fake_aur.url) as client:
+            results = await asyncio.gather(*(client.search("pkg1") for _ in range(5)))
+        return client, results
+
+    client, results = run(main())
+    assert slow_fake_aur.stats()["requests"] == 1
+    assert client.shared == 4
+    assert all([p.name for p in r] == [p.name for p in results[0]] for r in results)
+
+
+def test_cache_serves_repeated_requests(fake_aur, tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+
+    async def main():
+        async with AsyncAURClient(base_url=fake_aur.url, cache=cache) as client:
+            await client.search("pkg1")
+            await client.search("pkg1")
+
+    run(main())
+    assert fake_aur.stats()["requests"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_entry_is_revalidated_in_background(fake_aur, tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), ttls={"search": 0})
+
+    async def main():
+        async with AsyncAURClient(base_url=fake_aur.url, cache=cache) as client:
+            first = await client.search("pkg1")
+            await asyncio.sleep(0.01)
+            second = await client.search("pkg1")
+            await asyncio.gather(*client._background)
+        return first, second
+
+    first, second = run(main())
+    assert [p.name for p in first] == [p.name for p in second]
+    assert cache.stale_hits == 1
+    assert cache.revalidations == 1
+    assert fake_aur.stats()["requests"] == 2
+
+
+def test_daily_budget_is_enforced(fake_aur, tmp_path):
+    async def main():
+        client = AsyncAURClient(base_url=fake_aur.url, rate_limiter=limiter(tmp_path / "state.json", daily_budget=2))
+        async with client:
+            await client.search("pkg1")
+            await client.search("pkg2")
+            assert client.remaining_budget() == 0
+            with pytest.raises(RateLimitExceeded):
+                await client.search("pkg3")
+
+    run(main())
+    assert fake_aur.stats()["requests"] == 2
+
+
+def test_5xx_is_retried(scripted_server):
+    scripted_server.replies = [(503, {}), (502, {})]
+
+    async def main():
+        async with AsyncAURClient(base_url=scripted_server.url, backoff_base=0.001) as client:
+            assert await client.search("foo") == []
+        return client
+
+    assert run(main()).retries == 2
+    assert len(scripted_server.requests) == 3
+
+
+def test_429_pauses_the_limiter_for_retry_after(scripted_server, tmp_path):
+    scripted_server.replies = [(429, {"Retry-After": "3"})]
+    limit = limiter(tmp_path / "state.json")
+    pauses = []
+    limit.pause = pauses.append
+
+    async def main():
+        client = AsyncAURClient(
+            base_url=scripted_server.url, rate_limiter=limit, backoff_base=0.001, backoff_cap=0.01
+        )
+        async with client:
+            await client.search("foo")
+
+    run(main())
+    # Retry-After is honoured up to four times the backoff cap.
+    assert pauses == [pytest.approx(0.04)]
+    assert len(scripted_server.requests) == 2
+
+
+def test_retries_stop_at_max_retries(scripted_server):
+    scripted_server.replies = [(503, {})] * 5
+
+    async def main():
+        async with AsyncAURClient(base_url=scripted_server.url, max_retries=2, backoff_base=0.001) as client:
+            with pytest.raises(ConnectionError, match="503"):
+                await client.search("foo")
+
+    run(main())
+    assert len(scripted_server.requests) == 3
+
+
+def test_federated_search_async_matches_threaded(fake_aur):
+    async def main():
+        async with AsyncAURClient(base_url=fake_aur.url) as client:
+            return await federated_search_async(client.search, "pkg1")
+
+    threaded = federated_search(AURClient(base_url=fake_aur.url).search, "pkg1")
+    assert [p.name for p in run(main())] == [p.name for p in threaded]
+
+
+class ForeignBackend:
+    def foreign(self):
+        return [LocalPackage(name="pkg1", version="0.9-1"), LocalPackage(name="pkg2", version="1-1")]
+
+
+def test_list_aur_updates_async(fake_aur):
+    async def main():
+        async with AsyncAURClient(base_url=fake_aur.url) as client:
+            return await list_aur_updates_async(client, ForeignBackend())
+
+    updates = run(main())
+    assert [(pkg.name, pkg.local_version, pkg.version) for pkg in updates] == [("pkg1", "0.9-1", "1-1")]
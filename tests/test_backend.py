@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+import pytest
+
+from rune.core.backend import Backend, SubprocessBackend
+from rune.core.localdb import REASON_DEPEND, REASON_EXPLICIT, LocalPackage
+
+STANDIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pacman")
+
+
+def local_time(text):
+    return int(time.mktime(time.strptime(text, "%a %b %d %H:%M:%S %Y")))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """SubprocessBackend running the pacman stand-in over the text fixtures."""
+    monkeypatch.setenv("PATH", STANDIN_DIR + os.pathsep + os.environ.get("PATH", ""))
+    return SubprocessBackend()
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        Backend()
+
+
+def test_derived_queries_default_to_installed():
+    class Minimal(Backend):
+        def installed(self):
+            return [
+                LocalPackage(name="a", version="1", reason=REASON_EXPLICIT, depends=["b"]),
+                LocalPackage(name="b", version="1", reason=REASON_DEPEND),
+                LocalPackage(name="c", version="1", reason=REASON_DEPEND),
+            ]
+
+        def foreign(self):
+            return []
+
+        def updates(self):
+            return []
+
+        def repos(self):
+            return {}
+
+        def sync_packages(self):
+            return {}
+
+    backend = Minimal()
+    assert [p.name for p in backend.explicit()] == ["a"]
+    assert [p.name for p in backend.orphans()] == ["c"]
+    assert backend.package("b").name == "b"
+    assert backend.package("missing") is None
+
+
+def test_installed_parses_qi(backend):
+    bash, foo, yay = backend.installed()
+    assert (bash.name, bash.version, bash.description) == ("bash", "5.2.026-2", "The GNU Bourne Again shell")
+    assert bash.arch == "x86_64"
+    assert bash.provides == ["sh"]
+    assert bash.depends == ["readline", "libreadline.so=8-64", "glibc", "ncurses"]
+    assert bash.optdepends == ["bash-completion: for tab completion"]
+    assert bash.conflicts == []
+    assert bash.groups == []
+    assert bash.validation == ["Signature"]
+    assert bash.size == int(8.23 * 1024 ** 2)
+    assert bash.build_date == local_time("Mon Jan  1 12:00:00 2024")
+    assert bash.install_date == local_time("Tue Jan  2 08:30:00 2024")
+    assert bash.reason == REASON_EXPLICIT
+
+    assert foo.licenses == ["MIT", "Apache-2.0"]
+    assert foo.provides == ["python-foo-lib=1.0"]
+    assert foo.optdepends == ["python-bar: bar support", "python-baz: baz support"]
+    assert foo.conflicts == ["python-foo-git"]
+    assert foo.replaces == ["python-oldfoo"]
+    assert foo.size == 512 * 1024
+    assert foo.reason == REASON_DEPEND
+
+    assert yay.size == 1024 ** 3
+
+
+def test_explicit(backend):
+    assert [p.name for p in backend.explicit()] == ["bash", "yay-bin"]
+
+
+def test_package(backend):
+    assert backend.package("python-foo").version == "1.0-1"
+    assert backend.package("missing") is None
+
+
+def test_foreign_parses_qm(backend):
+    assert [(p.name, p.version) for p in backend.foreign()] == [("yay-bin", "12.3.5-1")]
+
+
+def test_updates_parse_qu_and_si(backend):
+    [(local, sync)] = backend.updates()
+    assert (local.name, local.version) == ("bash", "5.2.026-2")
+    assert (sync.name, sync.version, sync.repo) == ("bash", "5.2.032-1", "core")
+    assert sync.download_size == int(1.83 * 1024 ** 2)
+    assert sync.installed_size == int(8.25 * 1024 ** 2)
+    assert sync.provides == ["sh"]
+
+
+def test_repos_parse_sl(backend):
+    # Only installed packages, whether or not the installed version matches.
+    assert backend.repos() == {"bash": "core", "python-foo": "extra"}
+
+
+def test_sync_packages_first_repository_wins(backend):
+    packages = backend.sync_packages()
+    assert sorted(packages) == ["bash", "python-foo", "zsh"]
+    assert (packages["zsh"].repo, packages["zsh"].version) == ("extra", "5.9-5")
+    assert packages["python-foo"].provides == ["python-foo-lib=1.0"]
+
+
+def test_pacman_errors_are_raised(backend, monkeypatch):
+    monkeypatch.setattr(backend, "_command", lambda args: ["pacman", "-Qx"])
+    with pytest.raises(RuntimeError, match="unsupported"):
+        backend.installed()
+
+
+def test_large_stderr_does_not_block(backend):
+    # Each missing name costs a stderr line; together they overflow the
+    # pipe buffer before pacman closes stdout.
+    names = [f"missing-package-{i}" for i in range(3000)]
+    outcome = []
+
+    def query():
+        try:
+            backend._info(["-Qi", *names])
+        except RuntimeError as e:
+            outcome.append(str(e))
+
+    thread = threading.Thread(target=query, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive()
+    assert outcome and outcome[0].count("was not found") == len(names)
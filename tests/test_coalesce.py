@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from rune.api.coalesce import CoalescingClient, RequestCoalescer, SupersededError
+
+
+class BlockingCall:
+    """A call that waits for ``release`` and records how often it ran."""
+
+    def __init__(self, result="done"):
+        self.result = result
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def run_in_threads(target, count):
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_concurrent_calls_with_one_key_share_one_execution():
+    coalescer = RequestCoalescer()
+    call = BlockingCall()
+    leader, results = run_in_threads(lambda: coalescer.run("key", call), 1)
+    assert call.started.wait(5)
+    followers, follower_results = run_in_threads(lambda: coalescer.run("key", call), 3)
+    wait_for(lambda: coalescer.coalesced == 3)
+    call.release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert call.calls == 1
+    assert results + follower_results == ["done"] * 4
+    assert coalescer.stats() == {"executed": 1, "coalesced": 3, "cancelled": 0, "in_flight": 0}
+
+
+def test_followers_see_the_leaders_exception():
+    coalescer = RequestCoalescer()
+    call = BlockingCall(ConnectionError("down"))
+    leader, results = run_in_threads(lambda: coalescer.run("key", call), 1)
+    assert call.started.wait(5)
+    followers, follower_results = run_in_threads(lambda: coalescer.run("key", call), 2)
+    wait_for(lambda: coalescer.coalesced == 2)
+    call.release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert call.calls == 1
+    assert all(isinstance(r, ConnectionError) for r in results + follower_results)
+    # A failed call is not remembered; the next one runs again.
+    assert coalescer.run("key", lambda: "retried") == "retried"
+    assert coalescer.executed == 2
+
+
+def test_sequential_and_distinct_calls_are_not_coalesced():
+    coalescer = RequestCoalescer()
+    assert coalescer.run("a", lambda: 1) == 1
+    assert coalescer.run("a", lambda: 2) == 2
+    assert coalescer.run("b", lambda x: x, 3) == 3
+    assert (coalescer.executed, coalescer.coalesced) == (3, 0)
+
+
+def test_newer_ticket_supersedes_older_on_the_same_channel():
+    coalescer = RequestCoalescer()
+    first = coalescer.ticket("search")
+    other = coalescer.ticket("details")
+    assert coalescer.is_current(first)
+    second = coalescer.ticket("search")
+    assert not coalescer.is_current(first)
+    assert coalescer.is_current(second)
+    assert coalescer.is_current(other)
+
+    coalescer.supersede("search")
+    assert not coalescer.is_current(second)
+
+
+def test_run_ticket_refuses_stale_tickets_without_running():
+    coalescer = RequestCoalescer()
+    stale = coalescer.ticket("search")
+    coalescer.supersede("search")
+    calls = []
+    with pytest.raises(SupersededError):
+        coalescer.run_ticket(stale, "key", calls.append, 1)
+    assert calls == []
+    assert (coalescer.executed, coalescer.cancelled) == (0, 1)
+
+
+def test_run_ticket_drops_a_result_superseded_while_running():
+    coalescer = RequestCoalescer()
+    ticket = coalescer.ticket("search")
+    call = BlockingCall()
+    threads, results = run_in_threads(lambda: coalescer.run_ticket(ticket, "key", call), 1)
+    assert call.started.wait(5)
+    latest = coalescer.ticket("search")
+    call.release.set()
+    threads[0].join(5)
+
+    assert isinstance(results[0], SupersededError)
+    assert coalescer.cancelled == 1
+    assert coalescer.run_ticket(latest, "key", lambda: "fresh") == "fresh"
+
+
+def test_run_latest_issues_its_own_ticket():
+    coalescer = RequestCoalescer()
+    assert coalescer.run_latest("search", "key", lambda: "ok") == "ok"
+    assert coalescer.stats()["cancelled"] == 0
+
+
+def test_tracked_future_is_cancelled_by_a_newer_ticket():
+    coalescer = RequestCoalescer()
+    ticket = coalescer.ticket("search")
+    future = Future()
+    coalescer.track(ticket, future)
+    coalescer.ticket("search")
+    assert future.cancelled()
+    assert coalescer.cancelled == 1
+
+
+def test_tracking_a_stale_ticket_cancels_immediately():
+    coalescer = RequestCoalescer()
+    stale = coalescer.ticket("search")
+    coalescer.ticket("search")
+    future = Future()
+    coalescer.track(stale, future)
+    assert future.cancelled()
+    assert coalescer.cancelled == 1
+
+
+def test_finished_tracked_future_is_not_cancelled_or_counted():
+    coalescer = RequestCoalescer()
+    ticket = coalescer.ticket("search")
+    future = Future()
+    coalescer.track(ticket, future)
+    future.set_result(["pkg"])
+    coalescer.ticket("search")
+    assert future.result() == ["pkg"]
+    assert coalescer.cancelled == 0
+
+
+def test_tracking_is_per_channel():
+    coalescer = RequestCoalescer()
+    search, details = Future(), Future()
+    coalescer.track(coalescer.ticket("search"), search)
+    coalescer.track(coalescer.ticket("details"), details)
+    coalescer.ticket("details")
+    assert not search.cancelled()
+    assert details.cancelled()
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query, by="name-desc"):
+        self.calls.append(("search", query, by))
+        return [f"{query}:{by}"]
+
+    def search_popular(self, by="name-desc", limit=100):
+        self.calls.append(("search_popular", by, limit))
+        return ["popular"] * limit
+
+
+def test_coalescing_client_forwards_calls_and_keys_on_arguments():
+    client = FakeClient()
+    wrapped = CoalescingClient(client)
+    assert wrapped.search_by_name("yay") == ["yay:name"]
+    assert wrapped.search("yay") == ["yay:name-desc"]
+    assert wrapped.search_popular(limit=2) == ["popular", "popular"]
+    assert client.calls == [
+        ("search", "yay", "name"),
+        ("search", "yay", "name-desc"),
+        ("search_popular", "name-desc", 2),
+    ]
+    assert wrapped.stats()["executed"] == 3
+
+
+def test_coalescing_client_honours_tickets():
+    client = FakeClient()
+    coalescer = RequestCoalescer()
+    wrapped = CoalescingClient(client, coalescer)
+    stale = coalescer.ticket("search")
+    current = coalescer.ticket("search")
+    with pytest.raises(SupersededError):
+        wrapped.search("yay", ticket=stale)
+    assert wrapped.search("yay", ticket=current) == ["yay:name-desc"]
+    assert len(client.calls) == 1
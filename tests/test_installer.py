@@ -0,0 +1,27 @@
+from rune.core.installer import PackageInstaller, built_package_name
+
+
+def test_cleanup_keeps_state_stores(tmp_path):
+    for name in ("yay", "python-foo"):
+        (tmp_path / name / "src").mkdir(parents=True)
+    (tmp_path / ".aur-cache").mkdir()
+    (tmp_path / ".aur-cache" / "entry.json").write_text("{}")
+    (tmp_path / ".ratelimit.json").write_text("{}")
+    (tmp_path / ".aur-index.sqlite3").write_text("")
+
+    PackageInstaller(build_dir=str(tmp_path)).cleanup()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".aur-cache", ".aur-index.sqlite3", ".ratelimit.json"]
+    assert (tmp_path / ".aur-cache" / "entry.json").exists()
+
+
+def test_cleanup_one_package(tmp_path):
+    (tmp_path / "yay").mkdir()
+    (tmp_path / "paru").mkdir()
+    PackageInstaller(build_dir=str(tmp_path)).cleanup("yay")
+    assert [p.name for p in tmp_path.iterdir()] == ["paru"]
+
+
+def test_built_package_name():
+    assert built_package_name("/tmp/foo-docs-1.2-3-any.pkg.tar.zst") == "foo-docs"
+    assert built_package_name("python-bar-1:2.0.r5.gabc-1-x86_64.pkg.tar.xz") == "python-bar"
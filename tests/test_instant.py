@@ -0,0 +1,38 @@
+from rune.api.instant import InstantIndex
+
+
+INDEX = InstantIndex.build([
+    ("firefox", 10.0, ["browser"]),
+    ("browser-tools", 1.0, []),
+    ("chromium-bin", 5.0, ["browser", "chromium"]),
+])
+
+
+def test_name_and_keyword_hits():
+    # Exact keyword hits beat a name completion; ties go to popularity.
+    assert INDEX.search("browser") == ["firefox", "chromium-bin", "browser-tools"]
+
+
+def test_keyword_hits_rank_below_name_hits():
+    index = InstantIndex.build([("tool", 0.0, []), ("other", 0.0, ["tool"])])
+    scores = dict(index.search_scored("tool"))
+    assert scores["tool"] > scores["other"]
+
+
+def test_name_field_only():
+    assert INDEX.search("browser", fields=("name",)) == ["browser-tools"]
+
+
+def test_keywords_field_only():
+    assert INDEX.search("browser", fields=("keywords",)) == ["firefox", "chromium-bin"]
+    assert INDEX.search("firefox", fields=("keywords",)) == []
+
+
+def test_term_that_is_both_a_name_and_a_keyword():
+    index = InstantIndex.build([("chromium", 0.0, []), ("chromium-bin", 0.0, ["chromium"])])
+    assert index.search("chromium", fields=("name",)) == ["chromium", "chromium-bin"]
+    assert index.search("chromium", fields=("keywords",)) == ["chromium-bin"]
+
+
+def test_typos_are_tolerated():
+    assert INDEX.search("firefx")[:1] == ["firefox"]
@@ -0,0 +1,77 @@
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+from rune.api import popular as popular_module
+from rune.api.aur import AURClient
+from rune.api.popular import PopularNotReady, PopularPackages
+
+
+RECORDS = [{"Name": f"pkg{i}", "Version": "1-1", "Popularity": i, "NumVotes": i} for i in range(10)]
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def meta_url(tmp_path):
+    path = tmp_path / "packages-meta-v1.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(RECORDS, f)
+    return path.as_uri()
+
+
+def test_first_query_does_not_wait_for_the_download(tmp_path, meta_url, monkeypatch):
+    release = threading.Event()
+    download = popular_module.download_packages_meta
+
+    def gated_download(dest, url):
+        release.wait(5)
+        return download(dest, url)
+
+    monkeypatch.setattr(popular_module, "download_packages_meta", gated_download)
+    ranking = PopularPackages(path=str(tmp_path / "popular.json"), url=meta_url)
+
+    with pytest.raises(PopularNotReady):
+        ranking.top(3)
+    assert len(ranking) == 0
+    release.set()
+    wait_until(ranking.is_ready)
+    assert [pkg.name for pkg in ranking.top(3)] == ["pkg9", "pkg8", "pkg7"]
+
+
+def test_ranking_on_disk_is_served_at_once(tmp_path, meta_url):
+    path = str(tmp_path / "popular.json")
+    PopularPackages(path=path, url=meta_url).refresh()
+    ranking = PopularPackages(path=path, url="file:///nonexistent")
+    assert [pkg.name for pkg in ranking.page(1, size=2)] == ["pkg7", "pkg6"]
+
+
+def test_failed_download_is_reported(tmp_path):
+    ranking = PopularPackages(path=str(tmp_path / "popular.json"), url=(tmp_path / "missing.gz").as_uri())
+    with pytest.raises(PopularNotReady):
+        ranking.top()
+    wait_until(lambda: not ranking._refreshing)
+    with pytest.raises(ConnectionError):
+        ranking.top()
+    # The next query tries again.
+    with pytest.raises(PopularNotReady):
+        ranking.top()
+
+
+def test_search_popular_needs_a_ranking(fake_aur, tmp_path, meta_url):
+    with pytest.raises(ValueError):
+        AURClient(base_url=fake_aur.url).search_popular()
+
+    ranking = PopularPackages(path=str(tmp_path / "popular.json"), url=meta_url)
+    ranking.refresh()
+    client = AURClient(base_url=fake_aur.url, popular=ranking)
+    assert [pkg.name for pkg in client.search_popular(limit=2)] == ["pkg9", "pkg8"]
+    assert fake_aur.stats()["requests"] == 0
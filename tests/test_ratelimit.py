@@ -0,0 +1,148 @@
+import json
+import time
+
+import pytest
+
+from rune.api import aur
+from rune.api.aur import AURClient
+from rune.api.ratelimit import RateLimiter, RateLimitExceeded
+
+
+def limiter(path, **kwargs):
+    kwargs.setdefault("rate", 1000.0)
+    kwargs.setdefault("burst", 1000)
+    kwargs.setdefault("save_interval", 3600.0)
+    return RateLimiter("127.0.0.1", state_path=str(path), **kwargs)
+
+
+def stored_used(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["127.0.0.1"]["used"]
+
+
+class RecordingTime:
+    """The time module, with sleeps recorded instead of waited for."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    clock = RecordingTime()
+    monkeypatch.setattr(aur, "time", clock)
+    return clock.sleeps
+
+
+def test_daily_budget_is_enforced(fake_aur, tmp_path):
+    client = AURClient(base_url=fake_aur.url, rate_limiter=limiter(tmp_path / "state.json", daily_budget=3))
+    assert client.remaining_budget() == 3
+    for query in ("pkg1", "pkg2", "pkg3"):
+        client.search(query)
+    assert client.remaining_budget() == 0
+    with pytest.raises(RateLimitExceeded):
+        client.search("pkg4")
+    assert fake_aur.stats()["requests"] == 3
+
+
+def test_remaining_budget_without_limiter(fake_aur):
+    assert AURClient(base_url=fake_aur.url).remaining_budget() is None
+
+
+def test_budget_is_shared_between_processes(tmp_path):
+    path = tmp_path / "state.json"
+    first = limiter(path, daily_budget=100)
+    second = limiter(path, daily_budget=100)
+    first.acquire()
+    second.acquire()
+    second.acquire()
+    first.flush()
+    second.flush()
+    assert stored_used(path) == 3
+    assert limiter(path, daily_budget=100).remaining() == 97
+
+
+def test_later_process_adopts_the_window_on_disk(tmp_path):
+    path = tmp_path / "state.json"
+    start = time.time() - 60
+    path.write_text(json.dumps({"127.0.0.1": {"window_start": start, "used": 5}}))
+    limit = limiter(path, daily_budget=100)
+    limit.acquire()
+    limit.flush()
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)["127.0.0.1"]
+    assert entry == {"window_start": start, "used": 6}
+
+
+def test_expired_window_starts_over(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({"127.0.0.1": {"window_start": time.time() - 2 * 86400, "used": 100}}))
+    assert limiter(path, daily_budget=100).remaining() == 100
+
+
+def test_spend_is_saved_in_batches(tmp_path):
+    path = tmp_path / "state.json"
+    limit = limiter(path, daily_budget=1000, save_every=5)
+    for _ in range(4):
+        limit.acquire()
+    assert stored_used(path) == 0
+    limit.acquire()
+    assert stored_used(path) == 5
+    limit.acquire()
+    limit.flush()
+    assert stored_used(path) == 6
+
+
+def test_every_request_is_saved_near_the_budget(tmp_path):
+    path = tmp_path / "state.json"
+    limit = limiter(path, daily_budget=12, save_every=5)
+    for _ in range(8):
+        limit.acquire()
+    assert stored_used(path) == 8
+
+
+def test_429_is_retried_after_retry_after(scripted_server, tmp_path, sleeps):
+    scripted_server.replies = [(429, {"Retry-After": "3"})]
+    limit = limiter(tmp_path / "state.json")
+    pauses = []
+    limit.pause = pauses.append
+    client = AURClient(base_url=scripted_server.url, rate_limiter=limit, backoff_base=0.5)
+    assert client.search("yay") == []
+    assert client.retries == 1
+    assert len(scripted_server.requests) == 2
+    assert sleeps == [3.0]
+    # The limiter holds back other requests for as long.
+    assert pauses == [3.0]
+    assert client.remaining_budget() == limit.daily_budget - 2
+
+
+def test_5xx_is_retried_with_exponential_backoff(scripted_server, sleeps):
+    scripted_server.replies = [(503, {}), (502, {})]
+    client = AURClient(base_url=scripted_server.url, backoff_base=0.5, backoff_cap=8.0)
+    assert client.search("yay") == []
+    assert client.retries == 2
+    assert 0.25 <= sleeps[0] <= 0.5
+    assert 0.5 <= sleeps[1] <= 1.0
+
+
+def test_retries_give_up_after_max_retries(scripted_server, sleeps):
+    scripted_server.replies = [(500, {})] * 5
+    client = AURClient(base_url=scripted_server.url, max_retries=2)
+    with pytest.raises(ConnectionError, match="500"):
+        client.search("yay")
+    assert len(scripted_server.requests) == 3
+
+
+def test_client_errors_are_not_retried(scripted_server, sleeps):
+    scripted_server.replies = [(404, {})]
+    client = AURClient(base_url=scripted_server.url)
+    with pytest.raises(ConnectionError, match="404"):
+        client.search("yay")
+    assert len(scripted_server.requests) == 1
+    assert sleeps == []
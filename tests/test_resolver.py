@@ -0,0 +1,197 @@
+import pytest
+
+from rune.api.aur import AURPackage, InfoResult
+from rune.core.localdb import LocalPackage
+from rune.core.resolver import DependencyResolver, Providers, parse_depend, version_satisfies
+from rune.core.syncdb import SyncPackage
+
+
+def aur(name, version="1-1", **fields):
+    record = {"Name": name, "Version": version}
+    record.update(fields)
+    return AURPackage(record)
+
+
+class FakeAUR:
+    """AURClient stand-in answering info and provides searches from a dict."""
+
+    def __init__(self, *packages, errors=None):
+        self.records = {pkg.name: pkg for pkg in packages}
+        self.errors = errors or {}
+        self.info_calls = []
+
+    def info(self, names):
+        self.info_calls.append(list(names))
+        found = [self.records[name] for name in names if name in self.records]
+        return InfoResult(found, {name: self.errors[name] for name in names if name in self.errors})
+
+    def search(self, query, by="name-desc"):
+        assert by == "provides"
+        return [
+            pkg for pkg in self.records.values()
+            if query in (parse_depend(provide)[0] for provide in pkg.provides)
+        ]
+
+
+def installed(name, version="1-1", **fields):
+    return LocalPackage(name=name, version=version, **fields)
+
+
+def sync(name, version="1-1", provides=()):
+    return SyncPackage(name=name, version=version, repo="extra", provides=list(provides))
+
+
+def names(packages):
+    return [pkg.name for pkg in packages]
+
+
+@pytest.mark.parametrize("depend, expected", [
+    ("foo", ("foo", None, None)),
+    ("foo>=1.2", ("foo", ">=", "1.2")),
+    ("foo=1:2.0-1", ("foo", "=", "1:2.0-1")),
+    ("libfoo.so<3", ("libfoo.so", "<", "3")),
+])
+def test_parse_depend(depend, expected):
+    assert parse_depend(depend) == expected
+
+
+def test_version_satisfies():
+    assert version_satisfies("1.10", ">", "1.9")
+    assert version_satisfies("2", "=", "2")
+    assert not version_satisfies("1.0", ">=", "1.1")
+    assert version_satisfies("0.1", None, None)
+
+
+def test_versioned_dependency_needs_a_versioned_provide():
+    providers = Providers()
+    providers.add("tool-git", "r5-1", ["tool=5"])
+    providers.add("tool-compat", "1-1", ["tool"])
+    assert providers.all("tool") == ["tool-git", "tool-compat"]
+    assert providers.all("tool>=4") == ["tool-git"]
+    assert providers.all("tool>=6") == []
+
+
+def test_package_by_name_comes_before_providers():
+    providers = Providers()
+    providers.add("tool-git", "r5-1", ["tool=5"])
+    providers.add("tool", "4-1")
+    assert providers.find("tool") == "tool"
+
+
+def test_too_old_installed_package_is_built_from_the_aur():
+    client = FakeAUR(aur("libfoo", "2.1-1"))
+    app = aur("app", Depends=["libfoo>=2"])
+    plan = DependencyResolver(client, [installed("libfoo", "1.0-1")], {}).resolve([app])
+    assert names(plan.order) == ["libfoo", "app"]
+    assert plan.edges == {"app": ["libfoo"], "libfoo": []}
+    assert plan.ok
+
+
+def test_versioned_provide_satisfies_a_versioned_dependency():
+    client = FakeAUR(aur("tool-git", "r5-1", Provides=["tool=5"]))
+    app = aur("app", MakeDepends=["tool>=5"])
+    plan = DependencyResolver(client, [], {}).resolve([app])
+    assert names(plan.order) == ["tool-git", "app"]
+    assert plan.dependencies == ["tool-git"]
+
+
+def test_unversioned_provide_does_not_satisfy_a_versioned_dependency():
+    client = FakeAUR(aur("tool-compat", Provides=["tool"]))
+    plan = DependencyResolver(client, [], {}).resolve([aur("app", Depends=["tool>=5"])])
+    assert plan.missing == {"tool>=5": ["app"]}
+    assert not plan.ok
+
+
+def test_installed_then_repository_then_aur():
+    client = FakeAUR(aur("python"), aur("bash"), aur("libaur"))
+    app = aur("app", Depends=["python", "sh", "libaur"], CheckDepends=["zlib"])
+    plan = DependencyResolver(
+        client,
+        [installed("python", "3.12-1")],
+        {"bash": sync("bash", provides=["sh"]), "zlib": sync("zlib"), "python": sync("python", "3.13-1")},
+    ).resolve([app])
+    assert plan.installed == ["python"]
+    assert plan.repo_depends == ["bash", "zlib"]
+    assert names(plan.order) == ["libaur", "app"]
+    # Only what neither the system nor the repositories have is looked up.
+    assert client.info_calls == [["libaur"]]
+
+
+def test_without_repository_index_unknown_names_are_left_to_pacman():
+    client = FakeAUR(aur("libaur"))
+    app = aur("app", Depends=["libaur", "zlib"])
+    plan = DependencyResolver(client, [], repo=None).resolve([app])
+    assert plan.repo_depends == ["zlib"]
+    assert names(plan.order) == ["libaur", "app"]
+    assert plan.ok
+
+
+def test_provider_found_by_search():
+    client = FakeAUR(aur("virt-impl", Provides=["virt"]))
+    plan = DependencyResolver(client, [], {}).resolve([aur("app", Depends=["virt"])])
+    assert names(plan.order) == ["virt-impl", "app"]
+    assert client.info_calls == [["virt"], ["virt-impl"]]
+
+
+def test_one_info_call_per_dependency_level():
+    client = FakeAUR(
+        aur("a", Depends=["c"]),
+        aur("b", Depends=["c", "d"]),
+        aur("c"),
+        aur("d"),
+    )
+    plan = DependencyResolver(client, [], {}).resolve([aur("app", Depends=["a", "b"])])
+    assert client.info_calls == [["a", "b"], ["c", "d"]]
+    assert names(plan.order) == ["c", "a", "d", "b", "app"]
+    assert plan.edges["b"] == ["c", "d"]
+
+
+def test_cycles_are_reported():
+    client = FakeAUR(aur("cyc-b", Depends=["cyc-a"]))
+    plan = DependencyResolver(client, [], {}).resolve([aur("cyc-a", Depends=["cyc-b"])])
+    assert plan.cycles == [["cyc-a", "cyc-b"]]
+    assert plan.order == []
+    assert plan.problems() == ["dependency cycle: cyc-a -> cyc-b -> cyc-a"]
+
+
+def test_packages_outside_a_cycle_are_still_ordered():
+    client = FakeAUR(aur("cyc-b", Depends=["cyc-a"]), aur("lib"))
+    targets = [aur("cyc-a", Depends=["cyc-b"]), aur("app", Depends=["lib"])]
+    plan = DependencyResolver(client, [], {}).resolve(targets)
+    assert names(plan.order) == ["lib", "app"]
+    assert plan.cycles == [["cyc-a", "cyc-b"]]
+
+
+def test_failed_lookup_is_reported():
+    client = FakeAUR(errors={"libaur": "HTTP Error 503"})
+    plan = DependencyResolver(client, [], {}).resolve([aur("app", Depends=["libaur"])])
+    assert plan.lookup_failed == {"libaur": "HTTP Error 503"}
+    assert plan.missing == {}
+    assert not plan.ok
+
+
+def test_conflict_with_installed_package():
+    target = aur("tool-git", "r5-1", Provides=["tool=5"], Conflicts=["tool"])
+    plan = DependencyResolver(FakeAUR(), [installed("tool", "4-1")], {}).resolve([target])
+    assert plan.conflicts == [("tool-git", "tool")]
+    assert plan.problems() == ["tool-git conflicts with tool"]
+
+
+def test_git_package_replacing_its_installed_version_is_not_a_conflict():
+    target = aur("tool-git", "r5-1", Provides=["tool=5"], Conflicts=["tool"])
+    old = installed("tool-git", "r4-1", provides=["tool=4"], conflicts=["tool"])
+    plan = DependencyResolver(FakeAUR(), [old], {}).resolve([target])
+    assert plan.conflicts == []
+    assert plan.ok
+
+
+def test_installed_package_conflicting_with_a_planned_one():
+    other = installed("tool", "4-1", conflicts=["tool-git"])
+    plan = DependencyResolver(FakeAUR(), [other], {}).resolve([aur("tool-git")])
+    assert plan.conflicts == [("tool-git", "tool")]
+
+
+def test_conflicting_targets_are_reported_once():
+    targets = [aur("a", Conflicts=["b"]), aur("b", Conflicts=["a"])]
+    plan = DependencyResolver(FakeAUR(), [], {}).resolve(targets)
+    assert plan.conflicts == [("a", "b")]
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import pytest
+
+from rune.api.aur import AURPackage
+from rune.core.resolver import BuildPlan
+from rune.core.scheduler import BuildScheduler, available_memory
+
+
+def make_plan(edges, bases=None):
+    """BuildPlan for ``edges`` (package -> AUR dependencies), in that order."""
+    bases = bases or {}
+    order = [
+        AURPackage({"Name": name, "Version": "1-1", "PackageBase": bases.get(name, name)})
+        for name in edges
+    ]
+    return BuildPlan(targets=list(edges), order=order, edges={name: list(needs) for name, needs in edges.items()})
+
+
+class Recorder:
+    """Fake build and install steps that record what ran, and when."""
+
+    def __init__(self, build_time=0.0, fail_build=(), fail_install=()):
+        self.build_time = build_time
+        self.fail_build = set(fail_build)
+        self.fail_install = set(fail_install)
+        self.lock = threading.Lock()
+        self.builds = []
+        self.installed = []
+        self.install_threads = set()
+        self.running_builds = 0
+        self.max_builds = 0
+        self.running_installs = 0
+        self.max_installs = 0
+        # Installed packages at the start of each build.
+        self.seen_at_build = {}
+
+    def build(self, package):
+        with self.lock:
+            self.builds.append(package.package_base)
+            self.seen_at_build[package.package_base] = {name for name, _ in self.installed}
+            self.running_builds += 1
+            self.max_builds = max(self.max_builds, self.running_builds)
+        try:
+            time.sleep(self.build_time)
+            if package.package_base in self.fail_build:
+                raise RuntimeError(f"makepkg failed for {package.package_base}")
+            return [f"{package.package_base}-1-1-x86_64.pkg.tar.zst"]
+        finally:
+            with self.lock:
+                self.running_builds -= 1
+
+    def install(self, package, files):
+        with self.lock:
+            self.running_installs += 1
+            self.max_installs = max(self.max_installs, self.running_installs)
+            self.install_threads.add(threading.current_thread())
+        try:
+            time.sleep(0.005)
+            if package.name in self.fail_install:
+                raise RuntimeError(f"pacman failed for {package.name}")
+            with self.lock:
+                self.installed.append((package.name, tuple(files)))
+        finally:
+            with self.lock:
+                self.running_installs -= 1
+
+    @property
+    def installed_names(self):
+        return [name for name, _ in self.installed]
+
+
+def run(plan, recorder, **kwargs):
+    kwargs.setdefault("memory_budget", 1 << 50)
+    return BuildScheduler(plan, recorder.build, recorder.install, **kwargs).run()
+
+
+def test_packages_build_after_their_dependencies_install():
+    edges = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"], "e": []}
+    recorder = Recorder(build_time=0.01)
+    results = run(make_plan(edges), recorder, jobs=4)
+
+    assert sorted(results["success"]) == sorted(edges)
+    assert results["failed"] == []
+    position = {name: i for i, name in enumerate(recorder.installed_names)}
+    for name, needs in edges.items():
+        for dep in needs:
+            assert position[dep] < position[name]
+            assert dep in recorder.seen_at_build[name]
+
+
+def test_independent_packages_build_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def build(package):
+        barrier.wait()
+        return []
+
+    plan = make_plan({"a": [], "b": []})
+    results = BuildScheduler(plan, build, lambda package, files: None, jobs=2, memory_budget=1 << 50).run()
+    assert sorted(results["success"]) == ["a", "b"]
+
+
+def test_build_failure_fails_its_dependents():
+    edges = {"lib": [], "app": ["lib"], "tool": ["app"], "other": []}
+    recorder = Recorder(fail_build={"lib"})
+    results = run(make_plan(edges), recorder, jobs=2)
+
+    assert results["success"] == ["other"]
+    failed = dict(results["failed"])
+    assert failed["lib"] == "makepkg failed for lib"
+    assert failed["app"] == "Dependency lib failed"
+    assert failed["tool"] == "Dependency app failed"
+    assert "app" not in recorder.builds and "tool" not in recorder.builds
+
+
+def test_install_failure_fails_its_dependents():
+    recorder = Recorder(fail_install={"lib"})
+    results = run(make_plan({"lib": [], "app": ["lib"]}), recorder)
+    assert dict(results["failed"]) == {"lib": "pacman failed for lib", "app": "Dependency lib failed"}
+    assert recorder.builds == ["lib"]
+
+
+def test_split_packages_share_one_build():
+    edges = {"foo": [], "foo-docs": [], "app": ["foo-docs"]}
+    recorder = Recorder(build_time=0.01)
+    results = run(make_plan(edges, bases={"foo-docs": "foo"}), recorder, jobs=4)
+
+    assert sorted(results["success"]) == ["app", "foo", "foo-docs"]
+    assert sorted(recorder.builds) == ["app", "foo"]
+    files = dict(recorder.installed)
+    assert files["foo"] == files["foo-docs"] == ("foo-1-1-x86_64.pkg.tar.zst",)
+
+
+def test_failed_split_build_fails_every_package_of_the_base():
+    recorder = Recorder(fail_build={"foo"})
+    results = run(make_plan({"foo": [], "foo-docs": []}, bases={"foo-docs": "foo"}), recorder, jobs=4)
+    assert dict(results["failed"]) == {"foo": "makepkg failed for foo", "foo-docs": "makepkg failed for foo"}
+    assert recorder.builds == ["foo"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 3])
+def test_jobs_cap_concurrent_builds(jobs):
+    recorder = Recorder(build_time=0.02)
+    run(make_plan({f"pkg{i}": [] for i in range(8)}), recorder, jobs=jobs)
+    assert recorder.max_builds == jobs
+
+
+@pytest.mark.parametrize("budget, expected", [(3, 3), (1, 1), (0, 1)])
+def test_memory_budget_caps_concurrent_builds(budget, expected):
+    # A budget too small for one build still lets builds run one at a time.
+    recorder = Recorder(build_time=0.02)
+    results = run(
+        make_plan({f"pkg{i}": [] for i in range(8)}), recorder,
+        jobs=8, memory_budget=budget, build_memory=1,
+    )
+    assert len(results["success"]) == 8
+    assert recorder.max_builds == expected
+
+
+def test_installs_never_overlap_and_run_on_the_calling_thread():
+    recorder = Recorder(build_time=0.005)
+    run(make_plan({f"pkg{i}": [] for i in range(12)}), recorder, jobs=6)
+    assert len(recorder.installed) == 12
+    assert recorder.max_installs == 1
+    assert recorder.install_threads == {threading.current_thread()}
+
+
+def test_progress_callback_counts_every_package():
+    progress = []
+    recorder = Recorder(fail_build={"lib"})
+    BuildScheduler(
+        make_plan({"lib": [], "app": ["lib"], "other": []}), recorder.build, recorder.install,
+        jobs=2, memory_budget=1 << 50,
+    ).run(lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_available_memory(tmp_path):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal:       16000000 kB\nMemAvailable:    8000000 kB\n")
+    assert available_memory(str(meminfo)) == 8000000 * 1024
+    assert available_memory(str(tmp_path / "missing")) is None
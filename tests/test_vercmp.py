@@ -0,0 +1,132 @@
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from rune.core.vercmp import vercmp, vercmp_many
+
+
+# (a, b, expected) from pacman's test/util/vercmptest.sh, plus cases seen
+# on real systems. Every case is also checked in reverse.
+CORPUS = [
+    # all similar length, no pkgrel
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5.0", 1),
+    # mixed length
+    ("1.5.1", "1.5", 1),
+    # with pkgrel, simple
+    ("1.5.0-1", "1.5.0-1", 0),
+    ("1.5.0-1", "1.5.0-2", -1),
+    ("1.5.0-1", "1.5.1-1", -1),
+    ("1.5.0-2", "1.5.1-1", -1),
+    # with pkgrel, mixed lengths
+    ("1.5-1", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-2", -1),
+    # mixed pkgrel inclusion
+    ("1.5", "1.5-1", 0),
+    ("1.5-1", "1.5", 0),
+    ("1.1-1", "1.1", 0),
+    ("1.0-1", "1.1", -1),
+    ("1.1-1", "1.0", 1),
+    # alphanumeric versions
+    ("1.5b-1", "1.5-1", -1),
+    ("1.5b", "1.5", -1),
+    ("1.5b-1", "1.5", -1),
+    ("1.5b", "1.5.1", -1),
+    # from the manpage
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0b", "1.0beta", -1),
+    ("1.0beta", "1.0rc", -1),
+    ("1.0rc", "1.0", -1),
+    # alpha-dotted versions
+    ("1.5.a", "1.5", 1),
+    ("1.5.b", "1.5.a", 1),
+    ("1.5.1", "1.5.b", 1),
+    # alpha dots and dashes
+    ("1.5.b-1", "1.5.b", 0),
+    ("1.5-1", "1.5.b", -1),
+    # same/similar content, differing separators
+    ("2.0", "2_0", 0),
+    ("2.0_a", "2_0.a", 0),
+    ("2.0a", "2.0.a", -1),
+    ("2___a", "2_a", 1),
+    # epoch included version comparisons
+    ("0:1.0", "0:1.0", 0),
+    ("0:1.0", "0:1.1", -1),
+    ("1:1.0", "0:1.0", 1),
+    ("1:1.0", "0:1.1", 1),
+    ("1:1.0", "2:1.1", -1),
+    # epoch + sometimes present pkgrel
+    ("1:1.0", "0:1.0-1", 1),
+    ("1:1.0-1", "0:1.1-1", 1),
+    # epoch included on one version
+    ("0:1.0", "1.0", 0),
+    ("0:1.0", "1.1", -1),
+    ("0:1.1", "1.0", 1),
+    ("1:1.0", "1.0", 1),
+    ("1:1.0", "1.1", 1),
+    ("1:1.1", "1.1", 1),
+    # numbers that plain string comparison gets wrong
+    ("1.10-1", "1.9-1", 1),
+    ("1.0.10", "1.0.9", 1),
+    ("2.0-10", "2.0-9", 1),
+    ("1.0.0001", "1.0.1", 0),
+    ("20240101-1", "20231231-3", 1),
+    # VCS package versions
+    ("r1234.abcdef0-1", "r999.fedcba9-1", 1),
+    ("1.2.3.r45.g1a2b3c4-1", "1.2.3-1", 1),
+    ("1.2.3.r45.g1a2b3c4-1", "1.2.4-1", -1),
+    ("6.8.1.arch1-1", "6.8.1.arch2-1", -1),
+    ("2:1.0-1", "1:9.9-9", 1),
+    # pkgrel with minor release
+    ("1.0-1.1", "1.0-1", 1),
+    ("1.0-1.1", "1.0-2", -1),
+]
+
+
+CASES = [(a, b, expected) for a, b, expected in CORPUS] + [(b, a, -expected) for a, b, expected in CORPUS]
+
+
+def real_vercmp(a, b):
+    out = subprocess.run(["vercmp", a, b], stdout=subprocess.PIPE, text=True, check=True).stdout
+    return int(out.strip())
+
+
+def random_version(rng):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.random()
+        if kind < 0.6:
+            parts.append(str(rng.randint(0, 30)))
+        elif kind < 0.8:
+            parts.append(rng.choice(["a", "b", "rc", "alpha", "beta", "r", "git", "pre"]))
+        else:
+            parts.append(str(rng.randint(0, 9)) + rng.choice(["a", "b", "rc"]))
+    version = "".join(
+        part if i == 0 else rng.choice([".", ".", ".", "_", "+", ".."]) + part
+        for i, part in enumerate(parts)
+    )
+    if rng.random() < 0.2:
+        version = f"{rng.randint(0, 3)}:{version}"
+    if rng.random() < 0.7:
+        version += f"-{rng.randint(1, 5)}"
+    return version
+
+
+@pytest.mark.parametrize("a, b, expected", CASES)
+def test_corpus(a, b, expected):
+    assert vercmp(a, b) == expected
+
+
+def test_vercmp_many_matches_vercmp():
+    assert vercmp_many((a, b) for a, b, _ in CASES) == [expected for _, _, expected in CASES]
+
+
+@pytest.mark.skipif(shutil.which("vercmp") is None, reason="pacman's vercmp is not installed")
+def test_random_versions_match_pacman():
+    rng = random.Random(0)
+    pairs = [(random_version(rng), random_version(rng)) for _ in range(500)]
+    assert vercmp_many(pairs) == [real_vercmp(a, b) for a, b in pairs]